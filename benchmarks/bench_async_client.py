@@ -0,0 +1,43 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_common import load_src
+
+client_module = load_src("client_6_1", "6-1-client.py")
+
+REQUEST_COUNTS = [100, 1000, 5000]
+CALLER_THREADS = 64
+
+def bench_threaded(count):
+    client = client_module.MCPClient()
+    try:
+        client.send_request("ping", {})  # warm up
+        start = time.perf_counter()
+        # Each in-flight request parks one caller thread
+        with ThreadPoolExecutor(max_workers=CALLER_THREADS) as pool:
+            list(pool.map(lambda _: client.send_request("ping", {}), range(count)))
+        return time.perf_counter() - start
+    finally:
+        client.running = False
+        client.process.terminate()
+        client.process.wait()
+
+async def bench_async(count):
+    async with await client_module.AsyncMCPClient.start() as client:
+        await client.send_request("ping", {})  # warm up
+        start = time.perf_counter()
+        # All requests are in flight at once on a single event loop
+        await asyncio.gather(*(client.send_request("ping", {}, timeout=60) for _ in range(count)))
+        return time.perf_counter() - start
+
+def main():
+    print(f"{'requests':>8} | {'threaded x' + str(CALLER_THREADS) + ' (req/s)':>22} | {'asyncio (req/s)':>15}")
+    print("-" * 53)
+    for count in REQUEST_COUNTS:
+        threaded = bench_threaded(count)
+        async_elapsed = asyncio.run(bench_async(count))
+        print(f"{count:>8} | {count / threaded:>22.0f} | {count / async_elapsed:>15.0f}")
+
+if __name__ == "__main__":
+    main()
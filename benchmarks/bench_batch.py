@@ -0,0 +1,39 @@
+import time
+
+from bench_common import load_src
+
+client_module = load_src("client_6_1", "6-1-client.py")
+
+TOTAL_CALLS = 10_000
+BATCH_SIZES = [1, 10, 100]
+CALL = ("tools/call", {"name": "add_numbers", "arguments": {"a": 1, "b": 2}})
+
+def main():
+    client = client_module.MCPClient()
+    try:
+        client.send_request("ping", {})  # warm up
+
+        start = time.perf_counter()
+        for _ in range(TOTAL_CALLS):
+            client.send_request(*CALL)
+        baseline = (time.perf_counter() - start) / TOTAL_CALLS * 1e6
+
+        print(f"{TOTAL_CALLS} tools/call round trips")
+        print(f"{'mode':>16} | {'us/call':>8} | {'vs send_request':>15}")
+        print("-" * 46)
+        print(f"{'send_request':>16} | {baseline:>8.1f} | {1.0:>14.2f}x")
+
+        for size in BATCH_SIZES:
+            calls = [CALL] * size
+            start = time.perf_counter()
+            for _ in range(TOTAL_CALLS // size):
+                client.send_batch(calls)
+            per_call = (time.perf_counter() - start) / TOTAL_CALLS * 1e6
+            print(f"{'send_batch(' + str(size) + ')':>16} | {per_call:>8.1f} | {baseline / per_call:>14.2f}x")
+    finally:
+        client.running = False
+        client.process.terminate()
+        client.process.wait()
+
+if __name__ == "__main__":
+    main()
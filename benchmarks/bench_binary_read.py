@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import time
+import base64
+import tempfile
+import tracemalloc
+
+from bench_common import load_src
+
+server = load_src("server_6_1", "6-1-server.py")
+
+# Sizes in MB; override with e.g. `python bench_binary_read.py 1 10`
+SIZES_MB = [int(arg) for arg in sys.argv[1:]] or [1, 100, 1024]
+
+# The in-memory version needs roughly 4x the file size (bytes + base64 + JSON frame + copy)
+NAIVE_LIMIT_MB = 256
+
+def naive_frame(path, uri, sink):
+    """Read everything, base64 it, then dump one JSON string."""
+    with open(path, "rb") as f:
+        data = f.read()
+    response = {"jsonrpc": "2.0", "id": 1, "result": {"contents": [
+        {"uri": uri, "mimeType": "application/octet-stream", "blob": base64.b64encode(data).decode("ascii")}
+    ]}}
+    sink.write((json.dumps(response) + "\n").encode("utf-8"))
+
+def streamed_frame(path, uri, sink):
+    """The server path: mmap + block-wise base64 written piece by piece."""
+    result = server.handle_resources_read({"uri": uri}, None)
+    frame = server.encode_frame({"jsonrpc": "2.0", "id": 1, "result": result})
+    for piece in frame.pieces:
+        sink.write(piece)
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    print(f"{'size':>8} | {'in-memory (s)':>13} | {'in-memory peak':>14} | {'mmap stream (s)':>15} | {'mmap peak':>9}")
+    print("-" * 74)
+    with tempfile.TemporaryDirectory() as tmp:
+        server.DATA_DIR = os.path.realpath(tmp)
+        for size_mb in SIZES_MB:
+            path = os.path.join(server.DATA_DIR, f"blob_{size_mb}mb.bin")
+            with open(path, "wb") as f:
+                block = os.urandom(1024 * 1024)
+                for _ in range(size_mb):
+                    f.write(block)
+            uri = f"file://{path}"
+
+            with open(os.devnull, "wb") as sink:
+                if size_mb <= NAIVE_LIMIT_MB:
+                    naive_s, naive_peak = measure(naive_frame, path, uri, sink)
+                    naive_cols = f"{naive_s:>13.3f} | {naive_peak / 2**20:>11.1f} MB"
+                else:
+                    naive_cols = f"{'skipped':>13} | {'~' + str(4 * size_mb) + ' MB':>14}"
+                stream_s, stream_peak = measure(streamed_frame, path, uri, sink)
+
+            print(f"{str(size_mb) + ' MB':>8} | {naive_cols} | {stream_s:>15.3f} | {stream_peak / 2**20:>6.1f} MB")
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import concurrent.futures
+
+from bench_common import load_src
+
+client_module = load_src("client_6_1", "6-1-client.py")
+
+CALLS = 64
+PRIME_LIMIT = 60_000
+
+# The Step 6-1 server plus a pure-Python, GIL-bound tool: one process can only run one at a time
+SERVER_CODE = (
+    "import importlib.util\n"
+    f"spec = importlib.util.spec_from_file_location('server', {client_module.SERVER_SCRIPT!r})\n"
+    "server = importlib.util.module_from_spec(spec)\n"
+    "spec.loader.exec_module(server)\n"
+    "def count_primes(args):\n"
+    "    limit = int(args['limit'])\n"
+    "    return str(sum(all(n % d for d in range(2, int(n ** 0.5) + 1)) for n in range(2, limit)))\n"
+    "server.TOOLS['count_primes'] = {'definition': {'name': 'count_primes'}, 'handler': count_primes}\n"
+    "server.main()\n"
+)
+
+def make_client():
+    return client_module.MCPClient(command=[sys.executable, "-c", SERVER_CODE])
+
+def bench(size):
+    with client_module.MCPClientPool(size=size, client_factory=make_client) as pool:
+        params = {"name": "count_primes", "arguments": {"limit": PRIME_LIMIT}}
+        pool.send_request("tools/call", params)  # warm up
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=size * 2) as callers:
+            list(callers.map(lambda _: pool.send_request("tools/call", params), range(CALLS)))
+        return CALLS / (time.perf_counter() - start)
+
+def main():
+    cores = os.cpu_count() or 1
+    sizes = sorted({1, 2, 4, cores})
+    print(f"{CALLS} x count_primes({PRIME_LIMIT}) on {cores} cores")
+    print(f"{'workers':>7} | {'calls/s':>8} | {'speedup':>7}")
+    print("-" * 28)
+    baseline = None
+    for size in sizes:
+        rate = bench(size)
+        baseline = baseline or rate
+        print(f"{size:>7} | {rate:>8.1f} | {rate / baseline:>6.2f}x")
+
+if __name__ == "__main__":
+    main()
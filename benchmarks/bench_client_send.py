@@ -0,0 +1,73 @@
+import time
+import threading
+import concurrent.futures
+
+from bench_common import load_src
+
+client_module = load_src("client_6_1", "6-1-client.py")
+
+CALLER_THREADS = 32
+REQUESTS_PER_THREAD = 500
+
+class LockedSendMCPClient(client_module.MCPClient):
+    """The previous send path: id allocation, serialization and the pipe write all under one lock."""
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._request_id = 0
+
+    def send_request(self, method, params):
+        future = concurrent.futures.Future()
+        with self._lock:
+            self._request_id += 1
+            request_id = self._request_id
+            self._pending_requests[request_id] = future
+            request = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            self.process.stdin.write(client_module.json_dumps(request) + b"\n")
+            self.process.stdin.flush()
+        try:
+            response = future.result(timeout=10)
+            return response["result"]
+        finally:
+            self._pending_requests.pop(request_id, None)
+
+def run(client_class, method, params):
+    client = client_class()
+    try:
+        client.send_request("ping", {})  # warm up
+        barrier = threading.Barrier(CALLER_THREADS + 1)
+
+        def caller():
+            barrier.wait()
+            for _ in range(REQUESTS_PER_THREAD):
+                client.send_request(method, params)
+
+        threads = [threading.Thread(target=caller) for _ in range(CALLER_THREADS)]
+        for t in threads:
+            t.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        return CALLER_THREADS * REQUESTS_PER_THREAD / elapsed
+    finally:
+        client.running = False
+        client.process.terminate()
+        client.process.wait()
+
+def main():
+    workloads = [
+        ("ping", "ping", {}),
+        ("tools/call", "tools/call", {"name": "add_numbers", "arguments": {"a": 1, "b": 2}}),
+    ]
+    print(f"{CALLER_THREADS} caller threads x {REQUESTS_PER_THREAD} requests")
+    print(f"{'workload':>10} | {'locked write (req/s)':>20} | {'writer thread (req/s)':>21}")
+    print("-" * 58)
+    for label, method, params in workloads:
+        locked = run(LockedSendMCPClient, method, params)
+        queued = run(client_module.MCPClient, method, params)
+        print(f"{label:>10} | {locked:>20.0f} | {queued:>21.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import json
+import timeit
+
+from bench_common import load_src
+
+server = load_src("server_6_1", "6-1-server.py")
+
+NUMBER = 20_000
+BACKENDS = ["json", "msgspec", "orjson"]
+
+def payloads():
+    """Request line + response for the two hot methods, shaped like real traffic."""
+    call_request = {"jsonrpc": "2.0", "id": 1234, "method": "tools/call",
+                    "params": {"name": "add_numbers", "arguments": {"a": 12.5, "b": 30}}}
+    call_response = {"jsonrpc": "2.0", "id": 1234,
+                     "result": {"content": [{"type": "text", "text": "42.5"}], "isError": False}}
+    text = ("MCP サーバーのリソースです。The quick brown fox jumps over the lazy dog.\n" * 200)
+    read_request = {"jsonrpc": "2.0", "id": 1235, "method": "resources/read",
+                    "params": {"uri": "file:///data/notes.md"}}
+    read_response = {"jsonrpc": "2.0", "id": 1235,
+                     "result": {"contents": [{"uri": "file:///data/notes.md", "mimeType": "text/markdown", "text": text}]}}
+    return [("tools/call", call_request, call_response), ("resources/read", read_request, read_response)]
+
+def stdlib_text_roundtrip(request, response):
+    """The previous framing: text streams, strip() per line, str concat, implicit encode on write."""
+    line = json.dumps(request) + "\n"
+    json.loads(line.strip())
+    return (json.dumps(response) + "\n").encode("utf-8")
+
+def bytes_roundtrip(loads, dumps):
+    def run(line, response):
+        loads(line)
+        return dumps(response) + b"\n"
+    return run
+
+def per_call_us(fn, *args):
+    return timeit.timeit(lambda: fn(*args), number=NUMBER) / NUMBER * 1e6
+
+def main():
+    codecs = [("json (text)", stdlib_text_roundtrip, False)]
+    for name in BACKENDS:
+        try:
+            _, loads, dumps, _ = server.load_json_backend(name)
+        except ImportError:
+            print(f"({name} not installed, skipped)")
+            continue
+        codecs.append((f"{name} (bytes)", bytes_roundtrip(loads, dumps), True))
+
+    print(f"decode request line + encode response frame, {NUMBER} iterations")
+    print(f"{'payload':>14} | {'codec':>15} | {'us/msg':>8} | {'vs text':>7}")
+    print("-" * 54)
+    for label, request, response in payloads():
+        line = json.dumps(request).encode("utf-8") + b"\n"
+        baseline = None
+        for name, fn, uses_bytes in codecs:
+            us = per_call_us(fn, line if uses_bytes else request, response)
+            baseline = baseline or us
+            print(f"{label:>14} | {name:>15} | {us:>8.2f} | {baseline / us:>6.1f}x")
+    print(f"\nselected backend: {server.JSON_BACKEND}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import os
+import importlib.util
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src")
+
+def load_src(module_name, filename):
+    """Loads a step script from src/ as a module (the filenames have hyphens)."""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(SRC_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
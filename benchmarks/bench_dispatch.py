@@ -0,0 +1,43 @@
+import timeit
+
+from bench_common import load_src
+
+server = load_src("server_6_1", "6-1-server.py")
+
+METHOD_COUNTS = [8, 25, 50, 100, 200]
+NUMBER = 200_000
+
+def make_dummy_handler(i):
+    def handler(params, session):
+        return {}
+    return handler
+
+def chain_dispatch(chain, request):
+    """Equivalent of the old if/elif chain: compare against every branch in order."""
+    method = request.get("method")
+    for name, handler in chain:
+        if method == name:
+            return { "jsonrpc": "2.0", "id": request["id"], "result": handler(request.get("params") or {}, None) }
+    return None
+
+def main():
+    original_handlers = dict(server.HANDLERS)
+    print(f"{'methods':>8} | {'if/elif chain (ns)':>18} | {'registry (ns)':>13}")
+    print("-" * 47)
+
+    for count in METHOD_COUNTS:
+        handlers = { f"custom/method_{i}": make_dummy_handler(i) for i in range(count) }
+        server.HANDLERS = handlers
+        chain = list(handlers.items())
+
+        # Worst case for the chain: the last registered method
+        request = { "jsonrpc": "2.0", "id": 1, "method": chain[-1][0], "params": {} }
+
+        chain_ns = timeit.timeit(lambda: chain_dispatch(chain, request), number=NUMBER) / NUMBER * 1e9
+        registry_ns = timeit.timeit(lambda: server.dispatch(request, None), number=NUMBER) / NUMBER * 1e9
+        print(f"{count:>8} | {chain_ns:>18.1f} | {registry_ns:>13.1f}")
+
+    server.HANDLERS = original_handlers
+
+if __name__ == "__main__":
+    main()
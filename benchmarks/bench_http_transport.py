@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+import http.client
+import concurrent.futures
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src/6-1-server.py")
+
+SESSION_COUNTS = [1, 10, 50]
+CALLS_PER_SESSION = 200
+INITIALIZE = {"jsonrpc": "2.0", "id": 0, "method": "initialize",
+              "params": {"protocolVersion": "2025-11-25", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1.0"}}}
+
+def start_http_server():
+    process = subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT, "--listen", "http:127.0.0.1:0"],
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    for line in process.stderr:
+        if line.startswith("Listening on "):
+            # Keep draining stderr so the server never blocks logging into a full pipe
+            threading.Thread(target=process.stderr.read, daemon=True).start()
+            _, host, port = line.split("Listening on ", 1)[1].strip().split(":")
+            return process, host, int(port)
+    raise RuntimeError("server exited before listening")
+
+def run_session(host, port, keep_alive):
+    """initialize, then CALLS_PER_SESSION tools/call; returns the latency of each call in ms."""
+    conn = http.client.HTTPConnection(host, port)
+    headers = {"Content-Type": "application/json", "Accept": "application/json, text/event-stream"}
+    conn.request("POST", "/mcp", body=json.dumps(INITIALIZE), headers=headers)
+    response = conn.getresponse()
+    response.read()
+    headers["Mcp-Session-Id"] = response.getheader("Mcp-Session-Id")
+
+    latencies = []
+    for i in range(1, CALLS_PER_SESSION + 1):
+        body = json.dumps({"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                           "params": {"name": "add_numbers", "arguments": {"a": i, "b": 1}}})
+        start = time.perf_counter()
+        if not keep_alive:
+            conn.close()
+            conn = http.client.HTTPConnection(host, port)
+        conn.request("POST", "/mcp", body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    return latencies
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+def main():
+    process, host, port = start_http_server()
+    try:
+        print(f"{CALLS_PER_SESSION} tools/call per session over http://{host}:{port}/mcp")
+        print(f"{'sessions':>8} | {'connection':>11} | {'req/s':>7} | {'p50 (ms)':>8} | {'p99 (ms)':>8}")
+        print("-" * 56)
+        for sessions in SESSION_COUNTS:
+            for keep_alive in (False, True):
+                start = time.perf_counter()
+                with concurrent.futures.ThreadPoolExecutor(max_workers=sessions) as pool:
+                    results = list(pool.map(lambda _: run_session(host, port, keep_alive), range(sessions)))
+                elapsed = time.perf_counter() - start
+                latencies = sorted(l for r in results for l in r)
+                label = "keep-alive" if keep_alive else "per request"
+                print(f"{sessions:>8} | {label:>11} | {len(latencies) / elapsed:>7.0f} | "
+                      f"{percentile(latencies, 50):>8.2f} | {percentile(latencies, 99):>8.2f}")
+    finally:
+        process.terminate()
+        process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import sys
+import time
+import statistics
+
+from bench_common import load_src
+
+app = load_src("app_6_1", "6-1-app_oci.py")
+
+TOOL_COUNTS = [2, 4, 6, 8, 10]
+RUNS = 5
+# Stand-in for an I/O-bound tool (HTTP API, database query)
+TOOL_LATENCY_SECONDS = 0.05
+# The server runs at most METHOD_CONCURRENCY["tools/call"] (4) tool calls at once, so
+# parallel turns grow in steps of 4 tools
+
+# The Step 6-1 server plus a tool that waits like a remote call would
+SERVER_CODE = (
+    "import time, importlib.util\n"
+    f"spec = importlib.util.spec_from_file_location('server', {app.mcp_client_module.SERVER_SCRIPT!r})\n"
+    "server = importlib.util.module_from_spec(spec)\n"
+    "spec.loader.exec_module(server)\n"
+    "def lookup(args):\n"
+    f"    time.sleep({TOOL_LATENCY_SECONDS})\n"
+    "    return str(args['key'])\n"
+    "server.TOOLS['lookup'] = {'definition': {'name': 'lookup'}, 'handler': lookup}\n"
+    "server.main()\n"
+)
+
+def sequential(client, calls):
+    """The previous loop: one blocking tools/call after another."""
+    return [client.send_request("tools/call", {"name": name, "arguments": args}) for name, args in calls]
+
+def parallel(client, calls):
+    return app.run_tool_calls(client, calls)
+
+def turn_ms(client, run, calls):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        run(client, calls)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    client = app.MCPClient(command=[sys.executable, "-c", SERVER_CODE])
+    client.send_request(
+        "initialize", {"protocolVersion": "2025-11-25", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1.0"}}
+    )
+    try:
+        print(f"tool calls in one turn, each tool takes {TOOL_LATENCY_SECONDS * 1000:.0f} ms, median of {RUNS}")
+        print(f"{'tools':>5} | {'sequential (ms)':>15} | {'parallel (ms)':>13} | {'saved':>6}")
+        print("-" * 49)
+        for count in TOOL_COUNTS:
+            calls = [("lookup", {"key": i}) for i in range(count)]
+            before = turn_ms(client, sequential, calls)
+            after = turn_ms(client, parallel, calls)
+            print(f"{count:>5} | {before:>15.1f} | {after:>13.1f} | {1 - after / before:>5.0%}")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import json
+import time
+import importlib.util
+
+from bench_common import load_src
+
+app = load_src("app_6_1", "6-1-app_oci.py")
+
+TOOL_COUNT = 200
+TURNS = 200
+QUERIES = [
+    "What is the weather forecast for Tokyo tomorrow?",
+    "Create a calendar event for the team meeting on Friday",
+    "Search the invoices from last month and export them as csv",
+    "在庫の一覧を取得して",
+    "Translate this paragraph into French",
+]
+
+DOMAINS = [
+    ("weather", "weather forecast and observations"), ("calendar", "calendar events and schedules"),
+    ("invoice", "billing invoices"), ("inventory", "warehouse inventory, 在庫"), ("email", "email messages"),
+    ("file", "files in the document store"), ("user", "user accounts"), ("ticket", "support tickets"),
+    ("translation", "text translation between languages"), ("database", "database tables"),
+    ("map", "maps, routes and places"), ("payment", "payments and refunds"), ("report", "business reports"),
+    ("chat", "team chat channels"), ("image", "image files"), ("order", "customer orders, 注文"),
+    ("shipment", "shipments and tracking"), ("metric", "service metrics"), ("log", "application logs"),
+    ("contact", "address book contacts"),
+]
+ACTIONS = [
+    ("get", "Get one of the {what} by id."), ("list", "List {what}, newest first, with paging."),
+    ("search", "Search {what} by keyword and date range."), ("create", "Create a new entry in {what}."),
+    ("update", "Update fields of an entry in {what}."), ("delete", "Delete an entry from {what}."),
+    ("export", "Export {what} as csv or json."), ("summarize", "Summarize recent {what} in a few sentences."),
+    ("count", "Count {what} matching a filter."), ("watch", "Subscribe to changes in {what}."),
+]
+
+def make_catalog(count=TOOL_COUNT):
+    tools = []
+    for domain, what in DOMAINS:
+        for action, description in ACTIONS:
+            tools.append({
+                "name": f"{action}_{domain}",
+                "description": description.format(what=what),
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "query": {"type": "string", "description": "Keyword or id"},
+                        "limit": {"type": "integer"},
+                        "format": {"type": "string", "enum": ["csv", "json"]},
+                        "since": {"type": "string", "description": "ISO 8601 date"},
+                    },
+                    "required": ["query"],
+                },
+            })
+    return tools[:count]
+
+def old_prompt(tools):
+    """The previous rendering: the whole tools/list result, indented."""
+    return json.dumps({"tools": tools}, indent=2, ensure_ascii=False)
+
+def main():
+    tools = make_catalog()
+    builder = app.PromptBuilder(tools)
+
+    before = old_prompt(tools)
+    compact = "\n".join(builder.lines)
+    selected = []
+    for query in QUERIES:
+        builder.build("", query, "")
+        selected.append(builder.last_stats)
+    budgeted_tokens = sum(stats["tokens"] for stats in selected) / len(selected)
+    budgeted_tools = sum(stats["tools"] for stats in selected) / len(selected)
+
+    print(f"tool list for a {len(tools)}-tool catalog (budget {builder.token_budget} tokens, ~tokens = estimate_tokens)")
+    print(f"{'rendering':>26} | {'tools':>5} | {'chars':>7} | {'~tokens':>7} | {'vs indent=2':>11}")
+    print("-" * 70)
+    base = app.estimate_tokens(before)
+    rows = [
+        ("json indent=2 (previous)", len(tools), len(before), base),
+        ("compact lines, all tools", len(tools), len(compact), builder.catalog_tokens),
+        ("compact lines, budgeted", budgeted_tools, None, budgeted_tokens),
+    ]
+    for label, count, chars, tokens in rows:
+        chars_text = f"{chars:>7}" if chars is not None else f"{'-':>7}"
+        print(f"{label:>26} | {count:>5.0f} | {chars_text} | {tokens:>7.0f} | {tokens / base:>10.1%}")
+
+    if importlib.util.find_spec("pydantic") is not None:
+        schema = app.agent_decision_model().model_json_schema()
+        indented, compact_schema = json.dumps(schema, indent=2), app.decision_schema_text()
+        print(f"AgentDecision schema: {app.estimate_tokens(indented)} -> {app.estimate_tokens(compact_schema)} ~tokens")
+    else:
+        print("AgentDecision schema: pydantic not installed, not measured")
+
+    start = time.perf_counter()
+    for i in range(TURNS):
+        old_prompt(tools)
+    rebuild_ms = (time.perf_counter() - start) * 1000 / TURNS
+    start = time.perf_counter()
+    for i in range(TURNS):
+        builder.set_tools(tools)
+        builder.build("", QUERIES[i % len(QUERIES)], "")
+    build_ms = (time.perf_counter() - start) * 1000 / TURNS
+    print(f"per turn: json.dumps(indent=2) {rebuild_ms:.2f} ms, PromptBuilder.build {build_ms:.2f} ms")
+
+    for query, stats in zip(QUERIES, selected):
+        print(f"  {stats['tools']:>3} tools, ~{stats['tokens']:>4} tokens  <- {query}")
+
+if __name__ == "__main__":
+    main()
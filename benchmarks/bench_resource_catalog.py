@@ -0,0 +1,53 @@
+import os
+import time
+import tempfile
+
+from bench_common import load_src
+
+server = load_src("server_6_1", "6-1-server.py")
+
+FILE_COUNTS = [100, 10_000, 100_000]
+
+def listdir_resources(directory):
+    """The previous resources/list: os.listdir plus one isfile() stat per entry on every call."""
+    resource_list = []
+    for filename in os.listdir(directory):
+        file_path = os.path.join(directory, filename)
+        if os.path.isfile(file_path):
+            resource_list.append({"uri": f"file://{file_path}", "name": filename, "mimeType": "text/plain"})
+    return resource_list
+
+def per_call_ms(fn, min_seconds=0.5):
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls * 1000
+
+def main():
+    print(f"{'files':>8} | {'listdir (ms)':>12} | {'catalog build (ms)':>18} | {'catalog list (ms)':>17}")
+    print("-" * 66)
+    for count in FILE_COUNTS:
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(count):
+                open(os.path.join(tmp, f"file_{i:06d}.txt"), "w").close()
+            # Make sure the directory mtime is outside the racy window
+            past = time.time() - 10
+            os.utime(tmp, (past, past))
+
+            listdir_ms = per_call_ms(lambda: listdir_resources(tmp))
+
+            catalog = server.ResourceCatalog(tmp)
+            start = time.perf_counter()
+            catalog.list()
+            build_ms = (time.perf_counter() - start) * 1000
+            list_ms = per_call_ms(catalog.list)
+
+            assert catalog.scans == 1
+            print(f"{count:>8} | {listdir_ms:>12.3f} | {build_ms:>18.3f} | {list_ms:>17.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+import concurrent.futures
+
+from bench_common import load_src
+
+client_module = load_src("client_6_1", "6-1-client.py")
+
+SESSIONS = 20
+CALLS_PER_SESSION = 200
+INITIALIZE_PARAMS = {"protocolVersion": "2025-11-25", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1.0"}}
+
+def start_listening_server(address):
+    process = subprocess.Popen(
+        [sys.executable, client_module.SERVER_SCRIPT, "--listen", address],
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    for line in process.stderr:
+        if line.startswith("Listening on "):
+            # Keep draining stderr so the server never blocks logging into a full pipe
+            threading.Thread(target=process.stderr.read, daemon=True).start()
+            return process, line.split("Listening on ", 1)[1].strip()
+    raise RuntimeError("server exited before listening")
+
+def run_session(make_client):
+    """One agent session: connect, initialize, a run of tool calls, disconnect."""
+    start = time.perf_counter()
+    client = make_client()
+    try:
+        client.send_request("initialize", INITIALIZE_PARAMS)
+        first_call = time.perf_counter() - start
+        for i in range(CALLS_PER_SESSION):
+            client.send_request("tools/call", {"name": "add_numbers", "arguments": {"a": i, "b": 1}})
+        return first_call
+    finally:
+        client.close()
+
+def bench(make_client, parallel):
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=parallel) as pool:
+        first_calls = list(pool.map(lambda _: run_session(make_client), range(SESSIONS)))
+    elapsed = time.perf_counter() - start
+    return sum(first_calls) / len(first_calls) * 1000, SESSIONS * CALLS_PER_SESSION / elapsed
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        unix_server, unix_address = start_listening_server(f"unix:{os.path.join(tmp, 'mcp.sock')}")
+        tcp_server, tcp_address = start_listening_server("tcp:127.0.0.1:0")
+        try:
+            transports = [
+                ("spawn (stdio)", client_module.MCPClient),
+                ("unix socket", lambda: client_module.MCPClient.connect(unix_address)),
+                ("tcp localhost", lambda: client_module.MCPClient.connect(tcp_address)),
+            ]
+            print(f"{SESSIONS} sessions x {CALLS_PER_SESSION} tools/call each")
+            print(f"{'transport':>14} | {'parallel':>8} | {'connect+init (ms)':>17} | {'calls/s':>8}")
+            print("-" * 58)
+            for parallel in (1, 10):
+                for label, make_client in transports:
+                    first_call_ms, rate = bench(make_client, parallel)
+                    print(f"{label:>14} | {parallel:>8} | {first_call_ms:>17.1f} | {rate:>8.0f}")
+        finally:
+            for server in (unix_server, tcp_server):
+                server.terminate()
+                server.wait()
+
+if __name__ == "__main__":
+    main()
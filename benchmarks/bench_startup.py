@@ -0,0 +1,53 @@
+import time
+import statistics
+
+from bench_common import load_src
+
+client_module = load_src("client_6_1", "6-1-client.py")
+
+RUNS = 10
+# Stand-in for the app's own start-up work (OCI config, SDK client) done before the agent loop
+APP_SETUP_SECONDS = 0.15
+CLIENT_INFO = {"name": "bench", "version": "1.0"}
+FIRST_CALL = ("tools/call", {"name": "add_numbers", "arguments": {"a": 1, "b": 2}})
+
+def sequential():
+    """The previous start-up: app setup, then spawn, then one blocking request after another."""
+    time.sleep(APP_SETUP_SECONDS)
+    client = client_module.MCPClient()
+    client.send_request("initialize", {"protocolVersion": "2025-11-25", "capabilities": {}, "clientInfo": CLIENT_INFO})
+    client.send_notification("notifications/initialized", {})
+    client.send_request("ping", {})
+    list(client.iter_list("tools/list", "tools"))
+    list(client.iter_list("prompts/list", "prompts"))
+    client.send_request(*FIRST_CALL)
+    return client
+
+def pipelined():
+    """Spawn first and queue the whole handshake, then do the app setup while the server boots."""
+    client = client_module.MCPClient()
+    client.start_handshake(CLIENT_INFO)
+    time.sleep(APP_SETUP_SECONDS)
+    client.handshake()
+    client.send_request(*FIRST_CALL)
+    return client
+
+def time_to_first_call(start_up):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        client = start_up()
+        samples.append((time.perf_counter() - start) * 1000)
+        client.close()
+    return statistics.median(samples), min(samples)
+
+def main():
+    print(f"time to first tools/call, {RUNS} runs, {APP_SETUP_SECONDS * 1000:.0f} ms of app setup included")
+    print(f"{'start-up':>10} | {'median (ms)':>11} | {'min (ms)':>8}")
+    print("-" * 36)
+    for label, start_up in (("sequential", sequential), ("pipelined", pipelined)):
+        median, fastest = time_to_first_call(start_up)
+        print(f"{label:>10} | {median:>11.1f} | {fastest:>8.1f}")
+
+if __name__ == "__main__":
+    main()
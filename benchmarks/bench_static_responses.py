@@ -0,0 +1,41 @@
+import timeit
+
+from bench_common import load_src
+
+server = load_src("server_6_1", "6-1-server.py")
+
+NUMBER = 20_000
+METHODS = ["initialize", "tools/list", "prompts/list"]
+
+def add_demo_tools(count):
+    """Pads the catalog with tools shaped like add_numbers, to mimic a realistic server."""
+    for i in range(count):
+        definition = dict(server.TOOLS["add_numbers"]["definition"])
+        definition["name"] = f"demo_tool_{i}"
+        definition["description"] = f"Demo tool number {i} that takes two numbers and combines them"
+        server.TOOLS[definition["name"]] = {"definition": definition, "handler": server.add_numbers}
+
+def per_call_us(method):
+    request = {"jsonrpc": "2.0", "id": 42, "method": method, "params": {}}
+    return timeit.timeit(lambda: server.encode_frame(server.dispatch(request, None)), number=NUMBER) / NUMBER * 1e6
+
+def run(label):
+    server.STATIC_RESULTS.clear()
+    rebuilt = {m: per_call_us(m) for m in METHODS}
+    server.refresh_static_results()
+    spliced = {m: per_call_us(m) for m in METHODS}
+
+    print(f"[{label}] {len(server.TOOLS)} tools")
+    print(f"{'method':>14} | {'rebuild + dumps (us)':>20} | {'pre-serialized (us)':>19} | {'speedup':>7}")
+    print("-" * 70)
+    for m in METHODS:
+        print(f"{m:>14} | {rebuilt[m]:>20.2f} | {spliced[m]:>19.2f} | {rebuilt[m] / spliced[m]:>6.1f}x")
+    print()
+
+def main():
+    run("default catalog")
+    add_demo_tools(49)
+    run("50-tool catalog")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../src/6-1-server.py")
+
+REQUESTS = 10_000
+SEQUENTIAL_PINGS = 1_000
+POLICIES = ["always", "drain"]
+
+def read_io_counters(pid):
+    """syscr / syscw from /proc/<pid>/io, summed over all threads of the process."""
+    counters = {}
+    with open(f"/proc/{pid}/io") as f:
+        for line in f:
+            key, value = line.split(":")
+            counters[key] = int(value)
+    return counters["syscr"], counters["syscw"]
+
+def start_server(policy):
+    env = dict(os.environ, MCP_FLUSH_POLICY=policy)
+    return subprocess.Popen(
+        [sys.executable, SERVER_SCRIPT],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env
+    )
+
+def ping_line(request_id):
+    return (json.dumps({"jsonrpc": "2.0", "method": "ping", "id": request_id}) + "\n").encode()
+
+def bench_burst(policy):
+    """Pipelines REQUESTS pings and counts the server's read/write syscalls while answering them."""
+    process = start_server(policy)
+    try:
+        process.stdin.write(ping_line(0))
+        process.stdin.flush()
+        process.stdout.readline()  # warm up: imports and thread start-up are not counted
+        reads_before, writes_before = read_io_counters(process.pid)
+
+        payload = b"".join(ping_line(i) for i in range(1, REQUESTS + 1))
+        sender = threading.Thread(target=lambda: (process.stdin.write(payload), process.stdin.flush()))
+        start = time.perf_counter()
+        sender.start()
+        for _ in range(REQUESTS):
+            process.stdout.readline()
+        elapsed = time.perf_counter() - start
+        sender.join()
+
+        reads_after, writes_after = read_io_counters(process.pid)
+        return reads_after - reads_before, writes_after - writes_before, REQUESTS / elapsed
+    finally:
+        process.stdin.close()
+        process.wait()
+
+def bench_idle_latency(policy):
+    """One request in flight at a time: drain must not hold a lone response back."""
+    process = start_server(policy)
+    try:
+        start = time.perf_counter()
+        for i in range(SEQUENTIAL_PINGS):
+            process.stdin.write(ping_line(i))
+            process.stdin.flush()
+            process.stdout.readline()
+        return (time.perf_counter() - start) / SEQUENTIAL_PINGS * 1e6
+    finally:
+        process.stdin.close()
+        process.wait()
+
+def main():
+    print(f"{REQUESTS} pipelined pings; idle latency over {SEQUENTIAL_PINGS} sequential pings")
+    print(f"{'flush policy':>12} | {'read syscalls':>13} | {'write syscalls':>14} | {'req/s':>7} | {'idle RTT (us)':>13}")
+    print("-" * 72)
+    for policy in POLICIES:
+        reads, writes, rate = bench_burst(policy)
+        latency = bench_idle_latency(policy)
+        print(f"{policy:>12} | {reads:>13} | {writes:>14} | {rate:>7.0f} | {latency:>13.1f}")
+
+if __name__ == "__main__":
+    main()
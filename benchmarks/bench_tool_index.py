@@ -0,0 +1,70 @@
+import time
+import random
+
+from bench_common import load_src
+
+app = load_src("app_6_1", "6-1-app_oci.py")
+
+CATALOG_SIZES = [200, 1_000, 10_000]
+QUERIES = 500
+LIMIT = 20
+VOCABULARY = 3_000
+
+def make_catalog(size, rng):
+    """Synthetic tools; description words follow a Zipf-like distribution like real text."""
+    words = [f"w{i}" for i in range(VOCABULARY)]
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY)]
+    verbs = ["get", "list", "search", "create", "update", "delete", "export", "sync", "count", "watch"]
+    tools = []
+    for i in range(size):
+        description = rng.choices(words, weights, k=rng.randint(8, 20))
+        tools.append({
+            "name": f"{rng.choice(verbs)}_{rng.choice(words)}_{i}",
+            "description": " ".join(description),
+            "inputSchema": {"type": "object", "properties": {name: {"type": "string"} for name in rng.sample(words, 3)}},
+        })
+    return tools
+
+def make_query(tool, rng):
+    """A user message about one tool: a few of its words plus unrelated ones."""
+    own = tool["name"].split("_")[:2] + rng.sample(tool["description"].split(), 3)
+    return " ".join(own + [f"w{rng.randrange(VOCABULARY)}" for _ in range(3)])
+
+def linear_scan(tool_terms, query):
+    """A scan over every tool, as keyword matching without an index does."""
+    query_terms = set(app.tokenize(query))
+    scored = ((index, len(query_terms & terms)) for index, terms in enumerate(tool_terms))
+    return sorted((item for item in scored if item[1] > 0), key=lambda item: -item[1])[:LIMIT]
+
+def timings_ms(search, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+def main():
+    rng = random.Random(0)
+    print(f"{QUERIES} queries per catalog, top {LIMIT}")
+    print(f"{'tools':>6} | {'build (ms)':>10} | {'index p50':>9} | {'index p99':>9} | {'scan p50':>8} | {'hit@5':>5}")
+    print("-" * 65)
+    for size in CATALOG_SIZES:
+        tools = make_catalog(size, rng)
+        targets = [rng.randrange(size) for _ in range(QUERIES)]
+        queries = [make_query(tools[target], rng) for target in targets]
+
+        start = time.perf_counter()
+        index = app.ToolIndex(tools)
+        build_ms = (time.perf_counter() - start) * 1000
+        tool_terms = [set(app.tokenize(f"{tool['name']} {tool['description']}")) for tool in tools]
+
+        index_p50, index_p99 = timings_ms(lambda query: index.search(query, limit=LIMIT), queries)
+        scan_p50, _ = timings_ms(lambda query: linear_scan(tool_terms, query), queries)
+        hits = sum(target in [doc for doc, _ in index.search(query, limit=5)] for target, query in zip(targets, queries))
+        print(f"{size:>6} | {build_ms:>10.1f} | {index_p50:>6.3f} ms | {index_p99:>6.3f} ms | "
+              f"{scan_p50:>5.2f} ms | {hits / QUERIES:>5.0%}")
+
+if __name__ == "__main__":
+    main()
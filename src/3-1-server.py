@@ -6,227 +6,212 @@ import json
 # Resolve 'data' directory relative to this script
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data"))
 
+class JsonRpcError(Exception):
+    """Raised by a handler to answer with a JSON-RPC error object instead of a result."""
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+# -------------------------------------------------------------------------------------
+# 2. Tools
+# -------------------------------------------------------------------------------------
+def add_numbers(arguments):
+    a = arguments.get("a")
+    b = arguments.get("b")
+
+    if a is None or b is None:
+        raise ValueError("Missing arguments 'a' or 'b'")
+
+    if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+        raise ValueError("Arguments 'a' and 'b' must be numbers")
+
+    return str(a + b)
+
+# Tool name -> definition (as returned by tools/list) + implementation
+TOOLS = {
+    "add_numbers": {
+        "definition": {
+            "name": "add_numbers",
+            "description": "Add two numbers together",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "a": { "type": "number" },
+                    "b": { "type": "number" }
+                },
+                "required": ["a", "b"]
+            }
+        },
+        "handler": add_numbers
+    }
+}
+
+# -------------------------------------------------------------------------------------
+# 3. Method Handlers
+# Each handler takes the request params and returns the result object.
+# Notifications return None (nothing is written back).
+# -------------------------------------------------------------------------------------
+def handle_initialize(params):
+    return {
+        "protocolVersion": "2025-11-25",
+        "capabilities": {
+            "resources": {},
+            "tools": {}
+        },
+        "serverInfo": {
+            "name": "my-scratch-server",
+            "version": "1.0.0"
+        }
+    }
+
+def handle_initialized(params):
+    print("Connection initialized successfully.", file=sys.stderr)
+    return None
+
+def handle_ping(params):
+    return {}
+
+def handle_resources_list(params):
+    resource_list = []
+    try:
+        for filename in os.listdir(DATA_DIR):
+            file_path = os.path.join(DATA_DIR, filename)
+            if os.path.isfile(file_path):
+                resource_list.append({
+                    "uri": f"file://{file_path}",
+                    "name": filename,
+                    "mimeType": "text/plain"
+                })
+    except Exception as e:
+        print(f"Error listing resources: {e}", file=sys.stderr)
+    return { "resources": resource_list }
+
+def handle_resources_read(params):
+    uri = params.get("uri", "")
+    content_text = ""
+    error_msg = None
+
+    if uri.startswith("file://"):
+        file_path = uri.replace("file://", "")
+
+        # Security check: Ensure file_path is within DATA_DIR
+        # We use os.path.realpath to resolve symlinks and compare with DATA_DIR
+        real_path = os.path.realpath(file_path)
+        if real_path.startswith(DATA_DIR):
+            try:
+                with open(real_path, "r", encoding="utf-8") as f:
+                    content_text = f.read()
+            except FileNotFoundError:
+                error_msg = "File not found"
+            except Exception as e:
+                error_msg = str(e)
+        else:
+            error_msg = "Access denied: Path outside data directory"
+    else:
+        error_msg = "Invalid URI scheme"
+
+    if error_msg:
+        print(f"Error reading resource: {error_msg} (URI: {uri})", file=sys.stderr)
+        # Returns empty contents on error as per requirement
+        return { "contents": [] }
+    return {
+        "contents": [{ "uri": uri, "mimeType": "text/plain", "text": content_text }]
+    }
+
+def handle_tools_list(params):
+    return { "tools": [tool["definition"] for tool in TOOLS.values()] }
+
+def handle_tools_call(params):
+    name = params.get("name")
+    arguments = params.get("arguments", {})
+
+    tool = TOOLS.get(name)
+    if tool is None:
+        return { "content": [{ "type": "text", "text": f"Error: Unknown tool {name}" }], "isError": True }
+    try:
+        text = tool["handler"](arguments)
+        return { "content": [{ "type": "text", "text": text }] }
+    except Exception as e:
+        return { "content": [{ "type": "text", "text": f"Error: {str(e)}" }], "isError": True }
+
+# Method name -> handler. Lookup is a single dict access no matter how many methods are registered.
+HANDLERS = {
+    "initialize": handle_initialize,
+    "notifications/initialized": handle_initialized,
+    "ping": handle_ping,
+    "resources/list": handle_resources_list,
+    "resources/read": handle_resources_read,
+    "tools/list": handle_tools_list,
+    "tools/call": handle_tools_call,
+}
+
+# -------------------------------------------------------------------------------------
+# 4. Dispatcher
+# -------------------------------------------------------------------------------------
+def dispatch(request):
+    """Runs the handler for one request and returns the response dict (None for notifications)."""
+    if not isinstance(request, dict):
+        # Valid JSON that is not a request object, e.g. [1] or "x"
+        return { "jsonrpc": "2.0", "id": None, "error": { "code": -32600, "message": "Invalid Request" } }
+    method = request.get("method")
+    is_notification = "id" not in request
+    handler = HANDLERS.get(method)
+
+    if handler is None:
+        print(f"Unknown method: {method}", file=sys.stderr)
+        if is_notification:
+            return None
+        return {
+            "jsonrpc": "2.0", "id": request["id"],
+            "error": { "code": -32601, "message": f"Method not found: {method}" }
+        }
+
+    try:
+        result = handler(request.get("params") or {})
+    except JsonRpcError as e:
+        if is_notification:
+            return None
+        return { "jsonrpc": "2.0", "id": request["id"], "error": { "code": e.code, "message": e.message } }
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if is_notification:
+            return None
+        return { "jsonrpc": "2.0", "id": request["id"], "error": { "code": -32603, "message": str(e) } }
+
+    if is_notification:
+        return None
+    return { "jsonrpc": "2.0", "id": request["id"], "result": result }
+
+def send_response(response):
+    sys.stdout.write(json.dumps(response) + "\n")
+    sys.stdout.flush()
+
 def main():
     try:
         for line in sys.stdin:
             msg = line.strip()
             if not msg:
                 continue
-                
+
             try:
                 request = json.loads(msg)
-                method = request.get("method")
-                
-                # 1. Initialize
-                if method == "initialize":
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request["id"],
-                        "result": {
-                            "protocolVersion": "2025-11-25",
-                            "capabilities": {
-                                "resources": {},
-                                "tools": {}
-                            },
-                            "serverInfo": {
-                                "name": "my-scratch-server",
-                                "version": "1.0.0"
-                            }
-                        }
-                    }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-                
-                # 2. Notification: initialized
-                elif method == "notifications/initialized":
-                    print("Connection initialized successfully.", file=sys.stderr)
-                    
-                # 3. Ping
-                elif method == "ping":
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request["id"],
-                        "result": {}
-                    }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # 4. Resources List
-                elif method == "resources/list":
-                    resource_list = []
-                    try:
-                        for filename in os.listdir(DATA_DIR):
-                            file_path = os.path.join(DATA_DIR, filename)
-                            if os.path.isfile(file_path):
-                                resource_list.append({
-                                    "uri": f"file://{file_path}",
-                                    "name": filename,
-                                    "mimeType": "text/plain"
-                                })
-                    except Exception as e:
-                        print(f"Error listing resources: {e}", file=sys.stderr)
-                    
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request["id"],
-                        "result": {
-                            "resources": resource_list
-                        }
-                    }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # 5. Resources Read
-                elif method == "resources/read":
-                    params = request.get("params", {})
-                    uri = params.get("uri", "")
-
-                    content_text = ""
-                    error_msg = None
-                    
-                    if uri.startswith("file://"):
-                        file_path = uri.replace("file://", "")
-                        
-                        # Security check: Ensure file_path is within DATA_DIR
-                        # We use os.path.realpath to resolve symlinks and compare with DATA_DIR
-                        real_path = os.path.realpath(file_path)
-                        if real_path.startswith(DATA_DIR):
-                            try:
-                                with open(real_path, "r", encoding="utf-8") as f:
-                                    content_text = f.read()
-                            except FileNotFoundError:
-                                error_msg = "File not found"
-                            except Exception as e:
-                                error_msg = str(e)
-                        else:
-                            error_msg = "Access denied: Path outside data directory"
-                    else:
-                        error_msg = "Invalid URI scheme"
-
-                    if error_msg:
-                         print(f"Error reading resource: {error_msg} (URI: {uri})", file=sys.stderr)
-                         # Returns empty contents on error as per requirement
-                         response = {
-                            "jsonrpc": "2.0",
-                            "id": request["id"],
-                            "result": {
-                                "contents": [] 
-                            }
-                        }
-                    else:
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": request["id"],
-                            "result": {
-                                "contents": [
-                                    {
-                                        "uri": uri,
-                                        "mimeType": "text/plain",
-                                        "text": content_text
-                                    }
-                                ]
-                            }
-                        }
-
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # 6. Tools List
-                elif method == "tools/list":
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request["id"],
-                        "result": {
-                            "tools": [
-                                {
-                                    "name": "add_numbers",
-                                    "description": "Add two numbers together",
-                                    "inputSchema": {
-                                        "type": "object",
-                                        "properties": {
-                                            "a": { "type": "number" },
-                                            "b": { "type": "number" }
-                                        },
-                                        "required": ["a", "b"]
-                                    }
-                                }
-                            ]
-                        }
-                    }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # 7. Tools Call
-                elif method == "tools/call":
-                    params = request.get("params", {})
-                    name = params.get("name")
-                    arguments = params.get("arguments", {})
-                    
-                    if name == "add_numbers":
-                        try:
-                            a = arguments.get("a")
-                            b = arguments.get("b")
-                            
-                            if a is None or b is None:
-                                raise ValueError("Missing arguments 'a' or 'b'")
-                                
-                            if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
-                                raise ValueError("Arguments 'a' and 'b' must be numbers")
-                                
-                            result = a + b
-                            
-                            response = {
-                                "jsonrpc": "2.0",
-                                "id": request["id"],
-                                "result": {
-                                    "content": [
-                                        {
-                                            "type": "text",
-                                            "text": str(result)
-                                        }
-                                    ]
-                                }
-                            }
-                        except Exception as e:
-                            response = {
-                                "jsonrpc": "2.0",
-                                "id": request["id"],
-                                "result": {
-                                    "content": [
-                                        {
-                                            "type": "text",
-                                            "text": f"Error: {str(e)}"
-                                        }
-                                    ],
-                                    "isError": True
-                                }
-                            }
-                    else:
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": request["id"],
-                            "result": {
-                                "content": [
-                                    {
-                                        "type": "text",
-                                        "text": f"Error: Unknown tool {name}"
-                                    }
-                                ],
-                                "isError": True
-                            }
-                        }
-                        
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                else:
-                    print(f"Unknown method: {method}", file=sys.stderr)
-
             except json.JSONDecodeError:
                 print("Error: Invalid JSON", file=sys.stderr)
+                continue
+
+            try:
+                response = dispatch(request)
             except Exception as e:
+                # One bad frame must not take the server down
                 print(f"Error: {e}", file=sys.stderr)
-                
+                if isinstance(request, dict) and "id" not in request:
+                    continue  # notifications get no reply, not even an error
+                request_id = request.get("id") if isinstance(request, dict) else None
+                response = { "jsonrpc": "2.0", "id": request_id, "error": { "code": -32603, "message": str(e) } }
+            if response is not None:
+                send_response(response)
+
     except KeyboardInterrupt:
         pass
 
@@ -1,5 +1,7 @@
 import sys
 import json
+import queue
+import itertools
 import subprocess
 import threading
 import time
@@ -19,8 +21,8 @@ class MCPClient:
             stderr=sys.stderr, # Direct stderr to parent's stderr for debugging
             text=True
         )
-        self._request_id = 0
-        self._lock = threading.Lock()
+        # next() on itertools.count is atomic under the GIL, so id allocation needs no lock
+        self._request_ids = itertools.count(1)
         self._pending_requests = {}
         
         # 2. Start Reader Thread
@@ -28,6 +30,12 @@ class MCPClient:
         self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
         self.reader_thread.start()
 
+        # 3. Start Writer Thread
+        # Callers only enqueue frames; a blocked pipe write stalls this thread, not them.
+        self._write_queue = queue.SimpleQueue()
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
+
     def _reader_loop(self):
         try:
             for line in self.process.stdout:
@@ -59,26 +67,52 @@ class MCPClient:
         finally:
             print("Reader thread halted.")
 
+    def _writer_loop(self):
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            # Coalesce every frame queued so far into one write + flush
+            batch = [item]
+            stop = False
+            while True:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self.process.stdin.write("".join(frame for frame, _ in batch))
+                self.process.stdin.flush()
+            except Exception as e:
+                print(f"Send Error: {e}")
+                for _, request_id in batch:
+                    future = self._pending_requests.get(request_id)
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+            if stop:
+                break
+
     def send_request(self, method, params):
         future = concurrent.futures.Future()
-        request_id = None
-
-        with self._lock:
-            self._request_id += 1
-            request_id = self._request_id
-            # Futureを台帳に登録
-            self._pending_requests[request_id] = future
-            
-            request = {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "method": method,
-                "params": params
-            }
-            
-            json_str = json.dumps(request)
-            self.process.stdin.write(json_str + "\n")
-            self.process.stdin.flush()
+        request_id = next(self._request_ids)
+        # Futureを台帳に登録（dictへの代入はGILでアトミック）
+        self._pending_requests[request_id] = future
+        
+        request = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": method,
+            "params": params
+        }
+        
+        # 書き込みはライタースレッドに任せる（ロックを持ったままパイプを待たない）
+        json_str = json.dumps(request)
+        self._write_queue.put((json_str + "\n", request_id))
 
         # レスポンス待機（同期ブロック）
         try:
@@ -102,12 +136,8 @@ class MCPClient:
             "method": method,
             "params": params
         }
-        try:
-            json_str = json.dumps(message)
-            self.process.stdin.write(json_str + "\n")
-            self.process.stdin.flush()
-        except Exception as e:
-            print(f"Send Error: {e}")
+        json_str = json.dumps(message)
+        self._write_queue.put((json_str + "\n", None))
 
     def run(self):
         print("Starting MCP Client Handshake...")
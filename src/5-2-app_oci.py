@@ -2,13 +2,22 @@ import sys
 import os
 import json
 import re
+import math
+import heapq
+import time
+import hashlib
+import functools
+import importlib
 import importlib.util
-from typing import Optional, Dict, Any, List
+import threading
+import concurrent.futures
+from collections import Counter, OrderedDict
+from typing import TYPE_CHECKING, Optional, Dict, Any, List
 
-# External libraries
-import oci
-from dotenv import load_dotenv
-from pydantic import BaseModel, Field
+# External libraries (oci, pydantic, dotenv) are imported on first use, see "Lazy Imports"
+if TYPE_CHECKING:
+    # Annotations only: the AgentDecision model returned by call_oci_genai is a BaseModel built at runtime
+    from pydantic import BaseModel
 
 # ---------------------------------------------------------
 # Load MCPClient from '4-2-client.py'
@@ -23,65 +32,324 @@ spec.loader.exec_module(mcp_client_module)
 
 MCPClient = mcp_client_module.MCPClient
 
+# ---------------------------------------------------------
+# Lazy Imports
+# ---------------------------------------------------------
+# The oci SDK and pydantic dominate start-up time but are only needed for the first
+# LLM call. They are imported on first use, or on a background thread while the MCP
+# handshake runs (APP_PRELOAD_IMPORTS=0 turns that off).
+HEAVY_MODULES = ("oci", "pydantic")
+
+def lazy_import(name):
+    # import_module is cached in sys.modules and safe to race with preload_heavy_modules()
+    return importlib.import_module(name)
+
+def preload_heavy_modules():
+    def preload():
+        for name in HEAVY_MODULES:
+            try:
+                lazy_import(name)
+            except ImportError:
+                pass  # reported where the module is actually used
+    thread = threading.Thread(target=preload, name="preload-imports", daemon=True)
+    thread.start()
+    return thread
+
 # ---------------------------------------------------------
 # Configuration & Models
 # ---------------------------------------------------------
+def load_config():
+    # Try to load .env file
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(current_dir), ".env"))
+
+@functools.lru_cache(maxsize=None)
+def agent_decision_model():
+    """The AgentDecision model, defined on first use so pydantic stays out of start-up."""
+    from pydantic import BaseModel, Field
 
-# Try to load .env file
-load_dotenv(os.path.join(os.path.dirname(current_dir), ".env"))
+    class ToolCall(BaseModel):
+        tool_name: str = Field(..., description="Name of the tool to use.")
+        tool_args: Dict[str, Any] = Field(default_factory=dict, description="Arguments for the tool.")
 
-class AgentDecision(BaseModel):
-    thought: str = Field(..., description="The reasoning behind the decision.")
-    use_tool: bool = Field(..., description="Whether to use a tool.")
-    tool_name: Optional[str] = Field(None, description="Name of the tool to use.")
-    tool_args: Optional[Dict[str, Any]] = Field(None, description="Arguments for the tool.")
-    final_response: Optional[str] = Field(None, description="Final response to the user.")
+    # Field order is the order the model writes them in: with the tool fields first, a streamed
+    # decision can start its tool calls while the thought is still being generated
+    class AgentDecision(BaseModel):
+        use_tool: bool = Field(..., description="Whether to use a tool.")
+        tool_calls: Optional[List[ToolCall]] = Field(None, description="Independent tool calls to run in parallel this turn.")
+        tool_name: Optional[str] = Field(None, description="Name of the tool to use (single call).")
+        tool_args: Optional[Dict[str, Any]] = Field(None, description="Arguments for the tool (single call).")
+        final_response: Optional[str] = Field(None, description="Final response to the user.")
+        thought: str = Field(..., description="The reasoning behind the decision.")
+    return AgentDecision
 
 # ---------------------------------------------------------
 # OCI GenAI Helpers
 # ---------------------------------------------------------
+# Which auth method worked last time is remembered here, so later runs skip the probes
+# that are bound to fail. Only the method name is stored, never a token or key.
+AUTH_CACHE_PATH = os.environ.get(
+    "OCI_AUTH_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "scratch-mcp", "oci_auth.json")
+)
+AUTH_CACHE_TTL_SECONDS = int(os.environ.get("OCI_AUTH_CACHE_TTL", str(24 * 3600)))
+
+# Connections kept open to the inference endpoint; reused across agent turns
+HTTP_POOL_SIZE = int(os.environ.get("OCI_HTTP_POOL_SIZE", "4"))
+
+# name -> (log label, probe returning (config, signer))
+AUTH_METHODS = {
+    "resource_principal": ("Resource Principal", lambda oci: ({}, oci.auth.signers.get_resource_principals_signer())),
+    "config_file": ("OCI Config File", lambda oci: (oci.config.from_file(), None)),
+    "instance_principal": ("Instance Principal", lambda oci: ({}, oci.auth.signers.InstancePrincipalsSecurityTokenSigner())),
+}
+
+def load_cached_auth_method():
+    try:
+        with open(AUTH_CACHE_PATH) as f:
+            cached = json.load(f)
+        if cached.get("expires_at", 0) > time.time() and cached.get("method") in AUTH_METHODS:
+            return cached["method"]
+    except (OSError, ValueError):
+        pass
+    return None
+
+def save_cached_auth_method(method):
+    try:
+        os.makedirs(os.path.dirname(AUTH_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{AUTH_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"method": method, "expires_at": time.time() + AUTH_CACHE_TTL_SECONDS}, f)
+        os.replace(tmp_path, AUTH_CACHE_PATH)
+    except OSError as e:
+        print(f"[Warn] Could not cache auth method: {e}")
+
+def resolve_auth(oci, make_client):
+    """Returns (method, client) for the first method that works, trying the cached one first."""
+    cached = load_cached_auth_method()
+    for name in sorted(AUTH_METHODS, key=lambda name: name != cached):
+        label, probe = AUTH_METHODS[name]
+        try:
+            client = make_client(*probe(oci))
+        except Exception:
+            continue
+        print(f"[Auth] Using {label}{' (cached)' if name == cached else ''}")
+        if name != cached:
+            save_cached_auth_method(name)
+        return name, client
+    return None, None
+
+class ChatMetrics:
+    """Splits each chat call into time spent opening connections (TCP + TLS) and the rest."""
+    def __init__(self):
+        self._local = threading.local()
+        self.calls = []
+
+    def add_connect(self, seconds):
+        self._local.connect = getattr(self._local, "connect", 0.0) + seconds
+        self._local.connections = getattr(self._local, "connections", 0) + 1
+
+    def measure(self, func, *args, read=None, **kwargs):
+        """
+        Times func(*args, **kwargs) and returns its result, or read(result) when given.
+        A streamed chat returns as soon as the headers arrive, so the clock only stops
+        once read() has consumed its events (wrap them in timed_events()).
+        """
+        self._local.connect = 0.0
+        self._local.connections = 0
+        self._local.first_event = None
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            return read(result) if read else result
+        finally:
+            total = time.perf_counter() - start
+            first_event = self._local.first_event
+            call = {
+                "total_ms": total * 1000,
+                "connect_ms": self._local.connect * 1000,
+                "inference_ms": (total - self._local.connect) * 1000,
+                "new_connections": self._local.connections,
+                "first_event_ms": None if first_event is None else (first_event - start) * 1000,
+            }
+            self.calls.append(call)
+            streamed = "" if first_event is None else f", first event at {call['first_event_ms']:.0f} ms"
+            print(f"[Metrics] {call['total_ms']:.0f} ms = connect {call['connect_ms']:.0f} ms "
+                  f"({call['new_connections']} new) + inference {call['inference_ms']:.0f} ms{streamed}")
+
+    def timed_events(self, events):
+        """Passes server-sent events through, noting when the first one arrived."""
+        for event in events:
+            if self._local.first_event is None:
+                self._local.first_event = time.perf_counter()
+            yield event
+
+CHAT_METRICS = ChatMetrics()
+
+def timed_http_adapter(adapters, urllib3, metrics, pool_size):
+    """A requests HTTPAdapter with pool_size keep-alive connections whose connect() is timed."""
+    def timed(connection_cls):
+        class TimedConnection(connection_cls):
+            def connect(self):
+                start = time.perf_counter()
+                try:
+                    return super().connect()
+                finally:
+                    metrics.add_connect(time.perf_counter() - start)
+        return TimedConnection
+
+    pools = urllib3.connectionpool
+    pool_classes = {
+        "http": type("TimedHTTPConnectionPool", (pools.HTTPConnectionPool,),
+                     {"ConnectionCls": timed(pools.HTTPConnectionPool.ConnectionCls)}),
+        "https": type("TimedHTTPSConnectionPool", (pools.HTTPSConnectionPool,),
+                      {"ConnectionCls": timed(pools.HTTPSConnectionPool.ConnectionCls)}),
+    }
+
+    class TimedHTTPAdapter(adapters.HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = pool_classes
+
+    # One endpoint: a single pool holding up to pool_size connections
+    return TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+
+def import_first(*names):
+    """Imports the first module of names that exists; the last one's ImportError is raised."""
+    for name in names[:-1]:
+        try:
+            return lazy_import(name)
+        except ImportError:
+            pass
+    return lazy_import(names[-1])
+
+def configure_http_pool(client, pool_size=HTTP_POOL_SIZE, metrics=CHAT_METRICS):
+    try:
+        # Older SDKs vendor requests and urllib3 under oci._vendor; newer ones use the top-level packages
+        adapters = import_first("oci._vendor.requests.adapters", "requests.adapters")
+        urllib3 = import_first("oci._vendor.urllib3", "urllib3")
+        adapter = timed_http_adapter(adapters, urllib3, metrics, pool_size)
+        session = client.base_client.session
+    except (ImportError, AttributeError) as e:
+        print(f"[Warn] Cannot time the OCI connection pool ({e}); keeping the SDK's default pool")
+        return client
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return client
+
 def get_oci_generative_ai_inference_client(service_endpoint):
     """
     Tries to authenticate using:
     1. Resource Principal
     2. Config file (~/.oci/config)
     3. Instance Principal
+    The method that worked is cached on disk (AUTH_CACHE_PATH) and tried first next time.
     """
-    signer = None
-    config = None
+    oci = lazy_import("oci")
 
-    # 1. Resource Principal
-    try:
-        signer = oci.auth.signers.get_resource_principals_signer()
-        print("[Auth] Using Resource Principal")
+    def make_client(config, signer):
         return oci.generative_ai_inference.GenerativeAiInferenceClient(
-            {}, signer=signer, service_endpoint=service_endpoint
+            config, signer=signer, service_endpoint=service_endpoint
         )
-    except Exception:
-        pass
+    method, client = resolve_auth(oci, make_client)
+    if client is None:
+        print("[Error] Failed to authenticate with OCI.")
+        return None
+    return configure_http_pool(client)
 
-    # 2. Config File
-    try:
-        config = oci.config.from_file() # Default location
-        print("[Auth] Using OCI Config File")
-        return oci.generative_ai_inference.GenerativeAiInferenceClient(
-            config, service_endpoint=service_endpoint
-        )
-    except Exception:
-        pass
+# Sampling settings of every chat request. At temperature 0 the same request gives the
+# same decision, which is what makes DECISION_CACHE valid.
+CHAT_TEMPERATURE = 0.0
+CHAT_MAX_TOKENS = 1000
 
-    # 3. Instance Principal
-    try:
-        signer = oci.auth.signers.InstancePrincipalsSecurityTokenSigner()
-        print("[Auth] Using Instance Principal")
-        return oci.generative_ai_inference.GenerativeAiInferenceClient(
-            {}, signer=signer, service_endpoint=service_endpoint
-        )
-    except Exception:
-        pass
+# Decision cache: in-memory LRU, plus a SQLite file when OCI_DECISION_CACHE_DB is set
+# (so replayed sessions skip the network across runs too)
+DECISION_CACHE_ENTRIES = int(os.environ.get("OCI_DECISION_CACHE_ENTRIES", "256"))
+DECISION_CACHE_DB_ROWS = int(os.environ.get("OCI_DECISION_CACHE_DB_ROWS", "10000"))
+DECISION_CACHE_TTL_SECONDS = int(os.environ.get("OCI_DECISION_CACHE_TTL", str(7 * 24 * 3600)))
 
-    print("[Error] Failed to authenticate with OCI.")
-    return None
+class DecisionCache:
+    """
+    Parsed decisions keyed by a hash of the full chat request, with a TTL.
+    Memory holds up to max_entries objects (LRU); the optional SQLite store holds up to
+    max_rows encoded ones and survives restarts.
+    """
+    def __init__(self, max_entries, ttl_seconds, db_path=None, max_rows=0, encode=None, decode=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.max_rows = max_rows
+        self._encode = encode
+        self._decode = decode
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._db = None
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def key(*parts):
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def _connect(self):
+        if self._db is None:
+            import sqlite3  # only paid for when the on-disk store is enabled
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS decisions "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+        return self._db
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+
+            if self.db_path:
+                db = self._connect()
+                row = db.execute("SELECT value, expires_at FROM decisions WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+                if row is not None:
+                    db.execute("UPDATE decisions SET used_at = ? WHERE key = ?", (now, key))
+                    db.commit()
+                    value = self._decode(row[0])
+                    self._remember(key, row[1], value)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self.db_path:
+                db = self._connect()
+                db.execute("INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?)", (key, self._encode(value), expires_at, now))
+                db.execute("DELETE FROM decisions WHERE expires_at <= ?", (now,))
+                # Least recently used rows beyond the limit
+                db.execute(
+                    "DELETE FROM decisions WHERE key IN "
+                    "(SELECT key FROM decisions ORDER BY used_at DESC LIMIT -1 OFFSET ?)", (self.max_rows,)
+                )
+                db.commit()
+
+    def _remember(self, key, expires_at, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+DECISION_CACHE = DecisionCache(
+    DECISION_CACHE_ENTRIES, DECISION_CACHE_TTL_SECONDS,
+    db_path=os.environ.get("OCI_DECISION_CACHE_DB"), max_rows=DECISION_CACHE_DB_ROWS,
+    encode=lambda decision: decision.model_dump_json(),
+    decode=lambda text: agent_decision_model().model_validate_json(text),
+)
 
 def clean_json_text(text: str) -> str:
     """Removes Markdown code blocks (```json ... ```) from text."""
@@ -91,19 +359,162 @@ def clean_json_text(text: str) -> str:
         return match.group(1)
     return text
 
+# Streamed decisions: tool calls are started as soon as they are complete in the text,
+# not after the whole answer has arrived (OCI_GENAI_STREAM=0 waits for the full response)
+STREAM_DECISIONS = os.environ.get("OCI_GENAI_STREAM", "1") != "0"
+
+class IncrementalJsonObject:
+    """
+    Parses one JSON object from text that arrives in pieces. feed() returns the top-level
+    (key, value) pairs completed by the new text, plus ("<key>[]", item) for every finished
+    element of the arrays named in array_items. Anything before the first '{' (a ```json
+    fence, a sentence) is skipped.
+    """
+    def __init__(self, array_items=()):
+        self.array_items = set(array_items)
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = None  # "key", "colon", "value" or "in_value" at depth 1
+        self._key_start = self._value_start = self._item_start = None
+        self._key = None
+        self._in_items = False
+
+    def feed(self, chunk):
+        self.text += chunk
+        completed = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._expect == "key":
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        self._expect = "colon"
+                continue
+            if self._depth == 0:
+                if c == "{":
+                    self._depth = 1
+                    self._expect = "key"
+                continue
+
+            if c.isspace():
+                continue
+            if c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and c == "]" and self._in_items:
+                    self._finish_item(i, completed)
+                    self._in_items = False
+                elif self._depth == 0:
+                    self._finish_value(i, completed)
+                    self.done = True
+                continue
+            if c == ",":
+                if self._depth == 1:
+                    self._finish_value(i, completed)
+                    self._expect = "key"
+                elif self._depth == 2 and self._in_items:
+                    self._finish_item(i, completed)
+                continue
+            if c == ":" and self._depth == 1 and self._expect == "colon":
+                self._expect = "value"
+                continue
+
+            # First character of a key, a value or an array item
+            if self._depth == 1 and self._expect == "key" and c == '"':
+                self._key_start = i
+            elif self._depth == 1 and self._expect == "value":
+                self._value_start = i
+                self._expect = "in_value"
+                self._in_items = c == "[" and self._key in self.array_items
+            elif self._depth == 2 and self._in_items and self._item_start is None:
+                self._item_start = i
+            if c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+        self._pos = len(text)
+        return completed
+
+    def _finish_value(self, end, completed):
+        if self._value_start is not None:
+            completed.append((self._key, json.loads(self.text[self._value_start:end])))
+        self._value_start = None
+
+    def _finish_item(self, end, completed):
+        if self._item_start is not None:
+            completed.append((f"{self._key}[]", json.loads(self.text[self._item_start:end])))
+        self._item_start = None
+
+def iter_stream_text(events, cohere):
+    """Text deltas from the chat API's server-sent events (response.data.events())."""
+    received = ""
+    for event in events:
+        if not event.data or event.data == "[DONE]":
+            continue
+        chunk = json.loads(event.data)
+        if cohere:
+            text = chunk.get("text", "")
+            # The closing Cohere event repeats the whole answer
+            if "finishReason" in chunk and text == received:
+                continue
+        else:
+            content = (chunk.get("message") or {}).get("content") or []
+            text = "".join(part.get("text", "") for part in content if part.get("type") == "TEXT")
+        if text:
+            received += text
+            yield text
+
+def read_streamed_decision(chunks, on_tool_call=None):
+    """
+    Reads a streamed decision and calls on_tool_call(name, args) for each tool call as soon
+    as it and use_tool=true have arrived. Returns the full text for validation.
+    """
+    parser = IncrementalJsonObject(array_items=("tool_calls",))
+    fields = {}
+    ready = []
+    for chunk in chunks:
+        for key, value in parser.feed(chunk):
+            if key == "tool_calls[]":
+                if isinstance(value, dict) and value.get("tool_name"):
+                    ready.append((value["tool_name"], value.get("tool_args") or {}))
+                continue
+            fields[key] = value
+            # The single-call fields count only when tool_calls (written before them) was empty
+            if key in ("tool_name", "tool_args") and "tool_name" in fields and "tool_args" in fields \
+                    and fields["tool_name"] and not fields.get("tool_calls"):
+                ready.append((fields["tool_name"], fields["tool_args"] or {}))
+        if on_tool_call and fields.get("use_tool") is True:
+            while ready:
+                on_tool_call(*ready.pop(0))
+    return parser.text
+
 def call_oci_genai(
     client, 
     model_id: str, 
     compartment_id: str, 
     system_instruction: str, 
-    user_message: str
-) -> AgentDecision:
-    
+    user_message: str,
+    on_tool_call=None
+) -> "BaseModel":
+    oci = lazy_import("oci")
+    AgentDecision = agent_decision_model()
+
     # Construct the full prompt structure (Simplified for Chat API)
     # Note: Depending on the specific model, the chat API handling might differ slightly.
     # We will use CohereChatRequest if "cohere" is in model_id, otherwise Generic.
     
-    schema_json = json.dumps(AgentDecision.model_json_schema(), indent=2)
+    schema_json = decision_schema_text()
     
     system_prompt_with_schema = (
         f"{system_instruction}\n\n"
@@ -112,16 +523,23 @@ def call_oci_genai(
         "Do NOT output anything else (like markdown code blocks or explanations) outside the JSON."
     )
 
+    # Same request as before -> same decision: answer it without the round trip
+    cache_key = DecisionCache.key(model_id, compartment_id, system_prompt_with_schema, user_message, CHAT_TEMPERATURE, CHAT_MAX_TOKENS)
+    cached = DECISION_CACHE.get(cache_key)
+    if cached is not None:
+        print(f"[Cache] Decision reused ({DECISION_CACHE.hits} hits / {DECISION_CACHE.misses} misses)")
+        return cached
+
     chat_request = None
     
     if "cohere" in model_id.lower():
         chat_details = oci.generative_ai_inference.models.CohereChatRequest(
             message=user_message,
             chat_history=[], # Stateful chat not implemented for this simple loop
-            is_stream=False,
+            is_stream=STREAM_DECISIONS,
             preamble_override=system_prompt_with_schema,
-            temperature=0.0, # Deterministic for tool usage
-            max_tokens=1000
+            temperature=CHAT_TEMPERATURE, # Deterministic for tool usage
+            max_tokens=CHAT_MAX_TOKENS
         )
     else:
         # Fallback for Generic / Llama etc (might need different payload structure)
@@ -135,8 +553,9 @@ def call_oci_genai(
                     role="USER", content=[oci.generative_ai_inference.models.TextContent(text=user_message)]
                 )
             ],
-            temperature=0.0,
-            max_tokens=1000
+            is_stream=STREAM_DECISIONS,
+            temperature=CHAT_TEMPERATURE,
+            max_tokens=CHAT_MAX_TOKENS
         )
 
     request_body = oci.generative_ai_inference.models.ChatDetails(
@@ -146,24 +565,33 @@ def call_oci_genai(
     )
 
     try:
-        response = client.chat(request_body)
-        
         # Extract text based on model type
-        response_text = ""
-        if "cohere" in model_id.lower():
-            # Cohere response structure
-            response_text = response.data.chat_response.text
-        else:
+        def read_text(response):
+            if STREAM_DECISIONS:
+                # Server-sent events: tool calls are handed to on_tool_call as soon as they
+                # are complete, while the rest of the decision is still being generated
+                events = CHAT_METRICS.timed_events(response.data.events())
+                return read_streamed_decision(iter_stream_text(events, "cohere" in model_id.lower()), on_tool_call)
+            if "cohere" in model_id.lower():
+                # Cohere response structure
+                return response.data.chat_response.text
             # Generic response structure (typically choices[0].message.content)
             # This part is illustrative; refer to SDK docs for exact Llama/Generic output
             # Assuming simplified access if SDK normalizes it
-            pass 
+            return ""
+
+        # Timed until the whole answer is read: a stream is not done when its headers arrive
+        response_text = CHAT_METRICS.measure(client.chat, request_body, read=read_text)
             
         # Clean and Parse
         cleaned_text = clean_json_text(response_text)
         print(f"[Debug] Raw LLM Output: {cleaned_text}") # Uncomment for debugging
         
         decision = AgentDecision.model_validate_json(cleaned_text)
+        
+        # Only deterministic answers are worth replaying
+        if CHAT_TEMPERATURE == 0:
+            DECISION_CACHE.put(cache_key, decision)
         return decision
 
     except Exception as e:
@@ -171,11 +599,273 @@ def call_oci_genai(
         # Return a safe fallback or re-raise
         raise e
 
+# ---------------------------------------------------------
+# Prompt Building
+# ---------------------------------------------------------
+# Approximate tokens the tool list may take in the system prompt
+PROMPT_TOKEN_BUDGET = int(os.environ.get("APP_PROMPT_TOKEN_BUDGET", "2000"))
+# Most tools shortlisted for one message once the catalog is over the budget
+PROMPT_MAX_TOOLS = int(os.environ.get("APP_PROMPT_MAX_TOOLS", "20"))
+
+# ASCII words, or runs of non-ASCII text (CJK punctuation excluded)
+TERM_PATTERN = re.compile(r"[a-z0-9]+|[^\x00-\x7f\u3000-\u303f\uff01-\uff0f]+")
+
+CAMEL_CASE_PATTERN = re.compile(r"([a-z0-9])([A-Z])")
+STOP_WORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it me my of on or please the this "
+    "to what when where which with you your".split()
+)
+# Stripped from English words so that e.g. "translate" and "translation" meet
+SUFFIXES = ("ings", "ing", "ions", "ion", "ed", "es", "s", "e")
+
+def stem(word):
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+def tokenize(text):
+    """Search terms: stemmed ASCII words (snake_case / camelCase split, stop words dropped) and character bigrams of non-ASCII runs."""
+    terms = []
+    for run in TERM_PATTERN.findall(CAMEL_CASE_PATTERN.sub(r"\1 \2", text).lower()):
+        if run[0] < "\x80":
+            if run not in STOP_WORDS:
+                terms.append(stem(run))
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+def estimate_tokens(text):
+    """Rough token count: about 4 ASCII characters per token, one token per other character."""
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+def render_param_type(schema):
+    if "enum" in schema:
+        return "|".join(json.dumps(value, ensure_ascii=False) for value in schema["enum"])
+    kind = schema.get("type", "any")
+    if kind == "array":
+        return f"{render_param_type(schema.get('items') or {})}[]"
+    if kind == "object" and schema.get("properties"):
+        return json.dumps(schema, separators=(",", ":"), ensure_ascii=False)
+    return "|".join(kind) if isinstance(kind, list) else kind
+
+def render_tool(tool):
+    """One line per tool: name(arg: type, optional?: type) - description."""
+    schema = tool.get("inputSchema") or {}
+    required = set(schema.get("required") or [])
+    params = []
+    for name, prop in (schema.get("properties") or {}).items():
+        param = f"{name}{'' if name in required else '?'}: {render_param_type(prop)}"
+        if prop.get("description"):
+            param += f" ({' '.join(prop['description'].split())})"
+        params.append(param)
+    line = f"{tool['name']}({', '.join(params)})"
+    description = " ".join((tool.get("description") or "").split())
+    return f"{line} - {description}" if description else line
+
+@functools.lru_cache(maxsize=None)
+def decision_schema_text():
+    """The AgentDecision JSON schema, rendered once and without indentation."""
+    return json.dumps(agent_decision_model().model_json_schema(), separators=(",", ":"), ensure_ascii=False)
+
+class ToolIndex:
+    """
+    BM25 over tool names, descriptions and inputSchema property names, built once per tools
+    list. Per-posting BM25 weights are computed at build time, so a search only adds them up.
+    Tools are found through the query's rare terms; terms in more than common_ratio of
+    the catalog (verbs like "get", "list") only add to the score of tools already found,
+    which keeps a lookup far below the size of the catalog.
+    """
+    NAME_WEIGHT = 3  # a term in the tool name counts like three in the description
+
+    def __init__(self, tools, k1=1.2, b=0.75, common_ratio=0.01):
+        documents = [Counter(self.document_terms(tool)) for tool in tools]
+        lengths = [sum(counts.values()) for counts in documents]
+        average = (sum(lengths) / len(lengths)) if lengths else 0.0
+        frequencies = Counter(term for counts in documents for term in counts)
+        self.size = len(documents)
+        self.common_df = max(64, int(self.size * common_ratio))
+        self._postings = {}  # term -> [(tool index, weight)]
+        for doc, counts in enumerate(documents):
+            norm = k1 * (1 - b + b * lengths[doc] / average) if average else k1
+            for term, tf in counts.items():
+                df = frequencies[term]
+                idf = math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+                self._postings.setdefault(term, []).append((doc, idf * tf * (k1 + 1) / (tf + norm)))
+        # Common terms are looked up per candidate instead of scanned
+        self._common = {term: dict(postings) for term, postings in self._postings.items() if len(postings) > self.common_df}
+
+    @classmethod
+    def document_terms(cls, tool):
+        schema = tool.get("inputSchema") or {}
+        properties = " ".join((schema.get("properties") or {}).keys())
+        return tokenize(tool["name"]) * cls.NAME_WEIGHT + tokenize(f"{tool.get('description') or ''} {properties}")
+
+    def search(self, query, limit=None):
+        """(tool index, score) of the tools matching the query, best first."""
+        terms = sorted((term for term in set(tokenize(query)) if term in self._postings), key=lambda term: len(self._postings[term]))
+        scores = {}
+        for term in terms:
+            weights = self._common.get(term)
+            # A common term is scanned only when the query has no rarer one
+            if weights is None or not scores:
+                for doc, weight in self._postings[term]:
+                    scores[doc] = scores.get(doc, 0.0) + weight
+            else:
+                for doc in scores:
+                    scores[doc] += weights.get(doc, 0.0)
+        if limit is not None:
+            return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return sorted(scores.items(), key=lambda item: -item[1])
+
+class PromptBuilder:
+    """
+    Builds the system instruction for each turn. Tool lines are rendered once per version
+    of the tools list (set_tools); a turn only chooses which lines to include. While the
+    whole catalog fits in token_budget every tool is listed; beyond that, only the tools
+    the ToolIndex (or rank(query), if given) finds relevant, best first, up to max_tools
+    and until the budget is spent. If none of them is found (or fits), the first tools of
+    the catalog that fit are listed instead, so the model never sees an empty list.
+    """
+    def __init__(self, tools=(), token_budget=PROMPT_TOKEN_BUDGET, rank=None, max_tools=PROMPT_MAX_TOOLS):
+        self.token_budget = token_budget
+        self.max_tools = max_tools
+        self.rank = rank
+        self.version = None
+        self._source = None
+        self.last_stats = {}
+        self.set_tools(tools)
+
+    def set_tools(self, tools):
+        """Re-renders the tool lines if the list changed; returns whether it did."""
+        if tools is self._source:
+            return False
+        self._source = tools
+        tools = list(tools)
+        version = hashlib.sha256(json.dumps(tools, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        if version == self.version:
+            return False
+        self.version = version
+        self.tools = tools
+        self.lines = [render_tool(tool) for tool in tools]
+        self.line_tokens = [estimate_tokens(line) + 1 for line in self.lines]  # + the newline
+        self.catalog_tokens = sum(self.line_tokens)
+        self.index = ToolIndex(tools)
+        return True
+
+    def select(self, query):
+        """Indexes of the tools to list for this query."""
+        if self.catalog_tokens <= self.token_budget:
+            return list(range(len(self.tools)))
+        ranked = self.rank(query) if self.rank else self.index.search(query, limit=self.max_tools)
+        chosen = self._fill(index for index, _ in ranked)
+        if not chosen:
+            # Nothing relevant: fall back to the head of the catalog rather than no tools at all
+            chosen = self._fill(range(len(self.tools)))
+        return chosen
+
+    def _fill(self, candidates):
+        """The candidates, in order, that fit in token_budget, up to max_tools."""
+        chosen = []
+        used = 0
+        for index in candidates:
+            if len(chosen) == self.max_tools:
+                break
+            if used + self.line_tokens[index] <= self.token_budget:
+                chosen.append(index)
+                used += self.line_tokens[index]
+        return chosen
+
+    def build(self, base_prompt, query, instructions):
+        selected = self.select(query)
+        tool_lines = "\n".join(self.lines[index] for index in selected) or "(no tool matches this request)"
+        self.last_stats = {
+            "tools": len(selected), "catalog": len(self.tools),
+            "tokens": sum(self.line_tokens[index] for index in selected), "catalog_tokens": self.catalog_tokens,
+        }
+        return (
+            f"{base_prompt}\n\n"
+            "Available Tools, one per line as name(argument: type, optional?: type) - description:\n"
+            f"{tool_lines}\n\n"
+            f"{instructions}"
+        )
+
+# ---------------------------------------------------------
+# Tool Execution
+# ---------------------------------------------------------
+# Upper bound on tools/call requests in flight for one decision
+TOOL_CALL_CONCURRENCY = int(os.environ.get("APP_TOOL_CALL_CONCURRENCY", "8"))
+
+def decision_tool_calls(decision):
+    """The (name, arguments) pairs a decision asks for: tool_calls, or the single tool_name / tool_args."""
+    if not decision.use_tool:
+        return []
+    if decision.tool_calls:
+        return [(call.tool_name, call.tool_args or {}) for call in decision.tool_calls]
+    if decision.tool_name:
+        return [(decision.tool_name, decision.tool_args or {})]
+    return []
+
+class ToolDispatcher:
+    """
+    Runs tools/call requests on worker threads over the one client (responses are matched
+    by id). start() begins a call as soon as it is known, e.g. while the decision is still
+    streaming; gather() returns results in call order, reusing calls already started. A
+    failing call yields {"error": ...} instead of cancelling the others.
+    """
+    def __init__(self, mcp_client, max_workers=TOOL_CALL_CONCURRENCY):
+        self.mcp_client = mcp_client
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool-call")
+        self._started = []  # [((name, args), future)]
+
+    def _run(self, name, args):
+        try:
+            return self.mcp_client.send_request("tools/call", {"name": name, "arguments": args})
+        except Exception as e:
+            return {"error": str(e)}
+
+    def start(self, name, args):
+        future = self._executor.submit(self._run, name, args)
+        self._started.append(((name, args), future))
+        return future
+
+    def gather(self, calls):
+        unused = list(self._started)
+        futures = []
+        for call in calls:
+            match = next((item for item in unused if item[0] == call), None)
+            if match is not None:
+                unused.remove(match)
+                futures.append(match[1])
+            else:
+                futures.append(self.start(*call))
+        return [future.result() for future in futures]
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def run_tool_calls(mcp_client, calls, max_workers=TOOL_CALL_CONCURRENCY):
+    """Sends independent tools/call requests together; one result per call, in order."""
+    with ToolDispatcher(mcp_client, max_workers=max(1, min(len(calls), max_workers))) as dispatcher:
+        return dispatcher.gather(calls)
+
 # ---------------------------------------------------------
 # Main Application
 # ---------------------------------------------------------
 def main():
     # 1. Load Config
+    if os.environ.get("APP_PRELOAD_IMPORTS", "1") != "0":
+        preload_heavy_modules()
+    load_config()
     department_id = os.getenv("COMPARTMENT_ID")
     service_endpoint = os.getenv("OCI_GENAI_SERVICE_ENDPOINT")
     model_id = os.getenv("OCI_GENAI_MODEL_ID", "cohere.command-r-plus-08-2024")
@@ -185,12 +875,8 @@ def main():
         print("Please create a .env file based on .env.template or set environment variables.")
         sys.exit(1)
 
-    # 2. Init OCI Client
-    genai_client = get_oci_generative_ai_inference_client(service_endpoint)
-    if not genai_client:
-        sys.exit(1)
-
-    # 3. Init MCP Client
+    # 2. Init MCP Client
+    # The handshake runs while oci / pydantic are still importing in the background
     print("Initializing MCP Client...")
     mcp_client = MCPClient()
     
@@ -204,11 +890,23 @@ def main():
         mcp_client.send_notification("notifications/initialized", {})
         mcp_client.send_request("ping", {})
 
+        # 3. Init OCI Client
+        genai_client = get_oci_generative_ai_inference_client(service_endpoint)
+        if not genai_client:
+            sys.exit(1)
+
         # 4. Get Available Tools
         print("Fetching tools...")
         tools_list = mcp_client.send_request("tools/list", {})
-        tools_description = json.dumps(tools_list, indent=2, ensure_ascii=False)
+        # Tool lines are rendered once here; each turn only picks the relevant ones
+        prompt_builder = PromptBuilder(tools_list.get("tools", []))
         print(f"Tools available: {len(tools_list.get('tools', []))}")
+        tool_instructions = (
+            "If the user asks something that requires tools, set 'use_tool' to true and list each call (tool name and arguments) in 'tool_calls'.\n"
+            "All calls in 'tool_calls' run in parallel, so only list calls that do not need each other's results.\n"
+            "If no tool is needed, set 'use_tool' to false and provide a 'final_response'.\n"
+            "If a tool is used, do NOT provide a 'final_response' yet."
+        )
 
         # 5. Chat Loop
         print("\n--- OCI GenAI Agent Started --- (Type 'exit' to quit)")
@@ -225,63 +923,72 @@ def main():
                 break
 
             # --- Step A: Decision ---
-            system_instruction = (
-                "You are a helpful assistant with access to the following tools:\n"
-                f"{tools_description}\n\n"
-                "If the user asks something that requires a tool, set 'use_tool' to true and specify the tool name and arguments.\n"
-                "If no tool is needed, set 'use_tool' to false and provide a 'final_response'.\n"
-                "If a tool is used, do NOT provide a 'final_response' yet."
+            system_instruction = prompt_builder.build(
+                "You are a helpful assistant with access to the following tools.", user_input, tool_instructions
             )
+            stats = prompt_builder.last_stats
+            print(f"[Prompt] {stats['tools']}/{stats['catalog']} tools, ~{stats['tokens']} tokens")
 
             print("[Agent] Thinking...")
-            decision = call_oci_genai(
-                genai_client, model_id, department_id, system_instruction, user_input
-            )
-            
-            print(f"[Thought] {decision.thought}")
-            
-            # --- Step B: Execution ---
-            if decision.use_tool:
-                print(f"[System] Calling tool: {decision.tool_name} with {decision.tool_args}")
+            with ToolDispatcher(mcp_client) as dispatcher:
+                # Called from the streaming parser as soon as a tool call is complete
+                def start_early(name, args):
+                    print(f"[System] Tool call ready while streaming, started: {name}")
+                    dispatcher.start(name, args)
+
+                decision = call_oci_genai(
+                    genai_client, model_id, department_id, system_instruction, user_input, on_tool_call=start_early
+                )
                 
-                try:
-                    tool_result = mcp_client.send_request("tools/call", {
-                        "name": decision.tool_name,
-                        "arguments": decision.tool_args
-                    })
-                    print(f"[System] Tool Output: {tool_result}")
-                    
-                    # Call LLM again with result
-                    # For this simple loop, we just generate a final response based on the result.
-                    tool_result_str = json.dumps(tool_result, ensure_ascii=False)
-                    follow_up_user_message = (
-                        f"Original User Request: {user_input}\n"
-                        f"Tool Execution Result: {tool_result_str}\n"
-                        "Please provide the comprehensive final answer to the user."
-                    )
-                    
-                    # We can reuse the same function but the prompt logic is slightly different for follow-up.
-                    # Or we can just ask for a final response now.
-                    # To keep it simple, we use the same call_oci_genai but expect only final_response.
-                    
-                    follow_up_system = (
-                        "You are summarizing the result of a tool execution.\n"
-                        "Provide a natural language response in 'final_response'. 'use_tool' should be false."
-                    )
-                    
-                    final_decision = call_oci_genai(
-                        genai_client, model_id, department_id, follow_up_system, follow_up_user_message
-                    )
-                    
-                    print(f"[Agent] {final_decision.final_response}")
+                print(f"[Thought] {decision.thought}")
+                
+                # --- Step B: Execution ---
+                tool_calls = decision_tool_calls(decision)
+                if tool_calls:
+                    for name, args in tool_calls:
+                        print(f"[System] Calling tool: {name} with {args}")
                     
-                except Exception as e:
-                    print(f"[System] Tool Execution Error: {e}")
-                    print("[Agent] I encountered an error while running the tool.")
-            
-            else:
-                # No tool used
-                print(f"[Agent] {decision.final_response}")
+                    try:
+                        # Independent calls go out together; the reader thread matches responses by id.
+                        # Calls already started while streaming are not sent twice.
+                        tool_results = dispatcher.gather(tool_calls)
+                        for (name, _), tool_result in zip(tool_calls, tool_results):
+                            print(f"[System] Tool Output ({name}): {tool_result}")
+                        
+                        # Call LLM again with results
+                        # For this simple loop, we just generate a final response based on the results.
+                        tool_result_str = json.dumps(
+                            [{"tool": name, "result": tool_result} for (name, _), tool_result in zip(tool_calls, tool_results)],
+                            ensure_ascii=False
+                        )
+                        follow_up_user_message = (
+                            f"Original User Request: {user_input}\n"
+                            f"Tool Execution Results: {tool_result_str}\n"
+                            "Please provide the comprehensive final answer to the user."
+                        )
+                        
+                        # We can reuse the same function but the prompt logic is slightly different for follow-up.
+                        # Or we can just ask for a final response now.
+                        # To keep it simple, we use the same call_oci_genai but expect only final_response.
+                        
+                        follow_up_system = (
+                            "You are summarizing the results of tool executions.\n"
+                            "Provide a natural language response in 'final_response'. 'use_tool' should be false."
+                        )
+                        
+                        final_decision = call_oci_genai(
+                            genai_client, model_id, department_id, follow_up_system, follow_up_user_message
+                        )
+                        
+                        print(f"[Agent] {final_decision.final_response}")
+                        
+                    except Exception as e:
+                        print(f"[System] Tool Execution Error: {e}")
+                        print("[Agent] I encountered an error while running the tool.")
+                
+                else:
+                    # No tool used
+                    print(f"[Agent] {decision.final_response}")
 
     except KeyboardInterrupt:
         print("\nInterrupted.")
@@ -1,5 +1,11 @@
 import sys
 import json
+import re
+import base64
+import asyncio
+import queue
+import itertools
+import socket
 import subprocess
 import threading
 import os
@@ -8,81 +14,324 @@ import concurrent.futures
 # Use the server from Step 6-1
 SERVER_SCRIPT = os.path.join(os.path.dirname(__file__), "6-1-server.py")
 
+# asyncio's StreamReader refuses lines longer than its limit (64 KiB by default),
+# which a resources/read response can easily exceed.
+ASYNC_STREAM_LIMIT = 64 * 1024 * 1024
+
+# ---------------------------------------------------------
+# JSON Codec
+# orjson or msgspec when installed, stdlib json otherwise (MCP_JSON_BACKEND picks one).
+# Every backend reads and writes bytes, so frames are never decoded to str and re-encoded.
+# ---------------------------------------------------------
+# orjson and msgspec read integers wider than 64 bits as floats (an id of 2**70 would come back
+# as 1.18e21). A frame with a run of 19+ digits may hold one, so it goes through stdlib json.
+WIDE_INTEGER = re.compile(rb"\d{19}")
+
+def with_exact_integers(fast_loads, fast_errors):
+    def loads(data):
+        if WIDE_INTEGER.search(data) is None:
+            try:
+                return fast_loads(data)
+            except fast_errors:
+                pass  # stdlib json either reads it (e.g. 1e400 as inf) or raises the error itself
+        return json.loads(data)
+    return loads
+
+def load_json_backend(preferred):
+    """Returns (name, loads, dumps, decode_errors) for the first importable backend."""
+    candidates = ["orjson", "msgspec", "json"] if preferred == "auto" else [preferred]
+    for name in candidates:
+        if name == "orjson":
+            try:
+                import orjson
+            except ImportError:
+                continue
+
+            def dumps(obj, default=None):
+                try:
+                    return orjson.dumps(obj, default=default)
+                except TypeError:
+                    # e.g. integers wider than 64 bits, which orjson rejects
+                    return json.dumps(obj, default=default, ensure_ascii=False).encode("utf-8")
+            loads = with_exact_integers(orjson.loads, orjson.JSONDecodeError)
+            return name, loads, dumps, (orjson.JSONDecodeError, json.JSONDecodeError, UnicodeDecodeError)
+
+        if name == "msgspec":
+            try:
+                import msgspec
+            except ImportError:
+                continue
+            encoder = msgspec.json.Encoder()
+            decoder = msgspec.json.Decoder()
+
+            def dumps(obj, default=None):
+                if default is None:
+                    return encoder.encode(obj)
+                return msgspec.json.Encoder(enc_hook=default).encode(obj)
+            loads = with_exact_integers(decoder.decode, msgspec.DecodeError)
+            return name, loads, dumps, (msgspec.DecodeError, json.JSONDecodeError, UnicodeDecodeError)
+
+        if name == "json":
+            def dumps(obj, default=None):
+                return json.dumps(obj, default=default, ensure_ascii=False).encode("utf-8")
+            return name, json.loads, dumps, (json.JSONDecodeError, UnicodeDecodeError)
+
+    raise ImportError(f"JSON backend not available: {preferred}")
+
+JSON_BACKEND, json_loads, json_dumps, JSON_DECODE_ERRORS = load_json_backend(
+    os.environ.get("MCP_JSON_BACKEND", "auto")
+)
+
+class _DiscardQueue:
+    def put(self, item):
+        pass
+
+def connect_socket(address):
+    """Opens 'unix:/path/to.sock' or 'tcp:host:port' (the server's --listen syntax)."""
+    kind, _, target = address.partition(":")
+    if kind == "unix" and target:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target)
+        return sock
+    if kind == "tcp":
+        host, _, port = target.rpartition(":")
+        if host and port.isdigit():
+            sock = socket.create_connection((host.strip("[]"), int(port)))
+            # Requests are small and latency-bound; don't let Nagle hold them back
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return sock
+    raise ValueError(f"Invalid server address: {address!r} (expected unix:/path or tcp:host:port)")
+
 class MCPClient:
-    def __init__(self):
-        # 1. Start Server Process
-        self.process = subprocess.Popen(
-            [sys.executable, SERVER_SCRIPT],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=sys.stderr, # Direct stderr to parent's stderr for debugging
-            text=True
-        )
-        self._request_id = 0
-        self._lock = threading.Lock()
+    def __init__(self, rfile=None, wfile=None, command=None):
+        # 1. Start Server Process, unless already connected to a server (see connect())
+        self.process = None
+        self._socket = None
+        if rfile is None or wfile is None:
+            # Binary pipes (no text=True): frames are bytes end-to-end
+            self.process = subprocess.Popen(
+                command or [sys.executable, SERVER_SCRIPT],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=sys.stderr # Direct stderr to parent's stderr for debugging
+            )
+            rfile, wfile = self.process.stdout, self.process.stdin
+        self._rfile = rfile
+        self._wfile = wfile
+        # next() on itertools.count is atomic under the GIL, so id allocation needs no lock
+        self._request_ids = itertools.count(1)
         self._pending_requests = {}
+        # progressToken -> queue receiving notifications/progress params (streamed reads)
+        self._progress_streams = {}
+        # Filled in by handshake()
+        self._handshake = None
+        self.server_info = None
+        self.capabilities = None
+        self.tools = None
+        self.prompts = None
         
         # 2. Start Reader Thread
         self.running = True
+        self.connected = True  # False once the server closed the stream (exited or crashed)
         self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
         self.reader_thread.start()
 
+        # 3. Start Writer Thread
+        # Callers only enqueue frames; a blocked pipe write stalls this thread, not them.
+        self._write_queue = queue.SimpleQueue()
+        self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.writer_thread.start()
+
+    def start_handshake(self, client_info, protocol_version="2025-11-25"):
+        """
+        Sends initialize and the discovery requests (ping, tools/list, prompts/list) back-to-back
+        without waiting, so they travel in one write while the server is still starting up.
+        Call handshake() when the results are needed.
+        """
+        initialize_id, initialize = self._submit_request("initialize", {
+            "protocolVersion": protocol_version,
+            "capabilities": {},
+            "clientInfo": client_info
+        })
+
+        def on_initialized(future):
+            # The spec wants notifications/initialized after the initialize response, not before
+            if future.exception() is None and "result" in future.result():
+                self.send_notification("notifications/initialized", {})
+        initialize.add_done_callback(on_initialized)
+
+        self._handshake = [("initialize", initialize_id, initialize)]
+        for name, method in (("ping", "ping"), ("tools", "tools/list"), ("prompts", "prompts/list")):
+            self._handshake.append((name, *self._submit_request(method, {})))
+
+    def handshake(self, timeout=10):
+        """
+        Waits for start_handshake() and caches the outcome on the client:
+        server_info, capabilities, tools and prompts (remaining list pages are fetched here).
+        """
+        if self.capabilities is not None:
+            return
+        if self._handshake is None:
+            raise RuntimeError("start_handshake() has not been called")
+        try:
+            results = {}
+            for name, request_id, future in self._handshake:
+                response = future.result(timeout=timeout)
+                if "error" in response:
+                    raise Exception(f"MCP Error: {response['error']}")
+                results[name] = response["result"]
+        finally:
+            for _, request_id, _ in self._handshake:
+                self._pending_requests.pop(request_id, None)
+
+        def all_pages(method, key, first):
+            items = list(first.get(key, []))
+            if first.get("nextCursor"):
+                items.extend(self.iter_list(method, key, {"cursor": first["nextCursor"]}))
+            return items
+
+        self.server_info = results["initialize"].get("serverInfo")
+        self.tools = all_pages("tools/list", "tools", results["tools"])
+        self.prompts = all_pages("prompts/list", "prompts", results["prompts"])
+        self.capabilities = results["initialize"].get("capabilities", {})
+
+    @classmethod
+    def connect(cls, address):
+        """
+        Connects to a long-lived server started with --listen instead of spawning one:
+
+            client = MCPClient.connect("unix:/tmp/mcp.sock")
+        """
+        sock = connect_socket(address)
+        client = cls(sock.makefile("rb"), sock.makefile("wb"))
+        client._socket = sock
+        return client
+
+    def close(self):
+        self.running = False
+        self._write_queue.put(None)
+        self.writer_thread.join(timeout=5)
+        if self._socket is not None:
+            # Wakes the reader thread blocked in recv()
+            try:
+                self._socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._rfile.close()
+            self._wfile.close()
+            self._socket.close()
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait()
+
     def _reader_loop(self):
         try:
-            for line in self.process.stdout:
-                line = line.strip()
-                if not line:
+            for line in self._rfile:
+                # The decoders accept the trailing newline, so the line is not copied by strip()
+                if line.isspace():
                     continue
                 try:
-                    data = json.loads(line)
-                    
-                    # Response (has ID)
-                    if "id" in data and data["id"] is not None:
-                        request_id = data["id"]
-                        if request_id in self._pending_requests:
-                            future = self._pending_requests[request_id]
-                            if not future.done():
-                                future.set_result(data)
-                        else:
-                            print(f"[Warn] Received response for unknown ID: {request_id}")
-                    
-                    # Notification (no ID)
-                    else:
-                        print(f"[Notification] {data}")
-                        
-                except json.JSONDecodeError:
+                    data = json_loads(line)
+                except JSON_DECODE_ERRORS:
                     print(f"[Error] Failed to parse JSON: {line}")
+                    continue
+
+                # Batch response: one array frame carrying several responses
+                if isinstance(data, list):
+                    for item in data:
+                        self._handle_message(item)
+                else:
+                    self._handle_message(data)
         except Exception as e:
             # Handle stream closing on exit gracefully
             if self.running:
                 print(f"[Fatal] Reader loop crashed: {e}")
         finally:
-            pass # Thread ending
+            # No response can arrive any more: fail the waiting callers now instead of at their timeout
+            self.connected = False
+            error = ConnectionError("MCP server closed the connection")
+            for future in list(self._pending_requests.values()):
+                if not future.done():
+                    future.set_exception(error)
 
-    def send_request(self, method, params):
-        future = concurrent.futures.Future()
-        request_id = None
+    def _handle_message(self, data):
+        # Response (has ID)
+        if "id" in data and data["id"] is not None:
+            request_id = data["id"]
+            if request_id in self._pending_requests:
+                future = self._pending_requests[request_id]
+                if not future.done():
+                    future.set_result(data)
+            else:
+                print(f"[Warn] Received response for unknown ID: {request_id}")
+        
+        # Progress notification for a streamed read
+        elif data.get("method") == "notifications/progress" and \
+                data.get("params", {}).get("progressToken") in self._progress_streams:
+            self._progress_streams[data["params"]["progressToken"]].put(data["params"])
+        
+        # Notification (no ID)
+        else:
+            print(f"[Notification] {data}")
+
+    def _writer_loop(self):
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            # Coalesce every frame queued so far into one write + flush
+            batch = [item]
+            stop = False
+            while True:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
 
-        with self._lock:
-            self._request_id += 1
-            request_id = self._request_id
-            self._pending_requests[request_id] = future
-            
-            request = {
-                "jsonrpc": "2.0",
-                "id": request_id,
-                "method": method,
-                "params": params
-            }
-            
             try:
-                json_str = json.dumps(request)
-                self.process.stdin.write(json_str + "\n")
-                self.process.stdin.flush()
+                self._wfile.write(b"".join(frame for frame, _ in batch))
+                self._wfile.flush()
             except Exception as e:
-                # If writing fails, clean up
-                del self._pending_requests[request_id]
-                raise e
+                print(f"Send Error: {e}")
+                for _, request_ids in batch:
+                    for request_id in request_ids:
+                        future = self._pending_requests.get(request_id)
+                        if future is not None and not future.done():
+                            future.set_exception(e)
+            if stop:
+                break
+
+    def _submit_request(self, method, params):
+        """Registers and queues a request without waiting; returns (request_id, future)."""
+        if not self.connected:
+            raise ConnectionError("MCP server closed the connection")
+        future = concurrent.futures.Future()
+        request_id = next(self._request_ids)
+        self._pending_requests[request_id] = future
+        
+        request = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": method,
+            "params": params
+        }
+        
+        try:
+            frame = json_dumps(request) + b"\n"
+        except Exception as e:
+            # If serialization fails, clean up
+            del self._pending_requests[request_id]
+            raise e
+        # Writing is left to the writer thread, so no lock is held across the pipe write
+        self._write_queue.put((frame, (request_id,)))
+        return request_id, future
+
+    def send_request(self, method, params):
+        request_id, future = self._submit_request(method, params)
 
         # Wait for response
         try:
@@ -97,15 +346,365 @@ class MCPClient:
             if request_id in self._pending_requests:
                 del self._pending_requests[request_id]
 
+    def send_batch(self, calls, timeout=10):
+        """
+        Sends several requests as one JSON-RPC batch frame and returns their results in order.
+        calls: list of (method, params) tuples
+        """
+        futures = []
+        batch = []
+        for method, params in calls:
+            request_id = next(self._request_ids)
+            future = concurrent.futures.Future()
+            self._pending_requests[request_id] = future
+            futures.append((request_id, future))
+            batch.append({
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "method": method,
+                "params": params
+            })
+        if not batch:
+            return []
+
+        try:
+            frame = json_dumps(batch) + b"\n"
+        except Exception as e:
+            for request_id, _ in futures:
+                del self._pending_requests[request_id]
+            raise e
+        self._write_queue.put((frame, tuple(request_id for request_id, _ in futures)))
+
+        try:
+            done, not_done = concurrent.futures.wait([f for _, f in futures], timeout=timeout)
+            if not_done:
+                raise TimeoutError(f"{len(not_done)} of {len(futures)} batched requests timed out")
+
+            results = []
+            for _, future in futures:
+                response = future.result()
+                if "error" in response:
+                    raise Exception(f"MCP Error: {response['error']}")
+                results.append(response["result"])
+            return results
+
+        finally:
+            for request_id, _ in futures:
+                self._pending_requests.pop(request_id, None)
+
+    def read_resource_chunks(self, uri, chunk_size=None, offset=0, length=None, timeout=10):
+        """
+        Streams a resource and yields it chunk by chunk as notifications arrive,
+        instead of receiving the whole file in one response.
+        Text resources yield str chunks, binary resources yield bytes.
+        timeout applies to the wait for each chunk.
+        """
+        progress_token = f"read-{next(self._request_ids)}"
+        chunks = queue.SimpleQueue()
+        self._progress_streams[progress_token] = chunks
+
+        params = {"uri": uri, "stream": True, "offset": offset, "_meta": {"progressToken": progress_token}}
+        if chunk_size is not None:
+            params["chunkSize"] = chunk_size
+        if length is not None:
+            params["length"] = length
+
+        try:
+            request_id, future = self._submit_request("resources/read", params)
+        except Exception:
+            del self._progress_streams[progress_token]
+            raise
+
+        def on_done(_):
+            # The final response is written after every chunk, so it marks the end of the stream
+            self._progress_streams.pop(progress_token, None)
+            self._pending_requests.pop(request_id, None)
+            chunks.put(None)
+        future.add_done_callback(on_done)
+
+        try:
+            while True:
+                item = chunks.get(timeout=timeout)
+                if item is None:
+                    break
+                for content in item.get("contents", []):
+                    if "blob" in content:
+                        yield base64.b64decode(content["blob"])
+                    else:
+                        yield content["text"]
+
+            response = future.result()
+            if "error" in response:
+                raise Exception(f"MCP Error: {response['error']}")
+        finally:
+            if not future.done():
+                # Abandoned mid-stream: drop the remaining chunks quietly until the response arrives
+                self._progress_streams[progress_token] = _DiscardQueue()
+                if future.done():
+                    self._progress_streams.pop(progress_token, None)
+
+    def iter_list(self, method, key, params=None):
+        """
+        Yields every entry of a paginated list method (resources/list, tools/list, prompts/list).
+        Pages are fetched lazily, so only one page is held in memory at a time.
+
+            for tool in client.iter_list("tools/list", "tools"): ...
+        """
+        params = dict(params or {})
+        while True:
+            result = self.send_request(method, params)
+            yield from result.get(key, [])
+            next_cursor = result.get("nextCursor")
+            if not next_cursor:
+                return
+            params["cursor"] = next_cursor
+
     def send_notification(self, method, params):
         message = {
             "jsonrpc": "2.0",
             "method": method,
             "params": params
         }
+        self._write_queue.put((json_dumps(message) + b"\n", ()))
+
+
+class MCPClientPool:
+    """
+    N warmed, already-initialized server processes behind the MCPClient request API.
+    Each request goes to the worker with the fewest requests in flight, so CPU-heavy
+    tool calls run in parallel instead of queueing on one server process.
+    A worker whose process died is replaced; the requests it was running fail.
+
+        with MCPClientPool(size=4) as pool:
+            pool.send_request("tools/call", {...})
+    """
+    def __init__(self, size=None, client_factory=MCPClient, client_info=None):
+        self._factory = client_factory
+        self._client_info = client_info or {"name": "mcp-client-pool", "version": "1.0"}
+        self._lock = threading.Lock()
+        self._restarting = set()  # worker indexes whose replacement is starting up
+        self.restarts = 0
+        self._workers = []
+        try:
+            # Spawn every process and queue its handshake first, so they all start up in parallel
+            for _ in range(size or os.cpu_count() or 1):
+                self._workers.append(self._start_worker())
+            for worker in self._workers:
+                worker.handshake()
+        except BaseException:
+            # No pool is returned, so nobody else could ever close the processes already started
+            self.close()
+            raise
+        self._outstanding = [0] * len(self._workers)
+        self.capabilities = self._workers[0].capabilities
+        self.tools = self._workers[0].tools
+
+    def _start_worker(self):
+        worker = self._factory()
+        try:
+            worker.start_handshake(self._client_info)
+        except BaseException:
+            worker.close()
+            raise
+        return worker
+
+    def _acquire(self):
+        with self._lock:
+            # A worker found dead here never received the request, so it is simply skipped
+            for index, worker in enumerate(self._workers):
+                if not worker.connected:
+                    self._restart_locked(index, worker)
+            live = [i for i in range(len(self._workers)) if i not in self._restarting] or range(len(self._workers))
+            index = min(live, key=self._outstanding.__getitem__)
+            self._outstanding[index] += 1
+            return index, self._workers[index]
+
+    def _release(self, index, worker):
+        with self._lock:
+            self._outstanding[index] -= 1
+            if not worker.connected:
+                self._restart_locked(index, worker)
+
+    def _restart_locked(self, index, dead):
+        if index in self._restarting or self._workers[index] is not dead:
+            return
+        self._restarting.add(index)
+        threading.Thread(target=self._restart, args=(index, dead), daemon=True).start()
+
+    def _restart(self, index, dead):
+        print(f"[Pool] Worker {index} exited (code {dead.process.poll() if dead.process else None}), restarting")
         try:
-            json_str = json.dumps(message)
-            self.process.stdin.write(json_str + "\n")
-            self.process.stdin.flush()
+            dead.close()
+        except Exception:
+            pass
+        replacement = None
+        try:
+            replacement = self._start_worker()
+            replacement.handshake()
+        except Exception as e:
+            # Left dead: the next _acquire() tries again
+            print(f"[Pool] Restart of worker {index} failed: {e}")
+            if replacement is not None:
+                replacement.close()
+            replacement = dead
+        with self._lock:
+            self._workers[index] = replacement
+            self._restarting.discard(index)
+            if replacement is not dead:
+                self.restarts += 1
+
+    def send_request(self, method, params):
+        index, worker = self._acquire()
+        try:
+            return worker.send_request(method, params)
+        finally:
+            self._release(index, worker)
+
+    def send_batch(self, calls, timeout=10):
+        # One batch is one frame, so it stays on one worker
+        index, worker = self._acquire()
+        try:
+            return worker.send_batch(calls, timeout=timeout)
+        finally:
+            self._release(index, worker)
+
+    # Cursors are stateless, so consecutive pages may come from different workers
+    iter_list = MCPClient.iter_list
+
+    def close(self):
+        for worker in self._workers:
+            try:
+                worker.close()
+            except Exception as e:
+                print(f"[Pool] Error closing worker: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncMCPClient:
+    """
+    asyncio version of MCPClient.
+    A single reader task resolves futures by id, so thousands of requests can be
+    in flight on one event loop without parking a thread per caller.
+
+        client = await AsyncMCPClient.start()
+        result = await client.send_request("ping", {})
+    """
+    def __init__(self):
+        self.process = None
+        self._request_id = 0
+        self._pending_requests = {}
+        self._reader_task = None
+
+    @classmethod
+    async def start(cls):
+        client = cls()
+        # 1. Start Server Process
+        client.process = await asyncio.create_subprocess_exec(
+            sys.executable, SERVER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=sys.stderr, # Direct stderr to parent's stderr for debugging
+            limit=ASYNC_STREAM_LIMIT
+        )
+        # 2. Start Reader Task
+        client._reader_task = asyncio.create_task(client._reader_loop())
+        return client
+
+    async def _reader_loop(self):
+        try:
+            while True:
+                line = await self.process.stdout.readline()
+                if not line:
+                    break
+                if line.isspace():
+                    continue
+                try:
+                    data = json_loads(line)
+                except JSON_DECODE_ERRORS:
+                    print(f"[Error] Failed to parse JSON: {line}")
+                    continue
+
+                # Response (has ID)
+                if "id" in data and data["id"] is not None:
+                    future = self._pending_requests.get(data["id"])
+                    if future is not None:
+                        if not future.done():
+                            future.set_result(data)
+                    else:
+                        print(f"[Warn] Received response for unknown ID: {data['id']}")
+
+                # Notification (no ID)
+                else:
+                    print(f"[Notification] {data}")
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"[Fatal] Reader loop crashed: {e}")
+        finally:
+            # Nobody is going to answer the remaining requests
+            for future in self._pending_requests.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("MCP server closed the connection"))
+
+    async def send_request(self, method, params, timeout=10):
+        # Everything runs on one event loop, so no lock is needed for the id counter
+        self._request_id += 1
+        request_id = self._request_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending_requests[request_id] = future
+
+        request = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": method,
+            "params": params
+        }
+
+        try:
+            self.process.stdin.write(json_dumps(request) + b"\n")
+            await self.process.stdin.drain()
+
+            # Wait for response
+            response = await asyncio.wait_for(future, timeout)
+
+            if "error" in response:
+                raise Exception(f"MCP Error: {response['error']}")
+
+            return response["result"]
+
+        finally:
+            self._pending_requests.pop(request_id, None)
+
+    async def send_notification(self, method, params):
+        message = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params
+        }
+        try:
+            self.process.stdin.write(json_dumps(message) + b"\n")
+            await self.process.stdin.drain()
         except Exception as e:
             print(f"Send Error: {e}")
+
+    async def close(self):
+        if self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self.process.terminate()
+                await self.process.wait()
+        if self._reader_task is not None:
+            await self._reader_task
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -1,11 +1,155 @@
 import os
 import sys
 import json
+import re
+import stat
+import asyncio
+import argparse
+import http.server
+import urllib.parse
+import time
+import mmap
+import uuid
+import base64
+import bisect
+import binascii
+import codecs
+import functools
+import mimetypes
+import queue
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # 1. Configuration
 # Resolve 'data' directory relative to this script
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data"))
 
+# Size of the handler worker pool
+MAX_WORKERS = int(os.environ.get("MCP_SERVER_WORKERS", "8"))
+
+# Per-method concurrency caps. Together the capped methods get at most MAX_WORKERS - 1
+# workers (RequestScheduler clamps them), so a burst of slow tool calls and reads can
+# never take every worker away from ping and the other uncapped methods.
+METHOD_CONCURRENCY = {
+    "tools/call": 4,
+    "resources/read": 4,
+}
+
+# Frames waiting for the stdout writer before handlers block. Socket connections share the
+# worker pool, so there a full queue pauses reading from that client instead
+WRITE_QUEUE_FRAMES = 256
+
+# When the writer flushes stdout: "drain" once no more frames are queued (bursts share
+# one write syscall), "always" after every frame
+FLUSH_POLICY = os.environ.get("MCP_FLUSH_POLICY", "drain")
+
+# Size of the stdin / stdout buffers; frames larger than this are written straight through
+STDIO_BUFFER_BYTES = 64 * 1024
+
+# Upper bound on how long a written frame may sit unflushed while requests are still pending
+FLUSH_DELAY_SECONDS = 0.001
+
+# Longest request line accepted from a socket client (asyncio's default is only 64 KiB)
+SOCKET_LINE_LIMIT = 64 * 1024 * 1024
+
+# A socket client with this many requests waiting for a worker is not read from until some start
+SOCKET_PENDING_REQUESTS = 64
+
+# How often a paused socket connection checks whether its client has caught up
+SOCKET_BACKPRESSURE_POLL_SECONDS = 0.005
+
+# Bytes a socket client may have waiting in its write queue before a streaming handler
+# (notifications/progress chunks) waits for it to read, and how long it waits before the
+# stream is aborted so the worker is freed
+SOCKET_STREAM_BUFFER_BYTES = 4 * 1024 * 1024
+SOCKET_STALL_TIMEOUT_SECONDS = float(os.environ.get("MCP_SOCKET_STALL_TIMEOUT", "30"))
+
+# Streamable HTTP transport: endpoint path, and how long an unused Mcp-Session-Id stays valid
+HTTP_ENDPOINT = "/mcp"
+HTTP_SESSION_TTL_SECONDS = int(os.environ.get("MCP_HTTP_SESSION_TTL", "3600"))
+
+# Largest POST body accepted, same bound as a socket request line
+HTTP_MAX_BODY_BYTES = SOCKET_LINE_LIMIT
+
+# Host names the HTTP transport answers to (DNS rebinding protection): loopback, the bound
+# address, and any extra names listed in MCP_HTTP_ALLOWED_HOSTS (comma separated)
+HTTP_LOOPBACK_HOSTS = ("localhost", "127.0.0.1", "::1")
+HTTP_EXTRA_ALLOWED_HOSTS = tuple(h.strip().lower() for h in os.environ.get("MCP_HTTP_ALLOWED_HOSTS", "").split(",") if h.strip())
+
+# Default chunk size for ranged / streamed resources/read
+READ_CHUNK_BYTES = int(os.environ.get("MCP_READ_CHUNK_BYTES", str(256 * 1024)))
+
+# Maximum number of entries per resources/list, tools/list and prompts/list page
+LIST_PAGE_SIZE = int(os.environ.get("MCP_LIST_PAGE_SIZE", "100"))
+
+# Byte budget for the resources/read content cache (0 disables caching)
+RESOURCE_CACHE_BYTES = int(os.environ.get("MCP_RESOURCE_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# -------------------------------------------------------------------------------------
+# JSON Codec
+# orjson or msgspec when installed, stdlib json otherwise (MCP_JSON_BACKEND picks one).
+# Every backend reads and writes bytes, so frames are never decoded to str and re-encoded.
+# -------------------------------------------------------------------------------------
+# orjson and msgspec read integers wider than 64 bits as floats (an id of 2**70 would come back
+# as 1.18e21). A frame with a run of 19+ digits may hold one, so it goes through stdlib json.
+WIDE_INTEGER = re.compile(rb"\d{19}")
+
+def with_exact_integers(fast_loads, fast_errors):
+    def loads(data):
+        if WIDE_INTEGER.search(data) is None:
+            try:
+                return fast_loads(data)
+            except fast_errors:
+                pass  # stdlib json either reads it (e.g. 1e400 as inf) or raises the error itself
+        return json.loads(data)
+    return loads
+
+def load_json_backend(preferred):
+    """Returns (name, loads, dumps, decode_errors) for the first importable backend."""
+    candidates = ["orjson", "msgspec", "json"] if preferred == "auto" else [preferred]
+    for name in candidates:
+        if name == "orjson":
+            try:
+                import orjson
+            except ImportError:
+                continue
+
+            def dumps(obj, default=None):
+                try:
+                    return orjson.dumps(obj, default=default)
+                except TypeError:
+                    # e.g. integers wider than 64 bits, which orjson rejects
+                    return json.dumps(obj, default=default, ensure_ascii=False).encode("utf-8")
+            loads = with_exact_integers(orjson.loads, orjson.JSONDecodeError)
+            return name, loads, dumps, (orjson.JSONDecodeError, json.JSONDecodeError, UnicodeDecodeError)
+
+        if name == "msgspec":
+            try:
+                import msgspec
+            except ImportError:
+                continue
+            encoder = msgspec.json.Encoder()
+            decoder = msgspec.json.Decoder()
+
+            def dumps(obj, default=None):
+                if default is None:
+                    return encoder.encode(obj)
+                return msgspec.json.Encoder(enc_hook=default).encode(obj)
+            loads = with_exact_integers(decoder.decode, msgspec.DecodeError)
+            return name, loads, dumps, (msgspec.DecodeError, json.JSONDecodeError, UnicodeDecodeError)
+
+        if name == "json":
+            def dumps(obj, default=None):
+                return json.dumps(obj, default=default, ensure_ascii=False).encode("utf-8")
+            return name, json.loads, dumps, (json.JSONDecodeError, UnicodeDecodeError)
+
+    raise ImportError(f"JSON backend not available: {preferred}")
+
+JSON_BACKEND, json_loads, json_dumps, JSON_DECODE_ERRORS = load_json_backend(
+    os.environ.get("MCP_JSON_BACKEND", "auto")
+)
+
 # 1-1. Prompt Definitions
 PROMPTS = {
     "math_tutor": {
@@ -27,233 +171,1366 @@ PROMPTS = {
     }
 }
 
-def main():
+class JsonRpcError(Exception):
+    """Raised by a handler to answer with a JSON-RPC error object instead of a result."""
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+# -------------------------------------------------------------------------------------
+# 1-2. Resource Content Cache
+# -------------------------------------------------------------------------------------
+class ResourceCache:
+    """
+    LRU cache of file contents keyed by real path.
+    An entry is only served while the file's (st_mtime_ns, st_size) still match,
+    so a repeated read of an unchanged file costs one stat() instead of open() + read().
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # real_path -> ((mtime_ns, size), text)
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def read_text(self, real_path):
+        st = os.stat(real_path)
+        signature = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(real_path)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(real_path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        with open(real_path, "r", encoding="utf-8") as f:
+            text = f.read()
+
+        if st.st_size <= self.max_bytes:
+            with self._lock:
+                old = self._entries.pop(real_path, None)
+                if old is not None:
+                    self._current_bytes -= old[0][1]
+                self._entries[real_path] = (signature, text)
+                self._current_bytes += st.st_size
+                while self._current_bytes > self.max_bytes:
+                    _, (evicted_signature, _) = self._entries.popitem(last=False)
+                    self._current_bytes -= evicted_signature[1]
+                    self.evictions += 1
+        return text
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._current_bytes
+            }
+
+RESOURCE_CACHE = ResourceCache(RESOURCE_CACHE_BYTES)
+
+# -------------------------------------------------------------------------------------
+# 1-3. MIME Types
+# -------------------------------------------------------------------------------------
+# Extensions the mimetypes table does not know, or maps differently between platforms
+EXTRA_MIME_TYPES = {
+    ".log": "text/plain",
+    ".md": "text/markdown",
+    ".jsonl": "application/jsonl",
+    ".yaml": "application/yaml",
+    ".yml": "application/yaml",
+}
+
+# Non-text/* types that are still served as text
+TEXT_MIME_TYPES = {
+    "application/json", "application/jsonl", "application/xml",
+    "application/javascript", "application/yaml", "application/x-sh",
+}
+
+@functools.lru_cache(maxsize=1024)
+def mime_type_for_extension(ext):
+    ext = ext.lower()
+    if ext in EXTRA_MIME_TYPES:
+        return EXTRA_MIME_TYPES[ext]
+    guessed, _ = mimetypes.guess_type("file" + ext, strict=False)
+    return guessed
+
+# Bytes read to decide whether a file without a known extension is text
+MIME_SNIFF_BYTES = 4096
+
+# Sniffed types are kept like ResourceCache entries, keyed on the path and only served while
+# the file's (st_mtime_ns, st_size) match, so a repeated read costs a stat() and no open()
+SNIFF_CACHE_ENTRIES = 1024
+_sniffed_types = OrderedDict()  # real_path -> ((mtime_ns, size), mime type)
+_sniffed_lock = threading.Lock()
+
+def sniff_mime_type(path):
+    """
+    README, Makefile, .env and friends: text/plain when the head of the file decodes as UTF-8.
+    Anything else is served as binary, since a blob is never mangled while decoded text might be.
+    """
     try:
-        for line in sys.stdin:
-            msg = line.strip()
-            if not msg:
-                continue
-                
-            try:
-                request = json.loads(msg)
-                method = request.get("method")
-                
-                # 1. Initialize
-                if method == "initialize":
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request["id"],
-                        "result": {
-                            "protocolVersion": "2025-11-25",
-                            "capabilities": {
-                                "resources": {},
-                                "tools": {},
-                                "prompts": {} # Add prompts capability
-                            },
-                            "serverInfo": {
-                                "name": "my-prompts-server",
-                                "version": "1.0.0"
-                            }
-                        }
-                    }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-                
-                # 2. Notification: initialized
-                elif method == "notifications/initialized":
-                    print("Connection initialized successfully.", file=sys.stderr)
-                    
-                # 3. Ping
-                elif method == "ping":
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request["id"],
-                        "result": {}
-                    }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # 4. Resources List
-                elif method == "resources/list":
-                    resource_list = []
-                    try:
-                        if os.path.exists(DATA_DIR):
-                            for filename in os.listdir(DATA_DIR):
-                                file_path = os.path.join(DATA_DIR, filename)
-                                if os.path.isfile(file_path):
-                                    resource_list.append({
-                                        "uri": f"file://{file_path}",
-                                        "name": filename,
-                                        "mimeType": "text/plain"
-                                    })
-                    except Exception as e:
-                        print(f"Error listing resources: {e}", file=sys.stderr)
-                    
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request["id"],
-                        "result": {
-                            "resources": resource_list
-                        }
-                    }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # 5. Resources Read
-                elif method == "resources/read":
-                    params = request.get("params", {})
-                    uri = params.get("uri", "")
-                    content_text = ""
-                    error_msg = None
-                    
-                    if uri.startswith("file://"):
-                        file_path = uri.replace("file://", "")
-                        real_path = os.path.realpath(file_path)
-                        if real_path.startswith(DATA_DIR):
-                            try:
-                                with open(real_path, "r", encoding="utf-8") as f:
-                                    content_text = f.read()
-                            except FileNotFoundError:
-                                error_msg = "File not found"
-                            except Exception as e:
-                                error_msg = str(e)
-                        else:
-                            error_msg = "Access denied: Path outside data directory"
-                    else:
-                        error_msg = "Invalid URI scheme"
-
-                    if error_msg:
-                         print(f"Error reading resource: {error_msg}", file=sys.stderr)
-                         response = {
-                            "jsonrpc": "2.0", "id": request["id"],
-                            "result": { "contents": [] }
-                        }
-                    else:
-                        response = {
-                            "jsonrpc": "2.0", "id": request["id"],
-                            "result": {
-                                "contents": [{ "uri": uri, "mimeType": "text/plain", "text": content_text }]
-                            }
-                        }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # 6. Tools List
-                elif method == "tools/list":
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request["id"],
-                        "result": {
-                            "tools": [
-                                {
-                                    "name": "add_numbers",
-                                    "description": "Add two numbers together",
-                                    "inputSchema": {
-                                        "type": "object",
-                                        "properties": {
-                                            "a": { "type": "number" },
-                                            "b": { "type": "number" }
-                                        },
-                                        "required": ["a", "b"]
-                                    }
-                                }
-                            ]
-                        }
-                    }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # 7. Tools Call
-                elif method == "tools/call":
-                    params = request.get("params", {})
-                    name = params.get("name")
-                    arguments = params.get("arguments", {})
-                    
-                    if name == "add_numbers":
-                        try:
-                            a = arguments.get("a")
-                            b = arguments.get("b")
-                            if a is None or b is None: raise ValueError("Missing arguments 'a' or 'b'")
-                            result = float(a) + float(b)
-                            response = {
-                                "jsonrpc": "2.0", "id": request["id"],
-                                "result": { "content": [{ "type": "text", "text": str(result) }] }
-                            }
-                        except Exception as e:
-                            response = {
-                                "jsonrpc": "2.0", "id": request["id"],
-                                "result": { "content": [{ "type": "text", "text": f"Error: {str(e)}" }], "isError": True }
-                            }
-                    else:
-                        response = {
-                            "jsonrpc": "2.0", "id": request["id"],
-                            "result": { "content": [{ "type": "text", "text": f"Error: Unknown tool {name}" }], "isError": True }
-                        }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # -------------------------------------------------------------------------------------
-                # 8. Prompts Features (New in Step 6-1)
-                # -------------------------------------------------------------------------------------
-                
-                # Prompts List
-                elif method == "prompts/list":
-                    prompt_list = []
-                    for key, p in PROMPTS.items():
-                        prompt_list.append({
-                            "name": p["name"],
-                            "description": p["description"],
-                            "arguments": p.get("arguments", [])
-                        })
-                    
-                    response = {
-                        "jsonrpc": "2.0",
-                        "id": request["id"],
-                        "result": {
-                            "prompts": prompt_list
-                        }
+        st = os.stat(path)
+    except OSError:
+        return "application/octet-stream"
+    signature = (st.st_mtime_ns, st.st_size)
+    with _sniffed_lock:
+        entry = _sniffed_types.get(path)
+        if entry is not None and entry[0] == signature:
+            _sniffed_types.move_to_end(path)
+            return entry[1]
+
+    mime_type = sniff_file(path)
+    with _sniffed_lock:
+        _sniffed_types[path] = (signature, mime_type)
+        _sniffed_types.move_to_end(path)
+        if len(_sniffed_types) > SNIFF_CACHE_ENTRIES:
+            _sniffed_types.popitem(last=False)
+    return mime_type
+
+def sniff_file(path):
+    try:
+        with open(path, "rb") as f:
+            head = f.read(MIME_SNIFF_BYTES)
+    except OSError:
+        return "application/octet-stream"
+    if b"\0" in head:
+        return "application/octet-stream"
+    try:
+        # final=False: a character cut off at the end of the sample is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return "application/octet-stream"
+    return "text/plain"
+
+def guess_mime_type(path):
+    return mime_type_for_extension(os.path.splitext(path)[1]) or sniff_mime_type(path)
+
+def is_text_mime_type(mime_type):
+    return (mime_type.startswith("text/") or mime_type in TEXT_MIME_TYPES
+            or mime_type.endswith("+json") or mime_type.endswith("+xml"))
+
+# -------------------------------------------------------------------------------------
+# 1-4. Resource Catalog
+# -------------------------------------------------------------------------------------
+class ResourceCatalog:
+    """
+    In-memory listing of a directory for resources/list.
+    Built with os.scandir (no per-entry stat for regular files). After that, each call
+    costs one stat() of the directory, and the directory is only rescanned when its
+    mtime changes.
+    """
+    # A change landing in the same timestamp tick as our scan would not move the mtime,
+    # so a directory modified this recently is rescanned until it has settled.
+    RACY_WINDOW_NS = 1_000_000_000
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._entries = {}  # filename -> resource dict
+        self._resources = []
+        self._dir_mtime_ns = None
+        self._racy = False
+        self.scans = 0
+
+    def list(self):
+        try:
+            mtime_ns = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        with self._lock:
+            if mtime_ns != self._dir_mtime_ns or self._racy:
+                self._refresh(mtime_ns)
+            return self._resources
+
+    def _refresh(self, mtime_ns):
+        entries = {}
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                # Keep the existing dict for names we already know; only new files are built
+                # (and only those with an unknown extension are opened, to sniff their type)
+                resource = self._entries.get(entry.name)
+                if resource is None:
+                    resource = {
+                        "uri": f"file://{entry.path}",
+                        "name": entry.name,
+                        "mimeType": guess_mime_type(entry.path)
                     }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
-
-                # Prompts Get
-                elif method == "prompts/get":
-                    params = request.get("params", {})
-                    name = params.get("name")
-                    
-                    if name in PROMPTS:
-                        prompt_def = PROMPTS[name]
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": request["id"],
-                            "result": {
-                                "messages": prompt_def["messages"]
-                            }
-                        }
-                    else:
-                        # Error if prompt not found is not explicitly defined in spec as JSON-RPC error or app error,
-                        # but standard behavior is to error.
-                        response = {
-                            "jsonrpc": "2.0",
-                            "id": request["id"],
-                            "error": {
-                                "code": -32602,
-                                "message": f"Prompt not found: {name}"
-                            }
-                        }
-                    sys.stdout.write(json.dumps(response) + "\n")
-                    sys.stdout.flush()
+                entries[entry.name] = resource
+
+        self._entries = entries
+        # Sorted so the order is stable between calls
+        self._resources = [entries[name] for name in sorted(entries)]
+        self._dir_mtime_ns = mtime_ns
+        self._racy = time.time_ns() - mtime_ns < self.RACY_WINDOW_NS
+        self.scans += 1
+
+RESOURCE_CATALOG = ResourceCatalog(DATA_DIR)
+
+# -------------------------------------------------------------------------------------
+# 1-5. Ranged Reads (mmap)
+# -------------------------------------------------------------------------------------
+# Multiple of 3, so independently encoded blocks concatenate into one valid base64 string
+BASE64_BLOCK_BYTES = 3 * 64 * 1024
+
+def is_utf8_continuation(byte):
+    return (byte & 0xC0) == 0x80
+
+class MappedFile:
+    """
+    Read-only mmap of a resource. Slices are copied out one chunk at a time,
+    so the whole file is never held in memory as bytes or str.
+    """
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        # mmap rejects empty files
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def char_boundary(self, offset):
+        """Moves an offset that lands inside a multi-byte UTF-8 character forward to the next character."""
+        while offset < self.size and is_utf8_continuation(self._map[offset]):
+            offset += 1
+        return offset
+
+    def text_chunk(self, offset, length):
+        """
+        Decodes about `length` bytes starting at `offset` (a character boundary, see char_boundary) and returns (text, end).
+        The end is moved to a UTF-8 character boundary so a multi-byte character is never split;
+        continue from `end` to read the next chunk.
+        """
+        if self._map is None or offset >= self.size:
+            return "", offset
+        end = min(offset + length, self.size)
+        if end < self.size:
+            boundary = end
+            while boundary > offset and end - boundary < 3 and is_utf8_continuation(self._map[boundary]):
+                boundary -= 1
+            if boundary > offset:
+                end = boundary
+            else:
+                # length is shorter than the character at offset: include that character whole
+                while end < self.size and is_utf8_continuation(self._map[end]):
+                    end += 1
+        return self._map[offset:end].decode("utf-8"), end
+
+    def iter_base64(self, offset, stop):
+        """Base64-encodes [offset, stop) block by block straight out of the mapping (yields bytes)."""
+        if self._map is None or offset >= stop:
+            return
+        view = memoryview(self._map)
+        try:
+            for position in range(offset, stop, BASE64_BLOCK_BYTES):
+                with view[position:min(position + BASE64_BLOCK_BYTES, stop)] as block:
+                    yield binascii.b2a_base64(block, newline=False)
+        finally:
+            view.release()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class Base64Blob:
+    """
+    Placeholder for a "blob" field. The file is mapped when the handler runs (so errors
+    surface there) but only encoded while the writer sends the frame, one block at a time.
+    """
+    def __init__(self, path, offset=0, length=None):
+        self._mapped = MappedFile(path)
+        self.size = self._mapped.size
+        self.offset = min(offset, self.size)
+        self.stop = self.size if length is None else min(self.size, offset + length)
+
+    def iter_base64(self):
+        try:
+            yield from self._mapped.iter_base64(self.offset, self.stop)
+        finally:
+            self._mapped.close()
+
+# -------------------------------------------------------------------------------------
+# 2. Tools
+# -------------------------------------------------------------------------------------
+def add_numbers(arguments):
+    a = arguments.get("a")
+    b = arguments.get("b")
+    if a is None or b is None: raise ValueError("Missing arguments 'a' or 'b'")
+    return str(float(a) + float(b))
+
+# Tool name -> definition (as returned by tools/list) + implementation
+TOOLS = {
+    "add_numbers": {
+        "definition": {
+            "name": "add_numbers",
+            "description": "Add two numbers together",
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "a": { "type": "number" },
+                    "b": { "type": "number" }
+                },
+                "required": ["a", "b"]
+            }
+        },
+        "handler": add_numbers
+    }
+}
+
+# -------------------------------------------------------------------------------------
+# 2-1. Pagination (cursor / nextCursor)
+# -------------------------------------------------------------------------------------
+def encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    if not isinstance(cursor, str):
+        raise JsonRpcError(-32602, f"Invalid cursor: {cursor!r}")
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise JsonRpcError(-32602, f"Invalid cursor: {cursor}")
+
+def paginate(items, params, sort_key=None):
+    """
+    Returns (page, next_cursor) for a list request.
+    With sort_key, items must be sorted by it and the cursor remembers the last key
+    returned, so files added or removed between pages do not shift the next page.
+    Otherwise the cursor is a plain offset.
+    """
+    start = 0
+    cursor = params.get("cursor")
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        if sort_key is None:
+            if not isinstance(position, int) or isinstance(position, bool) or position < 0:
+                raise JsonRpcError(-32602, f"Invalid cursor: {cursor}")
+            start = position
+        else:
+            # Sort keys are names; anything else cannot be compared with them
+            if not isinstance(position, str):
+                raise JsonRpcError(-32602, f"Invalid cursor: {cursor}")
+            start = bisect.bisect_right(items, position, key=sort_key)
+
+    page = items[start:start + LIST_PAGE_SIZE]
+    next_cursor = None
+    if start + LIST_PAGE_SIZE < len(items):
+        next_cursor = encode_cursor(sort_key(page[-1]) if sort_key else start + LIST_PAGE_SIZE)
+    return page, next_cursor
+
+def list_result(key, page, next_cursor):
+    result = { key: page }
+    if next_cursor is not None:
+        result["nextCursor"] = next_cursor
+    return result
+
+# -------------------------------------------------------------------------------------
+# 2-2. Pre-serialized Static Results
+# -------------------------------------------------------------------------------------
+class PreEncoded:
+    """A result serialized once; its JSON bytes are spliced into every response that returns it."""
+    __slots__ = ("json_bytes",)
+
+    def __init__(self, result):
+        self.json_bytes = json_dumps(result)
+
+# method -> PreEncoded. Filled by refresh_static_results() at startup.
+STATIC_RESULTS = {}
+
+def refresh_static_results():
+    """
+    Serializes the handshake/discovery results that are identical for every call
+    (initialize, first page of tools/list and prompts/list).
+    Call again after changing TOOLS or PROMPTS at runtime.
+    """
+    STATIC_RESULTS.clear()
+    STATIC_RESULTS.update({
+        "initialize": PreEncoded(build_initialize_result()),
+        "tools/list": PreEncoded(build_tools_list_result({})),
+        "prompts/list": PreEncoded(build_prompts_list_result({})),
+    })
+
+# -------------------------------------------------------------------------------------
+# 3. Method Handlers
+# Each handler takes the request params and the client's Session, and returns the result object.
+# Notifications return None (nothing is written back).
+# -------------------------------------------------------------------------------------
+def build_initialize_result():
+    return {
+        "protocolVersion": "2025-11-25",
+        "capabilities": {
+            "resources": {},
+            "tools": {},
+            "prompts": {} # Add prompts capability
+        },
+        "serverInfo": {
+            "name": "my-prompts-server",
+            "version": "1.0.0"
+        }
+    }
+
+def handle_initialize(params, session):
+    if session is not None:
+        session.client_info = params.get("clientInfo")
+        session.protocol_version = params.get("protocolVersion")
+    return STATIC_RESULTS.get("initialize") or build_initialize_result()
 
+def handle_initialized(params, session):
+    if session is not None:
+        session.initialized = True
+    print("Connection initialized successfully.", file=sys.stderr)
+    return None
+
+def handle_ping(params, session):
+    return {}
+
+def handle_resources_list(params, session):
+    resource_list = []
+    try:
+        resource_list = RESOURCE_CATALOG.list()
+    except Exception as e:
+        print(f"Error listing resources: {e}", file=sys.stderr)
+    page, next_cursor = paginate(resource_list, params, sort_key=lambda r: r["name"])
+    return list_result("resources", page, next_cursor)
+
+def read_range_params(params):
+    """Validates offset/length/chunkSize for ranged and streamed reads."""
+    values = {}
+    for key, default in (("offset", 0), ("length", None), ("chunkSize", READ_CHUNK_BYTES)):
+        value = params.get(key, default)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 0):
+            raise JsonRpcError(-32602, f"'{key}' must be a non-negative integer")
+        values[key] = value
+    if values["chunkSize"] == 0:
+        raise JsonRpcError(-32602, "'chunkSize' must be positive")
+    return values["offset"], values["length"], values["chunkSize"]
+
+def read_resource_range(uri, real_path, mime_type, offset, length):
+    if not is_text_mime_type(mime_type):
+        blob = Base64Blob(real_path, offset, length)
+        return {
+            "contents": [{ "uri": uri, "mimeType": mime_type, "blob": blob }],
+            "_meta": { "offset": blob.offset, "length": blob.stop - blob.offset, "size": blob.size }
+        }
+    with MappedFile(real_path) as mapped:
+        offset = mapped.char_boundary(offset)
+        text, end = mapped.text_chunk(offset, length)
+        return {
+            "contents": [{ "uri": uri, "mimeType": mime_type, "text": text }],
+            "_meta": { "offset": offset, "length": end - offset, "size": mapped.size }
+        }
+
+def stream_resource(uri, real_path, mime_type, offset, length, chunk_size, progress_token, session):
+    """Sends the file as notifications/progress chunks; the final result only carries the totals."""
+    is_text = is_text_mime_type(mime_type)
+    with MappedFile(real_path) as mapped:
+        if is_text:
+            offset = mapped.char_boundary(offset)
+        stop = mapped.size if length is None else min(mapped.size, offset + length)
+        total = max(stop - offset, 0)
+        position = offset
+        chunks = 0
+        while position < stop:
+            if is_text:
+                text, end = mapped.text_chunk(position, min(chunk_size, stop - position))
+                content = { "uri": uri, "mimeType": mime_type, "text": text, "offset": position }
+            else:
+                end = min(position + chunk_size, stop)
+                blob = b"".join(mapped.iter_base64(position, end)).decode("ascii")
+                content = { "uri": uri, "mimeType": mime_type, "blob": blob, "offset": position }
+            session.notify("notifications/progress", {
+                "progressToken": progress_token,
+                "progress": end - offset,
+                "total": total,
+                "contents": [content]
+            })
+            chunks += 1
+            position = end
+        return {
+            "contents": [],
+            "_meta": { "offset": offset, "length": position - offset, "size": mapped.size, "chunks": chunks }
+        }
+
+def handle_resources_read(params, session):
+    """
+    Whole-file read by default. Text types are returned as "text", everything else as a base64 "blob".
+    - offset / length: ranged read of that byte range (length defaults to one chunk)
+    - stream: true (with _meta.progressToken): chunks are sent as notifications/progress
+      (over HTTP, only to a POST that accepts text/event-stream)
+    """
+    uri = params.get("uri", "")
+    content = None
+    error_msg = None
+
+    stream = bool(params.get("stream"))
+    ranged = "offset" in params or "length" in params
+    if stream or ranged:
+        offset, length, chunk_size = read_range_params(params)
+    progress_token = (params.get("_meta") or {}).get("progressToken")
+    if stream and progress_token is None:
+        raise JsonRpcError(-32602, "Streamed read requires _meta.progressToken")
+    if stream and not session.delivers(progress_token):
+        # Over HTTP the chunks would be dropped, leaving an empty result
+        raise JsonRpcError(-32602, "Streamed read requires a transport that carries notifications (Accept: text/event-stream)")
+
+    if uri.startswith("file://"):
+        file_path = uri.replace("file://", "")
+        real_path = os.path.realpath(file_path)
+        if real_path.startswith(DATA_DIR):
+            mime_type = guess_mime_type(real_path)
+            try:
+                if stream:
+                    return stream_resource(uri, real_path, mime_type, offset, length, chunk_size, progress_token, session)
+                if ranged:
+                    return read_resource_range(uri, real_path, mime_type, offset, chunk_size if length is None else length)
+                if is_text_mime_type(mime_type):
+                    content = { "uri": uri, "mimeType": mime_type, "text": RESOURCE_CACHE.read_text(real_path) }
                 else:
-                     print(f"Unknown method: {method}", file=sys.stderr)
-            
-            except json.JSONDecodeError:
-                print("Error: Invalid JSON", file=sys.stderr)
+                    content = { "uri": uri, "mimeType": mime_type, "blob": Base64Blob(real_path) }
+            except FileNotFoundError:
+                error_msg = "File not found"
+            except Exception as e:
+                error_msg = str(e)
+        else:
+            error_msg = "Access denied: Path outside data directory"
+    else:
+        error_msg = "Invalid URI scheme"
+
+    if error_msg:
+        print(f"Error reading resource: {error_msg}", file=sys.stderr)
+        return { "contents": [] }
+    return { "contents": [content] }
+
+def build_tools_list_result(params):
+    page, next_cursor = paginate(list(TOOLS.values()), params)
+    return list_result("tools", [tool["definition"] for tool in page], next_cursor)
+
+def handle_tools_list(params, session):
+    if "cursor" not in params and "tools/list" in STATIC_RESULTS:
+        return STATIC_RESULTS["tools/list"]
+    return build_tools_list_result(params)
+
+def handle_tools_call(params, session):
+    name = params.get("name")
+    arguments = params.get("arguments", {})
+
+    tool = TOOLS.get(name)
+    if tool is None:
+        return { "content": [{ "type": "text", "text": f"Error: Unknown tool {name}" }], "isError": True }
+    try:
+        text = tool["handler"](arguments)
+        return { "content": [{ "type": "text", "text": text }] }
+    except Exception as e:
+        return { "content": [{ "type": "text", "text": f"Error: {str(e)}" }], "isError": True }
+
+# Prompts Features (New in Step 6-1)
+def build_prompts_list_result(params):
+    page, next_cursor = paginate(list(PROMPTS.values()), params)
+    prompt_list = []
+    for p in page:
+        prompt_list.append({
+            "name": p["name"],
+            "description": p["description"],
+            "arguments": p.get("arguments", [])
+        })
+    return list_result("prompts", prompt_list, next_cursor)
+
+def handle_prompts_list(params, session):
+    if "cursor" not in params and "prompts/list" in STATIC_RESULTS:
+        return STATIC_RESULTS["prompts/list"]
+    return build_prompts_list_result(params)
+
+def handle_prompts_get(params, session):
+    name = params.get("name")
+    if name not in PROMPTS:
+        # Error if prompt not found is not explicitly defined in spec as JSON-RPC error or app error,
+        # but standard behavior is to error.
+        raise JsonRpcError(-32602, f"Prompt not found: {name}")
+    return { "messages": PROMPTS[name]["messages"] }
+
+# Method name -> handler. Lookup is a single dict access no matter how many methods are registered.
+HANDLERS = {
+    "initialize": handle_initialize,
+    "notifications/initialized": handle_initialized,
+    "ping": handle_ping,
+    "resources/list": handle_resources_list,
+    "resources/read": handle_resources_read,
+    "tools/list": handle_tools_list,
+    "tools/call": handle_tools_call,
+    "prompts/list": handle_prompts_list,
+    "prompts/get": handle_prompts_get,
+}
+
+# -------------------------------------------------------------------------------------
+# 4. Dispatcher
+# -------------------------------------------------------------------------------------
+def dispatch(request, session):
+    """Runs the handler for one request and returns the response dict (None for notifications)."""
+    method = request.get("method")
+    is_notification = "id" not in request
+    handler = HANDLERS.get(method)
+
+    if handler is None:
+        print(f"Unknown method: {method}", file=sys.stderr)
+        if is_notification:
+            return None
+        return {
+            "jsonrpc": "2.0", "id": request["id"],
+            "error": { "code": -32601, "message": f"Method not found: {method}" }
+        }
+
+    try:
+        result = handler(request.get("params") or {}, session)
+    except JsonRpcError as e:
+        if is_notification:
+            return None
+        return { "jsonrpc": "2.0", "id": request["id"], "error": { "code": e.code, "message": e.message } }
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if is_notification:
+            return None
+        return { "jsonrpc": "2.0", "id": request["id"], "error": { "code": -32603, "message": str(e) } }
+
+    if is_notification:
+        return None
+    return { "jsonrpc": "2.0", "id": request["id"], "result": result }
+
+# -------------------------------------------------------------------------------------
+# 5. Concurrent Execution
+# -------------------------------------------------------------------------------------
+class StreamedFrame:
+    """A frame written in pieces, for payloads that should never exist as one string."""
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+# Per-process marker for values spliced in after serialization (Base64Blob / PreEncoded)
+_PLACEHOLDER = uuid.uuid4().hex
+
+def encode_frame(message):
+    """
+    Serializes a message to one newline-terminated bytes frame.
+    PreEncoded results are spliced in as-is; Base64Blob fields turn the frame into a StreamedFrame.
+    """
+    # Fast path for the common case: a single response with a pre-serialized result
+    if type(message) is dict and type(message.get("result")) is PreEncoded and len(message) == 3:
+        return b'{"jsonrpc":"2.0","id":' + json_dumps(message["id"]) + b',"result":' + message["result"].json_bytes + b'}\n'
+
+    blobs = []
+    pre_encoded = []
+    # id(obj) -> placeholder. json_dumps may serialize the message twice (orjson rejects an
+    # integer wider than 64 bits, then stdlib json retries); the retry must get the same
+    # placeholders instead of recording every object a second time under new indices
+    placeholders = {}
+
+    def default(obj):
+        placeholder = placeholders.get(id(obj))
+        if placeholder is not None:
+            return placeholder
+        if isinstance(obj, Base64Blob):
+            blobs.append(obj)
+            placeholder = f"{_PLACEHOLDER}-b{len(blobs) - 1}"
+        elif isinstance(obj, PreEncoded):
+            pre_encoded.append(obj)
+            placeholder = f"{_PLACEHOLDER}-p{len(pre_encoded) - 1}"
+        else:
+            raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+        placeholders[id(obj)] = placeholder
+        return placeholder
+
+    frame = json_dumps(message, default=default) + b"\n"
+    for index, value in enumerate(pre_encoded):
+        frame = frame.replace(f'"{_PLACEHOLDER}-p{index}"'.encode("ascii"), value.json_bytes, 1)
+    if not blobs:
+        return frame
+
+    def pieces():
+        rest = frame
+        for index, blob in enumerate(blobs):
+            before, rest = rest.split(f'"{_PLACEHOLDER}-b{index}"'.encode("ascii"), 1)
+            yield before + b'"'
+            yield from blob.iter_base64()
+            yield b'"'
+        yield rest
+    return StreamedFrame(pieces())
+
+class StdioTransport:
+    """Newline-delimited frames over binary stdin/stdout, with no text layer."""
+    def __init__(self, rfile=None, wfile=None):
+        # Own buffers on the raw descriptors: sys.stdout.buffer is unbuffered under python -u /
+        # PYTHONUNBUFFERED, which would turn every frame back into its own write syscall
+        self.rfile = rfile or open(sys.stdin.fileno(), "rb", buffering=STDIO_BUFFER_BYTES, closefd=False)
+        self.wfile = wfile or open(sys.stdout.fileno(), "wb", buffering=STDIO_BUFFER_BYTES, closefd=False)
+
+    def read_lines(self):
+        for line in self.rfile:
+            # The decoders accept the trailing newline, so the line is not copied by strip()
+            if not line.isspace():
+                yield line
+
+    def write(self, data):
+        # Lands in the BufferedWriter; nothing reaches the pipe until it fills or flush() runs
+        self.wfile.write(data)
+
+    def flush(self):
+        self.wfile.flush()
+
+class ResponseWriter:
+    """Owns the output stream. Handlers finish in any order; this single thread keeps frames from interleaving."""
+    def __init__(self, transport, flush_policy=None, backlog=None, max_frames=WRITE_QUEUE_FRAMES,
+                 notification_bytes=None, stall_timeout=None):
+        self._transport = transport
+        self._flush_always = (flush_policy or FLUSH_POLICY) == "always"
+        # Number of requests read but not yet started; their responses are about to follow
+        self._backlog = backlog or (lambda: 0)
+        # Bounded, so a handler streaming chunks faster than the client reads them
+        # blocks instead of piling the whole file up in memory (0: never blocks, the
+        # caller watches queued() and stops feeding requests instead)
+        self._queue = queue.Queue(maxsize=max_frames)
+        # With notification_bytes, queued bytes are counted and a notification waits (up to
+        # stall_timeout) until they fit; responses are never held back
+        self._notification_bytes = notification_bytes
+        self._stall_timeout = stall_timeout
+        self._queued_bytes = 0
+        self._room = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def send(self, response):
+        # A socket client may disconnect while its requests are still running
+        if self._closed:
+            return
+        # Serialize on the caller's thread; the writer only copies bytes to the pipe
+        frame = encode_frame(response)
+        if self._notification_bytes is not None and isinstance(frame, bytes):
+            self._reserve(len(frame), wait=isinstance(response, dict) and "id" not in response)
+        self._queue.put(frame)
+
+    def delivers(self, progress_token):
+        """Every notification reaches a stdio or socket client."""
+        return True
+
+    def _reserve(self, size, wait):
+        with self._room:
+            if wait and not self._room.wait_for(
+                lambda: self._closed or self._queued_bytes == 0 or self._queued_bytes + size <= self._notification_bytes,
+                timeout=self._stall_timeout
+            ):
+                raise JsonRpcError(-32000, "Client is not reading its output; stream aborted")
+            self._queued_bytes += size
+
+    def _release(self, size):
+        with self._room:
+            self._queued_bytes -= size
+            self._room.notify_all()
+
+    def queued(self):
+        """Frames waiting to be written."""
+        return self._queue.qsize()
+
+    def close(self):
+        self._closed = True
+        with self._room:
+            self._room.notify_all()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _flush(self):
+        try:
+            self._transport.flush()
+        except Exception as e:
+            print(f"Error writing response: {e}", file=sys.stderr)
+
+    def _write_loop(self):
+        unflushed = False
+        while True:
+            try:
+                # With bytes sitting in the buffer, wait only briefly: a pending request may
+                # turn out to be a notification that never produces a frame
+                frame = self._queue.get(timeout=FLUSH_DELAY_SECONDS) if unflushed else self._queue.get()
+            except queue.Empty:
+                self._flush()
+                unflushed = False
+                continue
+            if frame is None:
+                self._flush()
+                break
+            try:
+                if isinstance(frame, StreamedFrame):
+                    for piece in frame.pieces:
+                        self._transport.write(piece)
+                else:
+                    self._transport.write(frame)
+            except Exception as e:
+                print(f"Error writing response: {e}", file=sys.stderr)
+            if self._notification_bytes is not None and isinstance(frame, bytes):
+                self._release(len(frame))
+            # Flush once the input is drained: a burst of responses goes out in a few large
+            # writes, while a lone response is still flushed immediately
+            if self._flush_always or (self._queue.empty() and self._backlog() == 0):
+                self._flush()
+                unflushed = False
+            else:
+                unflushed = True
+
+class Session:
+    """Per-client state handed to every handler: one over stdio, one per socket connection."""
+    def __init__(self, writer):
+        self.writer = writer  # ResponseWriter, or HttpNotificationRouter for HTTP sessions
+        self.pending = 0  # requests submitted by this client whose handler has not started
+        # Recorded for handlers that care; requests are not refused before initialize
+        self.client_info = None
+        self.protocol_version = None
+        self.initialized = False
+
+    def reply(self, response):
+        if response is not None:
+            self.writer.send(response)
+
+    def notify(self, method, params):
+        # Goes through the same writer as responses, so it is written before the handler's result
+        self.writer.send({ "jsonrpc": "2.0", "method": method, "params": params })
+
+    def delivers(self, progress_token):
+        """Whether progress notifications for this token reach the client."""
+        return self.writer.delivers(progress_token)
+
+class RequestScheduler:
+    """
+    Runs handlers on a bounded worker pool and enforces METHOD_CONCURRENCY. One worker is
+    always kept for uncapped methods: each cap, and all capped requests together, are
+    limited to max_workers - 1 (the pool has at least two workers).
+    """
+    def __init__(self, max_workers, method_limits):
+        max_workers = max(2, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-worker")
+        self._capped_limit = max_workers - 1
+        self._limits = {method: max(1, min(limit, self._capped_limit)) for method, limit in method_limits.items()}
+        self._lock = threading.Lock()
+        self._running = {}  # method -> number of requests currently executing
+        self._capped_running = 0  # capped requests executing, all methods together
+        self._waiting = {}  # method -> deque of (request, session, callback) over the cap
+
+    def submit(self, request, session, callback):
+        method = request.get("method")
+        with self._lock:
+            session.pending += 1
+        if method in self._limits:
+            with self._lock:
+                if self._running.get(method, 0) >= self._limits[method] or self._capped_running >= self._capped_limit:
+                    self._waiting.setdefault(method, deque()).append((request, session, callback))
+                    return
+                self._running[method] = self._running.get(method, 0) + 1
+                self._capped_running += 1
+        self._executor.submit(self._run, method, request, session, callback)
+
+    def _run(self, method, request, session, callback):
+        while True:
+            with self._lock:
+                session.pending -= 1
+            try:
+                callback(dispatch(request, session))
             except Exception as e:
                 print(f"Error: {e}", file=sys.stderr)
-                
+
+            if method not in self._limits:
+                return
+            # Hand the slot straight to the next queued capped request, same method first
+            with self._lock:
+                self._running[method] -= 1
+                self._capped_running -= 1
+                queued = self._next_waiting(method)
+                if queued is None:
+                    return
+                method, request, session, callback = queued
+
+    def _next_waiting(self, preferred):
+        """Takes the next queued request whose method is under its cap (called with the lock held)."""
+        for method in [preferred, *self._waiting]:
+            waiting = self._waiting.get(method)
+            if waiting and self._running.get(method, 0) < self._limits[method]:
+                self._running[method] = self._running.get(method, 0) + 1
+                self._capped_running += 1
+                return (method, *waiting.popleft())
+        return None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+class BatchCollector:
+    """Gathers the responses of one JSON-RPC batch and replies with a single array frame."""
+    def __init__(self, size, reply):
+        self._responses = [None] * size
+        self._remaining = size
+        self._lock = threading.Lock()
+        self._reply = reply
+
+    def callback(self, index):
+        def done(response):
+            with self._lock:
+                self._responses[index] = response
+                self._remaining -= 1
+                finished = self._remaining == 0
+            if finished:
+                # Notifications have no response; a batch of only notifications gets no reply at all
+                responses = [r for r in self._responses if r is not None]
+                if responses:
+                    self._reply(responses)
+        return done
+
+def invalid_request_response(request_id=None):
+    return { "jsonrpc": "2.0", "id": request_id, "error": { "code": -32600, "message": "Invalid Request" } }
+
+def submit_message(scheduler, message, session, reply):
+    """Schedules a single request or a batch array read from one line."""
+    if isinstance(message, dict):
+        scheduler.submit(message, session, reply)
+    elif isinstance(message, list) and message:
+        batch = BatchCollector(len(message), reply)
+        for index, request in enumerate(message):
+            if isinstance(request, dict):
+                scheduler.submit(request, session, batch.callback(index))
+            else:
+                batch.callback(index)(invalid_request_response())
+    else:
+        reply(invalid_request_response())
+
+def submit_line(scheduler, line, session):
+    """Decodes one request line and schedules it; responses go back through the session."""
+    try:
+        message = json_loads(line)
+    except JSON_DECODE_ERRORS:
+        print("Error: Invalid JSON", file=sys.stderr)
+        return
+    submit_message(scheduler, message, session, session.reply)
+
+# -------------------------------------------------------------------------------------
+# 6. Socket Transport
+# One long-lived server, many clients: the asyncio loop accepts connections and reads
+# request lines, handlers still run on the shared RequestScheduler pool.
+
+def parse_listen_address(address):
+    """'unix:/path/to.sock' -> ("unix", path), 'tcp:host:port' / 'http:host:port' -> (kind, (host, port))."""
+    kind, _, target = address.partition(":")
+    if kind == "unix" and target:
+        return "unix", target
+    if kind in ("tcp", "http"):
+        host, _, port = target.rpartition(":")
+        if host and port.isdigit():
+            return kind, (host.strip("[]"), int(port))
+    raise ValueError(f"Invalid listen address: {address!r} (expected unix:/path, tcp:host:port or http:host:port)")
+
+class SocketTransport:
+    """Gives a connection's ResponseWriter thread the same write()/flush() as StdioTransport.
+
+    The event loop owns the socket: flush() hands the buffered frames to the loop and waits
+    until they are drained, so a slow reader blocks its own writer thread, not the server.
+    While that thread is stuck, handle_connection stops reading the client's requests.
+    """
+    def __init__(self, loop, stream_writer):
+        self._loop = loop
+        self._stream = stream_writer
+        self._buffer = []
+        self._buffered_bytes = 0
+
+    def write(self, data):
+        self._buffer.append(data)
+        self._buffered_bytes += len(data)
+        if self._buffered_bytes >= STDIO_BUFFER_BYTES:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        self._buffer = []
+        self._buffered_bytes = 0
+        asyncio.run_coroutine_threadsafe(self._send(data), self._loop).result()
+
+    async def _send(self, data):
+        self._stream.write(data)
+        await self._stream.drain()
+
+def connection_backlogged(session, writer):
+    """True while a client is not keeping up: its output queue is full or too many of its requests wait for a worker."""
+    return writer.queued() >= WRITE_QUEUE_FRAMES or session.pending >= SOCKET_PENDING_REQUESTS
+
+async def handle_connection(scheduler, reader, stream_writer):
+    loop = asyncio.get_running_loop()
+    # Workers are shared by every connection, so a response never blocks on this client's queue;
+    # backpressure is applied here by not reading its next request while it is backlogged.
+    # Only a streaming handler waits for the client, and gives up after SOCKET_STALL_TIMEOUT_SECONDS.
+    writer = ResponseWriter(
+        SocketTransport(loop, stream_writer), backlog=lambda: session.pending, max_frames=0,
+        notification_bytes=SOCKET_STREAM_BUFFER_BYTES, stall_timeout=SOCKET_STALL_TIMEOUT_SECONDS
+    )
+    session = Session(writer)
+    try:
+        while True:
+            while connection_backlogged(session, writer):
+                await asyncio.sleep(SOCKET_BACKPRESSURE_POLL_SECONDS)
+            try:
+                line = await reader.readline()
+            except (ConnectionError, ValueError) as e:
+                # ValueError: a line over SOCKET_LINE_LIMIT; the stream cannot be resynchronised
+                print(f"Closing connection: {e}", file=sys.stderr)
+                break
+            if not line:
+                break
+            if not line.isspace():
+                submit_line(scheduler, line, session)
+    finally:
+        # close() joins the writer thread, whose flushes need this loop: wait off-loop
+        await loop.run_in_executor(None, writer.close)
+        stream_writer.close()
+
+async def serve(address, scheduler):
+    kind, target = parse_listen_address(address)
+    on_connect = functools.partial(handle_connection, scheduler)
+    if kind == "unix":
+        # A socket file left behind by a previous run would make bind() fail
+        if os.path.exists(target) and stat.S_ISSOCK(os.stat(target).st_mode):
+            os.unlink(target)
+        server = await asyncio.start_unix_server(on_connect, path=target, limit=SOCKET_LINE_LIMIT)
+    else:
+        host, port = target
+        server = await asyncio.start_server(on_connect, host, port, limit=SOCKET_LINE_LIMIT)
+    for sock in server.sockets:
+        name = sock.getsockname()
+        # Port 0 binds an ephemeral port: report the real one
+        listening = f"unix:{name}" if kind == "unix" else f"tcp:{name[0]}:{name[1]}"
+        print(f"Listening on {listening}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if kind == "unix" and os.path.exists(target):
+            os.unlink(target)
+
+# -------------------------------------------------------------------------------------
+# 7. Streamable HTTP Transport
+# POST a JSON-RPC message to HTTP_ENDPOINT; the reply is one JSON body, or an SSE stream when
+# the handler sends progress notifications first. Sessions are tracked with Mcp-Session-Id.
+
+class HttpNotificationRouter:
+    """Session writer for HTTP: sends each progress notification to the POST that asked for it."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}  # progressToken -> queue of the waiting POST
+
+    def register(self, tokens, messages):
+        with self._lock:
+            for token in tokens:
+                self._routes[token] = messages
+
+    def unregister(self, tokens):
+        with self._lock:
+            for token in tokens:
+                self._routes.pop(token, None)
+
+    def delivers(self, progress_token):
+        """Only a POST that accepts text/event-stream registers its tokens."""
+        with self._lock:
+            return progress_token in self._routes
+
+    def send(self, message):
+        token = message.get("params", {}).get("progressToken")
+        messages = self._routes.get(token)
+        # Without a POST to carry it (no token, or the client gave up), the notification is dropped
+        if messages is not None:
+            messages.put(message)
+
+class HttpSessions:
+    """Mcp-Session-Id -> Session, expiring sessions unused for HTTP_SESSION_TTL_SECONDS."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}  # id -> (session, last used)
+
+    def create(self):
+        session_id = uuid.uuid4().hex
+        session = Session(HttpNotificationRouter())
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (_, used) in self._sessions.items() if now - used > HTTP_SESSION_TTL_SECONDS]
+            for k in expired:
+                del self._sessions[k]
+            self._sessions[session_id] = (session, now)
+        return session_id, session
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or time.monotonic() - entry[1] > HTTP_SESSION_TTL_SECONDS:
+                self._sessions.pop(session_id, None)
+                return None
+            self._sessions[session_id] = (entry[0], time.monotonic())
+            return entry[0]
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+def progress_tokens(message):
+    requests = message if isinstance(message, list) else [message]
+    return [
+        r["params"]["_meta"]["progressToken"] for r in requests
+        if isinstance(r, dict) and isinstance(r.get("params"), dict)
+        and isinstance(r["params"].get("_meta"), dict) and "progressToken" in r["params"]["_meta"]
+    ]
+
+def is_initialize(message):
+    requests = message if isinstance(message, list) else [message]
+    return any(isinstance(r, dict) and r.get("method") == "initialize" for r in requests)
+
+class McpHttpHandler(http.server.BaseHTTPRequestHandler):
+    # HTTP/1.1: connections stay open between requests (every reply has a length or is chunked)
+    protocol_version = "HTTP/1.1"
+    # Headers and body leave in one send() (handle_one_request flushes after each reply),
+    # and without Nagle a small reply is not held back waiting for the client's ACK
+    wbufsize = STDIO_BUFFER_BYTES
+    disable_nagle_algorithm = True
+    scheduler = None
+    sessions = None
+    allowed_hosts = frozenset(HTTP_LOOPBACK_HOSTS)
+    port = None
+
+    def log_message(self, format, *args):
+        # One stderr line per request would dominate the cost of a ping
+        pass
+
+    def send_json(self, status, body, session_id=None):
+        payload = json_dumps(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if session_id:
+            self.send_header("Mcp-Session-Id", session_id)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_empty(self, status, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def write_chunk(self, data):
+        if data:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def content_length(self):
+        """The body size, or None after rejecting a missing, malformed or oversized Content-Length."""
+        value = self.headers.get("Content-Length", "").strip()
+        # Plain digits only: int() would also take "-1", "+5" or "1_000"
+        length = int(value) if value.isascii() and value.isdigit() else -1
+        if 0 <= length <= HTTP_MAX_BODY_BYTES:
+            return length
+        # The body is left unread, so the connection cannot carry another request
+        self.close_connection = True
+        self.send_empty(400 if length < 0 else 413, [("Connection", "close")])
+        return None
+
+    def check_request(self):
+        """
+        Rejects other paths and cross-site browser requests (DNS rebinding); True if it may proceed.
+        Host and Origin are both checked against the fixed allowed_hosts, never against each
+        other: a rebound name sends a matching Host and Origin of its own.
+        """
+        if urllib.parse.urlsplit(self.path).path != HTTP_ENDPOINT:
+            self.send_empty(404)
+            return False
+        try:
+            host = urllib.parse.urlsplit(f"//{self.headers.get('Host', '')}")
+            host_ok = host.hostname in self.allowed_hosts and host.port in (None, self.port)
+            origin = self.headers.get("Origin")
+            origin_ok = not origin or urllib.parse.urlsplit(origin).hostname in self.allowed_hosts
+        except ValueError:  # a malformed port
+            host_ok = origin_ok = False
+        if not (host_ok and origin_ok):
+            self.send_empty(403)
+            return False
+        return True
+
+    def do_GET(self):
+        # No server-initiated stream: every message answers a POST
+        if self.check_request():
+            self.send_empty(405, [("Allow", "POST, DELETE")])
+
+    def do_DELETE(self):
+        if not self.check_request():
+            return
+        session_id = self.headers.get("Mcp-Session-Id")
+        if not session_id:
+            self.send_empty(400)
+        else:
+            self.send_empty(200 if self.sessions.delete(session_id) else 404)
+
+    def do_POST(self):
+        if not self.check_request():
+            return
+        length = self.content_length()
+        if length is None:
+            return
+        try:
+            message = json_loads(self.rfile.read(length))
+        except JSON_DECODE_ERRORS:
+            self.send_json(400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            return
+        if not isinstance(message, (dict, list)) or not message:
+            self.send_json(400, invalid_request_response())
+            return
+
+        if is_initialize(message):
+            session_id, session = self.sessions.create()
+        else:
+            session_id = self.headers.get("Mcp-Session-Id")
+            if not session_id:
+                self.send_json(400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Missing Mcp-Session-Id header"}})
+                return
+            session = self.sessions.get(session_id)
+            if session is None:
+                # The client must start over with initialize
+                self.send_empty(404)
+                return
+
+        requests = message if isinstance(message, list) else [message]
+        if not any(isinstance(r, dict) and "id" in r for r in requests):
+            # Only notifications (or responses): nothing to wait for
+            submit_message(self.scheduler, message, session, lambda response: None)
+            self.send_empty(202, [("Mcp-Session-Id", session_id)])
+            return
+
+        messages = queue.SimpleQueue()
+        # Without SSE there is nothing to carry notifications: they are dropped, and a streamed read refused
+        accepts_sse = "text/event-stream" in self.headers.get("Accept", "")
+        tokens = progress_tokens(message) if accepts_sse else []
+        router = session.writer
+        router.register(tokens, messages)
+        try:
+            submit_message(self.scheduler, message, session, messages.put)
+            self.stream_reply(messages, session_id)
+        finally:
+            router.unregister(tokens)
+
+    def stream_reply(self, messages, session_id):
+        """Answers with JSON if the response comes first, or upgrades to SSE on the first notification."""
+        streaming = False
+        while True:
+            item = messages.get()
+            is_notification = isinstance(item, dict) and "id" not in item
+            if not streaming and not is_notification:
+                self.send_frame(item, session_id)
+                return
+            if not streaming:
+                streaming = True
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.send_header("Mcp-Session-Id", session_id)
+                self.end_headers()
+            # encode_frame's trailing newline ends the data line, the extra one ends the event
+            self.write_chunk(b"event: message\ndata: ")
+            frame = encode_frame(item)
+            for piece in (frame.pieces if isinstance(frame, StreamedFrame) else (frame,)):
+                self.write_chunk(piece)
+            self.write_chunk(b"\n")
+            if not is_notification:
+                self.wfile.write(b"0\r\n\r\n")
+                return
+            # Each event reaches the client as soon as it is produced
+            self.wfile.flush()
+
+    def send_frame(self, response, session_id):
+        frame = encode_frame(response)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Mcp-Session-Id", session_id)
+        if isinstance(frame, StreamedFrame):
+            # Base64 blobs are encoded while sending; the length is not known up front
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for piece in frame.pieces:
+                self.write_chunk(piece)
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(frame)))
+            self.end_headers()
+            self.wfile.write(frame)
+
+class McpHttpServer(http.server.ThreadingHTTPServer):
+    # socketserver's default listen backlog of 5 resets connections when many agents connect at once
+    request_queue_size = 128
+    daemon_threads = True
+
+def serve_http(target, scheduler):
+    host, port = target
+    handler = type("BoundMcpHttpHandler", (McpHttpHandler,), {"scheduler": scheduler, "sessions": HttpSessions()})
+    server = McpHttpServer((host, port), handler)
+    name = server.server_address
+    # A wildcard bind has no name of its own: only loopback and the configured extra names are accepted
+    bound = () if host in ("", "0.0.0.0", "::") else (host.lower(),)
+    handler.allowed_hosts = frozenset(HTTP_LOOPBACK_HOSTS + bound + HTTP_EXTRA_ALLOWED_HOSTS)
+    handler.port = name[1]
+    print(f"Listening on http:{name[0]}:{name[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Step 6-1 MCP server (stdio by default)")
+    parser.add_argument("--listen", metavar="ADDRESS",
+                        help="serve many clients on unix:/path/to.sock, tcp:host:port or "
+                             "http:host:port (Streamable HTTP) instead of stdio")
+    args = parser.parse_args()
+
+    refresh_static_results()
+    scheduler = RequestScheduler(MAX_WORKERS, METHOD_CONCURRENCY)
+
+    if args.listen:
+        try:
+            kind, target = parse_listen_address(args.listen)
+            if kind == "http":
+                serve_http(target, scheduler)
+            else:
+                asyncio.run(serve(args.listen, scheduler))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.shutdown()
+        return
+
+    transport = StdioTransport()
+    writer = ResponseWriter(transport, backlog=lambda: session.pending)
+    session = Session(writer)
+
+    try:
+        for line in transport.read_lines():
+            submit_line(scheduler, line, session)
+
     except KeyboardInterrupt:
         pass
+    finally:
+        # Let in-flight handlers finish and their responses reach stdout before exiting
+        scheduler.shutdown()
+        writer.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,113 @@
+import os
+import json
+import importlib.util
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '../src')
+APP = "6-1-app_oci.py"
+
+def load_app(app):
+    spec = importlib.util.spec_from_file_location(f"app_{app[:3]}", os.path.join(SRC_DIR, app))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def history_tokens(app, history):
+    return app.estimate_tokens(history.system_note()) + sum(app.estimate_tokens(text) for _, text in history.messages())
+
+def test_bounded_history():
+    print("--- Testing Bounded Conversation History ---")
+    app = load_app(APP)
+    history = app.ConversationHistory(max_turns=4, summary_tokens=100, summary_batch=2)
+    sizes = []
+    refs = []
+    for turn in range(300):
+        result = json.dumps({"content": [{"type": "text", "text": f"result {turn} " + "x" * 2000}]})
+        tool_refs = [history.store_result("lookup", result)] if turn % 2 else []
+        refs += tool_refs
+        history.add_turn(f"question {turn} " + "please " * 50, f"answer {turn}", tool_refs)
+        sizes.append(history_tokens(app, history))
+
+    messages = history.messages()
+    first_ref = refs[-1].split("]")[0][1:]
+    summarized = []
+    folding = app.ConversationHistory(max_turns=2, summary_batch=2, summarize=lambda summary, lines: summarized.append(lines) or f"{len(summarized)} folds")
+    for turn in range(6):
+        folding.add_turn(f"q{turn}", f"a{turn}")
+    failing = app.ConversationHistory(max_turns=1, summary_batch=1, summarize=lambda summary, lines: 1 / 0)
+    failing.add_turn("q0", "a0")
+    failing.add_turn("q1", "a1")
+
+    checks = [
+        ("prompt size stops growing", max(sizes[100:]) <= max(sizes[:20]) * 1.5 and max(sizes) < 2000),
+        ("recent turns kept verbatim", messages[-2] == ("USER", f"question 299 {'please ' * 49}please")
+         and messages[-1][1].startswith("Tool results: [r")),
+        ("at most max_turns + batch turns sent", len(messages) <= 2 * (4 + 2 - 1)),
+        ("older turns in the summary", "question 29" in history.summary and app.estimate_tokens(history.summary) <= 100),
+        ("tool results referenced, not pasted", len(refs[-1]) < 200 and "x" * 200 not in messages[-1][1]),
+        ("full result kept under its reference", history.result(first_ref).startswith('{"content"')),
+        ("old results dropped", history.result("r1") is None),
+        ("summarize called per batch", [len(lines) for lines in summarized] == [2, 2] and folding.summary == "2 folds"),
+        ("failed summary falls back to compact lines", failing.summary == "- User: q0 | Agent: a0"),
+    ]
+    all_passed = True
+    for name, ok in checks:
+        if ok:
+            print(f"✅ {name} (Correct)")
+        else:
+            print(f"❌ {name} failed")
+            all_passed = False
+
+    assert all_passed
+
+def test_recall_tool_result():
+    print("--- Testing Recall of Stored Tool Results ---")
+    app = load_app(APP)
+    history = app.ConversationHistory(max_turns=2)
+    full = json.dumps({"content": [{"type": "text", "text": "row " * 500}]})
+    line = history.store_result("query_db", full)
+    history.add_turn("look it up", "done", [line])
+    ref = line.split("]")[0][1:]
+
+    # mcp_client=None: a local tool must never reach the MCP server
+    with app.ToolDispatcher(None, local_tools={app.RECALL_TOOL_NAME: history.recall}) as dispatcher:
+        recalled, missing = dispatcher.gather([(app.RECALL_TOOL_NAME, {"ref": ref}), (app.RECALL_TOOL_NAME, {"ref": "r999"})])
+
+    checks = [
+        ("system note explains how to recall", app.RECALL_TOOL_NAME in history.system_note() and "[r<n>]" in history.system_note()),
+        ("full result returned for a reference", recalled == {"content": [{"type": "text", "text": full}]}),
+        ("unknown reference reported as a tool error", missing.get("isError") is True),
+    ]
+    all_passed = True
+    for name, ok in checks:
+        if ok:
+            print(f"✅ {name} (Correct)")
+        else:
+            print(f"❌ {name} failed")
+            all_passed = False
+
+    assert all_passed
+
+def test_trim_summary():
+    print("--- Testing Summary Trimming ---")
+    app = load_app(APP)
+    checks = [
+        ("zero budget gives an empty summary", app.trim_summary("abc", 0) == ""),
+        ("negative budget gives an empty summary", app.trim_summary("line one\nline two", -5) == ""),
+        ("short non-ASCII summary trimmed to fit", app.trim_summary("あいう", 1) == "う"),
+        ("oldest lines dropped first", app.trim_summary("old line here\nnew", 1) == "new"),
+        ("summary within budget unchanged", app.trim_summary("short", 10) == "short"),
+    ]
+    all_passed = True
+    for name, ok in checks:
+        if ok:
+            print(f"✅ {name} (Correct)")
+        else:
+            print(f"❌ {name} failed")
+            all_passed = False
+
+    assert all_passed
+
+if __name__ == "__main__":
+    test_bounded_history()
+    test_recall_tool_result()
+    test_trim_summary()
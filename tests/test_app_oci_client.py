@@ -0,0 +1,453 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import http.server
+import importlib.util
+from types import SimpleNamespace
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '../src')
+APPS = ["5-2-app_oci.py", "6-1-app_oci.py"]
+
+def load_app(app):
+    spec = importlib.util.spec_from_file_location(f"app_{app[:3]}", os.path.join(SRC_DIR, app))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def fake_oci(calls, working):
+    """Stands in for the oci package: every auth probe except `working` raises."""
+    def probe(name, value):
+        def run(*args):
+            calls.append(name)
+            if name != working:
+                raise RuntimeError(f"{name} unavailable")
+            return value
+        return run
+    return SimpleNamespace(
+        auth=SimpleNamespace(signers=SimpleNamespace(
+            get_resource_principals_signer=probe("resource_principal", "rp-signer"),
+            InstancePrincipalsSecurityTokenSigner=probe("instance_principal", "ip-signer"),
+        )),
+        config=SimpleNamespace(from_file=probe("config_file", {"region": "test"})),
+    )
+
+def test_auth_method_cache():
+    print("--- Testing Cached OCI Auth Method ---")
+    all_passed = True
+    for app_name in APPS:
+        app = load_app(app_name)
+        with tempfile.TemporaryDirectory() as tmp:
+            app.AUTH_CACHE_PATH = os.path.join(tmp, "oci_auth.json")
+            make_client = lambda config, signer: (config, signer)
+
+            calls = []
+            first = app.resolve_auth(fake_oci(calls, "instance_principal"), make_client)
+            first_calls = list(calls)
+
+            calls.clear()
+            second = app.resolve_auth(fake_oci(calls, "instance_principal"), make_client)
+            second_calls = list(calls)
+
+            with open(app.AUTH_CACHE_PATH) as f:
+                stored = json.load(f)
+
+            # Expired entry: back to the full fallback order
+            stored["expires_at"] = 0
+            with open(app.AUTH_CACHE_PATH, "w") as f:
+                json.dump(stored, f)
+            calls.clear()
+            app.resolve_auth(fake_oci(calls, "instance_principal"), make_client)
+            expired_calls = list(calls)
+
+            # Cached method stops working: fall back and remember the new one
+            calls.clear()
+            fallback = app.resolve_auth(fake_oci(calls, "config_file"), make_client)
+            with open(app.AUTH_CACHE_PATH) as f:
+                fallback_stored = json.load(f)
+
+        checks = [
+            ("first run probes in order", first == ("instance_principal", ({}, "ip-signer"))
+             and first_calls == ["resource_principal", "config_file", "instance_principal"]),
+            ("second run skips failing probes", second == first and second_calls == ["instance_principal"]),
+            ("only the method name is stored", set(stored) == {"method", "expires_at"}),
+            ("expired cache probes again", expired_calls == ["resource_principal", "config_file", "instance_principal"]),
+            ("stale cache falls back", fallback[0] == "config_file" and fallback_stored["method"] == "config_file"),
+        ]
+        for name, ok in checks:
+            if ok:
+                print(f"✅ {app_name}: {name} (Correct)")
+            else:
+                print(f"❌ {app_name}: {name} failed")
+                all_passed = False
+
+    assert all_passed
+
+def test_decision_cache():
+    print("--- Testing Cached Chat Decisions ---")
+    all_passed = True
+    for app_name in APPS:
+        app = load_app(app_name)
+        key = app.DecisionCache.key
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "decisions.db")
+            # Plain strings stand in for AgentDecision, so no pydantic is needed
+            make_cache = lambda **kwargs: app.DecisionCache(
+                2, 60, db_path=db_path, max_rows=3, encode=json.dumps, decode=json.loads, **kwargs
+            )
+
+            memory_only = app.DecisionCache(2, 60)
+            for name in ("a", "b", "c"):
+                memory_only.put(key(name), name)
+            lru = [memory_only.get(key(name)) for name in ("a", "b", "c")]
+
+            short_lived = app.DecisionCache(2, 0.05)
+            short_lived.put(key("a"), "a")
+            fresh = short_lived.get(key("a"))
+            time.sleep(0.1)
+            expired = short_lived.get(key("a"))
+
+            cache = make_cache()
+            for name in ("a", "b", "c", "d"):
+                cache.put(key(name), name)
+            # A new process: nothing in memory, everything but the oldest row on disk
+            reopened = make_cache()
+            persisted = [reopened.get(key(name)) for name in ("a", "b", "c", "d")]
+
+        checks = [
+            ("key covers every part", key("m", "sys", "hi") == key("m", "sys", "hi") != key("m", "sys", "hello")),
+            ("memory LRU evicts the oldest", lru == [None, "b", "c"]),
+            ("entries expire after the TTL", fresh == "a" and expired is None),
+            ("SQLite store survives a restart", persisted[1:] == ["b", "c", "d"]),
+            ("SQLite store keeps max_rows", persisted[0] is None),
+            ("hits and misses counted", (reopened.hits, reopened.misses) == (3, 1)),
+        ]
+        for name, ok in checks:
+            if ok:
+                print(f"✅ {app_name}: {name} (Correct)")
+            else:
+                print(f"❌ {app_name}: {name} failed")
+                all_passed = False
+
+    assert all_passed
+
+class SlowToolClient:
+    """Answers tools/call after a fixed delay and tracks how many calls overlap."""
+    def __init__(self, delay):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+        self.names = []
+
+    def send_request(self, method, params):
+        with self.lock:
+            self.names.append(params["name"])
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if params["name"] == "broken":
+                raise Exception("MCP Error: tool failed")
+            return {"content": [{"type": "text", "text": params["name"]}]}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+def test_parallel_tool_calls():
+    print("--- Testing Parallel Tool Calls ---")
+    all_passed = True
+    for app_name in APPS:
+        app = load_app(app_name)
+        single = SimpleNamespace(use_tool=True, tool_calls=None, tool_name="add_numbers", tool_args={"a": 1})
+        multi = SimpleNamespace(use_tool=True, tool_name=None, tool_args=None, tool_calls=[
+            SimpleNamespace(tool_name="a", tool_args={}), SimpleNamespace(tool_name="b", tool_args=None)
+        ])
+        no_tool = SimpleNamespace(use_tool=False, tool_calls=None, tool_name=None, tool_args=None)
+
+        client = SlowToolClient(0.1)
+        calls = [(f"tool_{i}", {}) for i in range(5)] + [("broken", {})]
+        start = time.perf_counter()
+        results = app.run_tool_calls(client, calls)
+        elapsed = time.perf_counter() - start
+
+        limited = SlowToolClient(0.02)
+        app.run_tool_calls(limited, [(f"tool_{i}", {}) for i in range(6)], max_workers=2)
+
+        # A call started early (while streaming) is reused by gather(), not sent again
+        streamed = SlowToolClient(0.01)
+        with app.ToolDispatcher(streamed) as dispatcher:
+            dispatcher.start("b", {"x": 1})
+            gathered = dispatcher.gather([("a", {}), ("b", {"x": 1})])
+
+        checks = [
+            ("single tool_name still accepted", app.decision_tool_calls(single) == [("add_numbers", {"a": 1})]),
+            ("tool_calls list read in order", app.decision_tool_calls(multi) == [("a", {}), ("b", {})]),
+            ("no calls without use_tool", app.decision_tool_calls(no_tool) == []),
+            ("calls overlap", client.max_in_flight == len(calls) and elapsed < 0.3),
+            ("results in call order", [r.get("content", [{}])[0].get("text") for r in results[:5]] == [f"tool_{i}" for i in range(5)]),
+            ("a failing call does not cancel the others", "tool failed" in results[5].get("error", "")),
+            ("max_workers bounds the overlap", limited.max_in_flight == 2),
+            ("started calls reused by gather", sorted(streamed.names) == ["a", "b"]
+             and [r["content"][0]["text"] for r in gathered] == ["a", "b"]),
+        ]
+        for name, ok in checks:
+            if ok:
+                print(f"✅ {app_name}: {name} (Correct)")
+            else:
+                print(f"❌ {app_name}: {name} failed")
+                all_passed = False
+
+    assert all_passed
+
+STREAMED_DECISION = (
+    '```json\n{"use_tool": true, "tool_calls": [{"tool_name": "add_numbers", "tool_args": {"a": 1, "b": 2}}, '
+    '{"tool_name": "echo", "tool_args": {"text": "a, b ] } \\" c"}}], "tool_name": null, "tool_args": null, '
+    '"final_response": null, "thought": "Two independent lookups, {both} needed."}\n```'
+)
+
+def test_streamed_decision_parsing():
+    print("--- Testing Incremental Decision Parsing ---")
+    all_passed = True
+    for app_name in APPS:
+        app = load_app(app_name)
+        # One character at a time, the worst case for a streaming parser
+        seen = []
+        started = []
+        def chunks():
+            for c in STREAMED_DECISION:
+                seen.append(c)
+                yield c
+        text = app.read_streamed_decision(chunks(), lambda name, args: started.append((name, args, len(seen))))
+        thought_start = STREAMED_DECISION.index('"thought"')
+
+        single = '{"use_tool": true, "tool_calls": null, "tool_name": "add_numbers", "tool_args": {"a": 1}, "thought": "x"}'
+        single_started = []
+        app.read_streamed_decision([single[:30], single[30:70], single[70:]], lambda *call: single_started.append(call))
+
+        no_tool = '{"use_tool": false, "tool_calls": [{"tool_name": "echo", "tool_args": {}}], "thought": "x"}'
+        no_tool_started = []
+        app.read_streamed_decision([no_tool], lambda *call: no_tool_started.append(call))
+
+        cohere_events = [SimpleNamespace(data=json.dumps({"apiFormat": "COHERE", "text": part})) for part in ("{\"a\"", ": 1}")]
+        cohere_events.append(SimpleNamespace(data=json.dumps({"apiFormat": "COHERE", "text": "{\"a\": 1}", "finishReason": "COMPLETE"})))
+        generic_events = [
+            SimpleNamespace(data=json.dumps({"index": 0, "message": {"role": "ASSISTANT", "content": [{"type": "TEXT", "text": part}]}}))
+            for part in ("{\"a\"", ": 1}")
+        ] + [SimpleNamespace(data=json.dumps({"index": 0, "finishReason": "stop"}))]
+
+        checks = [
+            ("full text returned", text == STREAMED_DECISION),
+            ("tool calls parsed", [call[:2] for call in started] == [
+                ("add_numbers", {"a": 1, "b": 2}), ("echo", {"text": 'a, b ] } " c'})
+            ]),
+            ("tool calls started before the thought", all(position < thought_start for _, _, position in started)),
+            ("single tool_name / tool_args started", single_started == [("add_numbers", {"a": 1})]),
+            ("nothing started when use_tool is false", no_tool_started == []),
+            ("Cohere events joined", "".join(app.iter_stream_text(cohere_events, cohere=True)) == '{"a": 1}'),
+            ("generic events joined", "".join(app.iter_stream_text(generic_events, cohere=False)) == '{"a": 1}'),
+        ]
+        for name, ok in checks:
+            if ok:
+                print(f"✅ {app_name}: {name} (Correct)")
+            else:
+                print(f"❌ {app_name}: {name} failed")
+                all_passed = False
+
+    assert all_passed
+
+def fake_http_modules():
+    """Minimal requests.adapters / urllib3 stand-ins, enough for timed_http_adapter."""
+    class Pool:
+        ConnectionCls = object
+
+    class HTTPAdapter:
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+
+    urllib3 = SimpleNamespace(connectionpool=SimpleNamespace(HTTPConnectionPool=Pool, HTTPSConnectionPool=Pool))
+    return {"requests.adapters": SimpleNamespace(HTTPAdapter=HTTPAdapter), "urllib3": urllib3}
+
+def test_http_pool_import_fallback():
+    print("--- Testing Connection Pool Import Fallback ---")
+    all_passed = True
+    for app_name in APPS:
+        app = load_app(app_name)
+        for label, available in (("top-level requests / urllib3", fake_http_modules()), ("neither importable", {})):
+            def lazy_import(name):
+                if name not in available:
+                    raise ModuleNotFoundError(f"No module named {name!r}")
+                return available[name]
+            app.lazy_import = lazy_import
+            mounted = {}
+            client = SimpleNamespace(base_client=SimpleNamespace(session=SimpleNamespace(mount=mounted.__setitem__)))
+            try:
+                returned = app.configure_http_pool(client, pool_size=3)
+                ok = returned is client and (
+                    sorted(mounted) == ["http://", "https://"] and mounted["https://"].kwargs["pool_maxsize"] == 3
+                    if available else mounted == {}
+                )
+            except ImportError as e:
+                ok = False
+                print(f"   raised {e!r}")
+            if ok:
+                print(f"✅ {app_name}: {label} handled (Correct)")
+            else:
+                print(f"❌ {app_name}: {label} not handled: {mounted}")
+                all_passed = False
+
+    assert all_passed
+
+class FakeChatHandler(http.server.BaseHTTPRequestHandler):
+    """Answers every POST like the GenAI chat action, with a fixed Cohere-format decision."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        decision = {"thought": "no tool needed", "use_tool": False, "final_response": "hello"}
+        body = json.dumps({
+            "modelId": "cohere.command-r-plus-08-2024",
+            "chatResponse": {"apiFormat": "COHERE", "text": json.dumps(decision)},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def fake_endpoint_signer(oci):
+    """A real signer type, so the SDK's config validation is skipped; the fake endpoints ignore the signature."""
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return oci.auth.signers.SecurityTokenSigner("test-token", private_key)
+
+def test_connection_reuse_with_fake_endpoint():
+    print("--- Testing Pooled OCI Client Against a Fake Endpoint ---")
+    pytest.importorskip("oci")
+    pytest.importorskip("pydantic")
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    all_passed = True
+    try:
+        for app_name in APPS:
+            app = load_app(app_name)
+            oci = app.lazy_import("oci")
+            client = oci.generative_ai_inference.GenerativeAiInferenceClient(
+                {}, signer=fake_endpoint_signer(oci),
+                service_endpoint=f"http://127.0.0.1:{server.server_address[1]}"
+            )
+            app.configure_http_pool(client)
+            app.STREAM_DECISIONS = False  # the fake endpoint answers in one JSON body
+            app.CHAT_METRICS.calls.clear()
+            decisions = [app.call_oci_genai(client, "cohere.command-r-plus-08-2024", "ocid1.compartment.test", "sys", f"hi {i}")
+                         for i in range(3)]
+            repeated = app.call_oci_genai(client, "cohere.command-r-plus-08-2024", "ocid1.compartment.test", "sys", "hi 0")
+            calls = app.CHAT_METRICS.calls
+
+            if all(d.final_response == "hello" for d in decisions):
+                print(f"✅ {app_name}: decisions parsed from the fake endpoint (Correct)")
+            else:
+                print(f"❌ {app_name}: unexpected decisions {decisions}")
+                all_passed = False
+            if repeated is decisions[0] and len(calls) == 3:
+                print(f"✅ {app_name}: repeated request answered from the cache (Correct)")
+            else:
+                print(f"❌ {app_name}: repeated request went to the endpoint")
+                all_passed = False
+            if [c["new_connections"] for c in calls] == [1, 0, 0] and calls[0]["connect_ms"] > 0:
+                print(f"✅ {app_name}: one connection opened, then reused (Correct)")
+            else:
+                print(f"❌ {app_name}: connections not reused: {calls}")
+                all_passed = False
+    finally:
+        server.shutdown()
+
+    assert all_passed
+
+class FakeStreamingChatHandler(http.server.BaseHTTPRequestHandler):
+    """Streams STREAMED_DECISION as Cohere server-sent events, a few characters at a time."""
+    protocol_version = "HTTP/1.1"
+    chunk_chars = 8
+    chunk_delay = 0.01
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i in range(0, len(STREAMED_DECISION), self.chunk_chars):
+            event = json.dumps({"apiFormat": "COHERE", "text": STREAMED_DECISION[i:i + self.chunk_chars]})
+            self.wfile.write(f"data: {event}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.chunk_delay)
+        final = json.dumps({"apiFormat": "COHERE", "text": STREAMED_DECISION, "finishReason": "COMPLETE"})
+        self.wfile.write(f"data: {final}\n\n".encode())
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+def test_streaming_with_fake_endpoint():
+    print("--- Testing Streamed Decisions Against a Fake Endpoint ---")
+    pytest.importorskip("oci")
+    pytest.importorskip("pydantic")
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FakeStreamingChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    all_passed = True
+    try:
+        for app_name in APPS:
+            app = load_app(app_name)
+            app.STREAM_DECISIONS = True
+            oci = app.lazy_import("oci")
+            client = oci.generative_ai_inference.GenerativeAiInferenceClient(
+                {}, signer=fake_endpoint_signer(oci),
+                service_endpoint=f"http://127.0.0.1:{server.server_address[1]}"
+            )
+            app.CHAT_METRICS.calls.clear()
+            started = []
+            start = time.perf_counter()
+            decision = app.call_oci_genai(
+                client, "cohere.command-r-plus-08-2024", "ocid1.compartment.test", "sys", "stream",
+                on_tool_call=lambda name, args: started.append((name, time.perf_counter() - start))
+            )
+            total = time.perf_counter() - start
+
+            if [call.tool_name for call in decision.tool_calls] == ["add_numbers", "echo"]:
+                print(f"✅ {app_name}: streamed decision validated (Correct)")
+            else:
+                print(f"❌ {app_name}: unexpected decision {decision}")
+                all_passed = False
+            if [name for name, _ in started] == ["add_numbers", "echo"] and started[-1][1] < total * 0.8:
+                print(f"✅ {app_name}: tools started at {started[0][1] * 1000:.0f} ms, stream ended at {total * 1000:.0f} ms (Correct)")
+            else:
+                print(f"❌ {app_name}: tools not started early: {started}, total {total:.3f}s")
+                all_passed = False
+            # The chat call returns at the headers; the metric has to cover the whole stream
+            metrics = app.CHAT_METRICS.calls[-1]
+            if metrics["total_ms"] > total * 1000 * 0.8 and metrics["first_event_ms"] < metrics["total_ms"] / 2:
+                print(f"✅ {app_name}: metrics cover the stream (first event {metrics['first_event_ms']:.0f} ms, "
+                      f"total {metrics['total_ms']:.0f} ms) (Correct)")
+            else:
+                print(f"❌ {app_name}: metrics stop early: {metrics}, stream took {total * 1000:.0f} ms")
+                all_passed = False
+    finally:
+        server.shutdown()
+
+    assert all_passed
+
+if __name__ == "__main__":
+    test_auth_method_cache()
+    test_decision_cache()
+    test_parallel_tool_calls()
+    test_streamed_decision_parsing()
+    test_http_pool_import_fallback()
+    test_connection_reuse_with_fake_endpoint()
+    test_streaming_with_fake_endpoint()
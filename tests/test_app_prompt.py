@@ -0,0 +1,124 @@
+import os
+import copy
+import importlib.util
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '../src')
+APPS = ["5-2-app_oci.py", "6-1-app_oci.py"]
+
+def load_app(app):
+    spec = importlib.util.spec_from_file_location(f"app_{app[:3]}", os.path.join(SRC_DIR, app))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+ADD_NUMBERS = {
+    "name": "add_numbers",
+    "description": "Add two numbers together",
+    "inputSchema": {"type": "object", "properties": {"a": {"type": "number"}, "b": {"type": "number"}}, "required": ["a", "b"]},
+}
+
+def make_catalog():
+    tools = [ADD_NUMBERS]
+    for domain, what in [("weather", "weather forecast"), ("invoice", "billing invoices"), ("inventory", "warehouse 在庫 stock"),
+                         ("calendar", "calendar events"), ("email", "email messages")]:
+        for action in ("get", "list", "search", "create", "delete"):
+            tools.append({
+                "name": f"{action}_{domain}",
+                "description": f"{action.capitalize()} {what}, with paging and filters for large result sets.",
+                "inputSchema": {"type": "object", "properties": {
+                    "query": {"type": "string", "description": "Keyword  or\nid"},
+                    "format": {"type": "string", "enum": ["csv", "json"]},
+                    "tags": {"type": "array", "items": {"type": "string"}},
+                }, "required": ["query"]},
+            })
+    return tools
+
+def test_prompt_builder():
+    print("--- Testing Compact, Budgeted Tool Prompts ---")
+    all_passed = True
+    for app_name in APPS:
+        app = load_app(app_name)
+        catalog = make_catalog()
+
+        roomy = app.PromptBuilder(catalog, token_budget=100_000)
+        roomy_prompt = roomy.build("BASE", "anything", "RULES")
+        unchanged = roomy.set_tools(catalog) or roomy.set_tools(copy.deepcopy(catalog))
+        changed = roomy.set_tools(catalog[:-1])
+
+        tight = app.PromptBuilder(catalog, token_budget=120)
+        tight.build("BASE", "What is the weather forecast for tomorrow?", "RULES")
+        weather_stats = tight.last_stats
+        weather = [tight.tools[i]["name"] for i in tight.select("What is the weather forecast for tomorrow?")]
+        japanese = [tight.tools[i]["name"] for i in tight.select("在庫を確認して")]
+        fallback_prompt = tight.build("BASE", "hello there", "RULES")
+        fallback_stats = tight.last_stats
+        fallback = [tight.tools[i]["name"] for i in tight.select("hello there")]
+
+        checks = [
+            ("compact tool line", app.render_tool(ADD_NUMBERS) == "add_numbers(a: number, b: number) - Add two numbers together"),
+            ("optional, enum, array and descriptions", app.render_tool(catalog[1]).startswith(
+                'get_weather(query: string (Keyword or id), format?: "csv"|"json", tags?: string[]) - Get weather forecast')),
+            ("stop words dropped, words stemmed, bigrams for kanji", app.tokenize("Translate the INVOICES 在庫一覧")
+             == ["translat", "invoic", "在庫", "庫一", "一覧"]),
+            ("token estimate", app.estimate_tokens("abcdefgh") == 2 and app.estimate_tokens("在庫") == 2),
+            ("whole catalog listed within budget", roomy.last_stats["tools"] == len(catalog)
+             and roomy_prompt.startswith("BASE\n\n") and roomy_prompt.endswith("\n\nRULES")),
+            ("lines rendered once per tools-list version", not unchanged and changed),
+            ("over budget only relevant tools listed", weather and all("weather" in name for name in weather)),
+            ("selection stays within the budget", 0 < weather_stats["tokens"] <= 120 and weather_stats["catalog"] == len(catalog)),
+            ("non-ASCII query matches", japanese and all("inventory" in name for name in japanese)),
+            ("no-overlap query falls back to the head of the catalog", fallback and fallback[0] == "add_numbers"
+             and "add_numbers(" in fallback_prompt and "(no tool matches this request)" not in fallback_prompt),
+            ("fallback stays within the budget", 0 < fallback_stats["tokens"] <= 120),
+        ]
+        for name, ok in checks:
+            if ok:
+                print(f"✅ {app_name}: {name} (Correct)")
+            else:
+                print(f"❌ {app_name}: {name} failed")
+                all_passed = False
+
+    assert all_passed
+
+def test_tool_index():
+    print("--- Testing BM25 Tool Index ---")
+    all_passed = True
+    for app_name in APPS:
+        app = load_app(app_name)
+        tools = [
+            {"name": "get_weather", "description": "Current conditions for a city."},
+            {"name": "send_email", "description": "Send an email, can mention the weather."},
+            {"name": "convertUnits", "description": "Convert between units.",
+             "inputSchema": {"type": "object", "properties": {"celsius": {"type": "number"}}}},
+            {"name": "list_stock", "description": "倉庫の在庫を一覧します。"},
+        ]
+        # 100 tools sharing the common verb "get"
+        tools += [{"name": f"get_record_{i}", "description": f"Get record number {i}."} for i in range(100)]
+        index = app.ToolIndex(tools)
+        names = lambda results: [tools[doc]["name"] for doc, _ in results]
+
+        weather = names(index.search("weather please"))
+        common_only = index.search("get")
+        boosted = names(index.search("get weather", limit=1))
+
+        checks = [
+            ("name match ranks above description match", weather[:2] == ["get_weather", "send_email"]),
+            ("camelCase names and property names indexed", names(index.search("convert celsius")) == ["convertUnits"]),
+            ("kanji bigrams matched", names(index.search("在庫はありますか")) == ["list_stock"]),
+            ("common term alone still searched", len(common_only) == 101),
+            ("common term boosts rarer matches", boosted == ["get_weather"]),
+            ("limit keeps the best", len(index.search("get", limit=5)) == 5),
+            ("unknown terms find nothing", index.search("zzz") == []),
+        ]
+        for name, ok in checks:
+            if ok:
+                print(f"✅ {app_name}: {name} (Correct)")
+            else:
+                print(f"❌ {app_name}: {name} failed")
+                all_passed = False
+
+    assert all_passed
+
+if __name__ == "__main__":
+    test_prompt_builder()
+    test_tool_index()
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+import os
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '../src')
+APPS = ["5-2-app_oci.py", "6-1-app_oci.py"]
+HEAVY_MODULES = {"oci", "pydantic", "dotenv"}
+
+# Wall time allowed for importing an app module, excluding interpreter start-up.
+# Loading the MCP client (asyncio, subprocess, the JSON codec) is ~50 ms; the oci SDK alone is far more.
+IMPORT_BUDGET_MS = float(os.environ.get("APP_IMPORT_BUDGET_MS", "150"))
+
+MARKER = "--- app import starts here ---"
+
+def measure_import(app):
+    """Imports the app under -X importtime; returns (top-level module -> cumulative us, total ms)."""
+    code = (
+        "import sys, importlib.util\n"
+        f"sys.stderr.write({MARKER!r} + '\\n')\n"
+        f"spec = importlib.util.spec_from_file_location('app', {os.path.join(SRC_DIR, app)!r})\n"
+        "module = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(module)\n"
+    )
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, timeout=30)
+    assert process.returncode == 0, process.stderr
+
+    lines = process.stderr.split(MARKER, 1)[1].splitlines()
+    top_level = {}
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            # Nested imports are indented one level deeper than their importer
+            top_level[name.strip()] = int(cumulative)
+    return top_level, sum(top_level.values()) / 1000
+
+def test_app_import_time():
+    print("--- Testing App Start-up Import Budget ---")
+    all_passed = True
+    for app in APPS:
+        top_level, total_ms = measure_import(app)
+        imported = {name.split(".")[0] for name in top_level}
+        eager = sorted(HEAVY_MODULES & imported)
+        if not eager:
+            print(f"✅ {app}: oci / pydantic / dotenv deferred (Correct)")
+        else:
+            print(f"❌ {app}: imported at start-up: {eager}")
+            all_passed = False
+
+        if total_ms <= IMPORT_BUDGET_MS:
+            print(f"✅ {app}: imports took {total_ms:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms) (Correct)")
+        else:
+            slowest = sorted(top_level.items(), key=lambda item: -item[1])[:5]
+            print(f"❌ {app}: imports took {total_ms:.1f} ms, over the {IMPORT_BUDGET_MS:.0f} ms budget; slowest: {slowest}")
+            all_passed = False
+
+    assert all_passed
+
+if __name__ == "__main__":
+    test_app_import_time()
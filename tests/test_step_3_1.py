@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import os
+import json
+
+SERVER_PATH = os.path.join(os.path.dirname(__file__), '../src/3-1-server.py')
+
+def run_server(lines, timeout=5):
+    process = subprocess.Popen(
+        [sys.executable, SERVER_PATH],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    stdout, stderr = process.communicate(input="".join(line + "\n" for line in lines), timeout=timeout)
+    return [json.loads(line) for line in stdout.strip().split('\n') if line], stderr
+
+def test_dispatch_table():
+    print("--- Testing Step 3-1 Dispatch Table ---")
+    requests = [
+        {"jsonrpc": "2.0", "method": "initialize", "params": {"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "test", "version": "1.0"}}, "id": 1},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": "add_numbers", "arguments": {"a": 10, "b": 20}}, "id": 2},
+        {"jsonrpc": "2.0", "method": "unknown/method", "id": 3},
+    ]
+    # Valid JSON that is not a request object must not stop the server
+    lines = [json.dumps(requests[0]), json.dumps(requests[1]), "[1]", '"x"', json.dumps(requests[2]), json.dumps(requests[3])]
+    responses, stderr = run_server(lines)
+    by_id = {r.get("id"): r for r in responses if r.get("id") is not None}
+    invalid = [r for r in responses if r.get("id") is None]
+
+    checks = [
+        ("initialize", "serverInfo" in by_id.get(1, {}).get("result", {})),
+        ("tools/call", by_id.get(2, {}).get("result", {}).get("content", [{}])[0].get("text") == "30"),
+        ("unknown method", by_id.get(3, {}).get("error", {}).get("code") == -32601),
+        ("non-object frames rejected with -32600", [r.get("error", {}).get("code") for r in invalid] == [-32600, -32600]),
+        ("server kept running", len(responses) == 5),
+    ]
+    all_passed = True
+    for name, ok in checks:
+        if ok:
+            print(f"✅ {name} (Correct)")
+        else:
+            print(f"❌ {name} invalid: {responses} {stderr}")
+            all_passed = False
+
+    assert all_passed
+
+if __name__ == "__main__":
+    test_dispatch_table()
@@ -0,0 +1,521 @@
+import subprocess
+import sys
+import os
+import json
+import time
+import base64
+import tempfile
+import importlib.util
+
+SERVER_PATH = os.path.join(os.path.dirname(__file__), '../src/6-1-server.py')
+
+def load_server():
+    spec = importlib.util.spec_from_file_location("server_6_1", SERVER_PATH)
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    return server
+
+def run_server(requests, timeout=5, env=None):
+    full_input = "".join(json.dumps(r) + "\n" for r in requests)
+    process = subprocess.Popen(
+        [sys.executable, SERVER_PATH],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env
+    )
+    stdout, stderr = process.communicate(input=full_input, timeout=timeout)
+    responses = [json.loads(line) for line in stdout.strip().split('\n') if line]
+    return {r.get("id"): r for r in responses}, stderr
+
+def test_dispatcher():
+    requests = [
+        {"jsonrpc": "2.0", "method": "initialize", "params": {"protocolVersion": "2025-11-25", "capabilities": {}, "clientInfo": {"name": "test", "version": "1.0"}}, "id": 1},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": "add_numbers", "arguments": {"a": 10, "b": 20}}, "id": 2},
+        {"jsonrpc": "2.0", "method": "prompts/get", "params": {"name": "math_tutor"}, "id": 3},
+        {"jsonrpc": "2.0", "method": "prompts/get", "params": {"name": "missing"}, "id": 4},
+        {"jsonrpc": "2.0", "method": "unknown/method", "id": 5},
+    ]
+
+    print("--- Testing Method Registry Dispatcher ---")
+    responses, stderr = run_server(requests)
+    all_passed = True
+
+    checks = [
+        ("initialize", "prompts" in responses.get(1, {}).get("result", {}).get("capabilities", {})),
+        ("notifications/initialized", "Connection initialized successfully." in stderr and len(responses) == 5),
+        ("tools/call", responses.get(2, {}).get("result", {}).get("content", [{}])[0].get("text") == "30.0"),
+        ("prompts/get", len(responses.get(3, {}).get("result", {}).get("messages", [])) == 1),
+        ("prompts/get (missing)", responses.get(4, {}).get("error", {}).get("code") == -32602),
+        ("unknown method", responses.get(5, {}).get("error", {}).get("code") == -32601),
+    ]
+    for name, ok in checks:
+        if ok:
+            print(f"✅ {name} (Correct)")
+        else:
+            print(f"❌ {name} invalid: {responses}")
+            all_passed = False
+
+    assert all_passed
+
+def test_slow_tool_does_not_block_pings():
+    # Register a slow tool on top of the Step 6-1 server, then run its main loop
+    server_code = (
+        "import importlib.util, time\n"
+        f"spec = importlib.util.spec_from_file_location('server', {SERVER_PATH!r})\n"
+        "server = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(server)\n"
+        "server.TOOLS['sleep'] = {'definition': {'name': 'sleep'}, 'handler': lambda args: time.sleep(args['seconds']) or 'done'}\n"
+        "server.main()\n"
+    )
+    ping_count = 1000
+    slow_seconds = 2.0
+
+    print("--- Testing Concurrent Execution (slow tool + pings) ---")
+    process = subprocess.Popen(
+        [sys.executable, "-c", server_code],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+
+    full_input = json.dumps({"jsonrpc": "2.0", "method": "tools/call", "params": {"name": "sleep", "arguments": {"seconds": slow_seconds}}, "id": 0}) + "\n"
+    full_input += "".join(json.dumps({"jsonrpc": "2.0", "method": "ping", "id": i}) + "\n" for i in range(1, ping_count + 1))
+
+    start = time.monotonic()
+    process.stdin.write(full_input)
+    process.stdin.close()
+
+    pings_done_at = None
+    order = []
+    for line in process.stdout:
+        response = json.loads(line)
+        order.append(response["id"])
+        if response["id"] != 0 and len(order) == ping_count:
+            pings_done_at = time.monotonic() - start
+    process.wait(timeout=5)
+
+    all_passed = True
+    if len(order) == ping_count + 1 and order[-1] == 0:
+        print("✅ Slow tool response arrived after all pings (Correct)")
+    else:
+        print(f"❌ Unexpected response order (tool response at position {order.index(0) if 0 in order else None})")
+        all_passed = False
+
+    if pings_done_at is not None and pings_done_at < slow_seconds:
+        print(f"✅ {ping_count} pings answered in {pings_done_at:.2f}s while the tool was running (Correct)")
+    else:
+        print(f"❌ Pings were delayed by the slow tool: {pings_done_at}")
+        all_passed = False
+
+    assert all_passed
+
+def test_capped_methods_leave_a_worker_for_ping():
+    # Slow tools/call and resources/read on top of the Step 6-1 server
+    server_code = (
+        "import importlib.util, time\n"
+        f"spec = importlib.util.spec_from_file_location('server', {SERVER_PATH!r})\n"
+        "server = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(server)\n"
+        "server.TOOLS['sleep'] = {'definition': {'name': 'sleep'}, 'handler': lambda args: time.sleep(args['seconds']) or 'done'}\n"
+        "read = server.HANDLERS['resources/read']\n"
+        "server.HANDLERS['resources/read'] = lambda params, session: time.sleep(1.5) or read(params, session)\n"
+        "server.main()\n"
+    )
+    slow = [{"jsonrpc": "2.0", "method": "tools/call", "params": {"name": "sleep", "arguments": {"seconds": 1.5}}, "id": 100 + i}
+            for i in range(10)]
+    slow += [{"jsonrpc": "2.0", "method": "resources/read", "params": {"uri": "file:///missing.txt"}, "id": 200 + i}
+             for i in range(10)]
+    ping = {"jsonrpc": "2.0", "method": "ping", "id": 1}
+
+    print("--- Testing Capped Methods Leave a Worker for ping ---")
+    all_passed = True
+    # Default caps (4 + 4) fill all 8 workers; with 4 or 1 workers each cap alone does
+    for workers in ("8", "4", "1"):
+        process = subprocess.Popen(
+            [sys.executable, "-c", server_code],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            env={**os.environ, "MCP_SERVER_WORKERS": workers}
+        )
+        start = time.monotonic()
+        process.stdin.write("".join(json.dumps(r) + "\n" for r in slow + [ping]))
+        process.stdin.flush()
+        first = json.loads(process.stdout.readline())
+        elapsed = time.monotonic() - start
+        process.kill()
+        process.wait()
+
+        if first["id"] == 1 and elapsed < 1.0:
+            print(f"✅ {workers} workers: ping answered in {elapsed:.2f}s while both capped methods were saturated (Correct)")
+        else:
+            print(f"❌ {workers} workers: first response was {first.get('id')} after {elapsed:.2f}s")
+            all_passed = False
+
+    assert all_passed
+
+def test_resource_cache():
+    print("--- Testing Resource Content Cache ---")
+    server = load_server()
+    cache = server.ResourceCache(max_bytes=10)
+    all_passed = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path_a = os.path.join(tmp, "a.txt")
+        path_b = os.path.join(tmp, "b.txt")
+        with open(path_a, "w") as f:
+            f.write("aaaaaa")
+        with open(path_b, "w") as f:
+            f.write("bbbbbb")
+
+        first = cache.read_text(path_a)
+        second = cache.read_text(path_a)
+        if first == second == "aaaaaa" and cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1:
+            print("✅ Repeated read served from cache (Correct)")
+        else:
+            print(f"❌ Unexpected cache stats: {cache.stats()}")
+            all_passed = False
+
+        # Same size, new mtime -> must be re-read
+        with open(path_a, "w") as f:
+            f.write("AAAAAA")
+        os.utime(path_a, ns=(0, 1))
+        if cache.read_text(path_a) == "AAAAAA" and cache.stats()["misses"] == 2:
+            print("✅ Modified file re-read from disk (Correct)")
+        else:
+            print(f"❌ Stale content served: {cache.stats()}")
+            all_passed = False
+
+        # 6 + 6 bytes exceeds the 10 byte budget -> least recently used entry evicted
+        cache.read_text(path_b)
+        stats = cache.stats()
+        if stats["evictions"] == 1 and stats["entries"] == 1 and stats["bytes"] <= 10:
+            print("✅ LRU entry evicted under byte budget (Correct)")
+        else:
+            print(f"❌ Byte budget not enforced: {stats}")
+            all_passed = False
+
+    # An extensionless file is sniffed once; later reads of the unchanged file open nothing
+    with tempfile.TemporaryDirectory() as tmp:
+        server.DATA_DIR = os.path.realpath(tmp)
+        path = os.path.join(server.DATA_DIR, "README")
+        with open(path, "w") as f:
+            f.write("plain text")
+        opened = []
+        server.open = lambda *args, **kwargs: opened.append(args[0]) or open(*args, **kwargs)
+        reads = [server.handle_resources_read({"uri": f"file://{path}"}, None) for _ in range(3)]
+        del server.open
+        if all(r["contents"][0] == {"uri": f"file://{path}", "mimeType": "text/plain", "text": "plain text"} for r in reads) \
+                and len(opened) == 2:
+            print("✅ Repeated reads of an extensionless file reuse the sniffed type (Correct)")
+        else:
+            print(f"❌ Extensionless file opened {len(opened)} times for 3 reads: {reads}")
+            all_passed = False
+
+    assert all_passed
+
+def test_resource_catalog():
+    print("--- Testing Resource Catalog ---")
+    server = load_server()
+    all_passed = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("b.txt", "a.txt"):
+            open(os.path.join(tmp, name), "w").close()
+        os.mkdir(os.path.join(tmp, "subdir"))
+        past = time.time() - 10
+        os.utime(tmp, (past, past))
+
+        catalog = server.ResourceCatalog(tmp)
+        names = [r["name"] for r in catalog.list()]
+        catalog.list()
+        if names == ["a.txt", "b.txt"] and catalog.scans == 1:
+            print("✅ Catalog lists files only, scanned once (Correct)")
+        else:
+            print(f"❌ Unexpected catalog: {names} (scans={catalog.scans})")
+            all_passed = False
+
+        open(os.path.join(tmp, "c.txt"), "w").close()
+        os.remove(os.path.join(tmp, "a.txt"))
+        names = [r["name"] for r in catalog.list()]
+        if names == ["b.txt", "c.txt"] and catalog.scans == 2:
+            print("✅ Catalog refreshed after directory change (Correct)")
+        else:
+            print(f"❌ Catalog not refreshed: {names} (scans={catalog.scans})")
+            all_passed = False
+
+    assert all_passed
+
+def test_list_pagination():
+    print("--- Testing Cursor Pagination ---")
+    server = load_server()
+    server.LIST_PAGE_SIZE = 2
+    all_passed = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(5):
+            open(os.path.join(tmp, f"file_{i}.txt"), "w").close()
+        server.RESOURCE_CATALOG = server.ResourceCatalog(tmp)
+
+        names = []
+        params = {}
+        pages = 0
+        while True:
+            result = server.handle_resources_list(params, None)
+            names.extend(r["name"] for r in result["resources"])
+            pages += 1
+            if pages == 1:
+                # A file sorting before the cursor must not shift the following pages
+                open(os.path.join(tmp, "file_0a.txt"), "w").close()
+            if "nextCursor" not in result:
+                break
+            params = {"cursor": result["nextCursor"]}
+
+    if names == [f"file_{i}.txt" for i in range(5)] and pages == 3:
+        print("✅ resources/list paged through 5 files in 3 pages (Correct)")
+    else:
+        print(f"❌ Unexpected pages: {names} ({pages} pages)")
+        all_passed = False
+
+    # Not base64, not a string, and well-formed cursors holding the wrong kind of position
+    bad_cursors = [
+        (server.handle_tools_list, "not-a-cursor"),
+        (server.handle_tools_list, 5),
+        (server.handle_tools_list, {"offset": 1}),
+        (server.handle_tools_list, server.encode_cursor("file_1.txt")),
+        (server.handle_tools_list, server.encode_cursor(True)),
+        (server.handle_resources_list, 5),
+        (server.handle_resources_list, server.encode_cursor(3)),
+    ]
+    for handler, cursor in bad_cursors:
+        try:
+            handler({"cursor": cursor}, None)
+            print(f"❌ Invalid cursor {cursor!r} accepted by {handler.__name__}")
+            all_passed = False
+        except server.JsonRpcError as e:
+            if e.code == -32602:
+                print(f"✅ Invalid cursor {cursor!r} rejected by {handler.__name__} with -32602 (Correct)")
+            else:
+                print(f"❌ Invalid cursor {cursor!r} gave {e.code}")
+                all_passed = False
+        except Exception as e:
+            print(f"❌ Invalid cursor {cursor!r} raised {type(e).__name__}: {e}")
+            all_passed = False
+
+    assert all_passed
+
+def test_binary_resource():
+    print("--- Testing Binary Resources (blob) ---")
+    data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+    path = os.path.join(data_dir, "_test_binary.png")
+    payload = bytes(range(256)) * 1000 + b"\x00\xff"
+    with open(path, "wb") as f:
+        f.write(payload)
+
+    try:
+        responses, _ = run_server([
+            {"jsonrpc": "2.0", "method": "resources/read", "params": {"uri": f"file://{path}"}, "id": 1},
+            {"jsonrpc": "2.0", "method": "resources/read", "params": {"uri": f"file://{path}", "offset": 255, "length": 3}, "id": 2},
+        ])
+    finally:
+        os.remove(path)
+
+    content = responses.get(1, {}).get("result", {}).get("contents", [{}])[0]
+    ranged = responses.get(2, {}).get("result", {}).get("contents", [{}])[0]
+    all_passed = True
+
+    if content.get("mimeType") == "image/png" and base64.b64decode(content.get("blob", "")) == payload:
+        print("✅ Binary file returned as base64 blob (Correct)")
+    else:
+        print(f"❌ Binary read invalid: {str(content)[:200]}")
+        all_passed = False
+
+    if base64.b64decode(ranged.get("blob", "")) == payload[255:258]:
+        print("✅ Ranged binary read returned the byte range (Correct)")
+    else:
+        print(f"❌ Ranged binary read invalid: {ranged}")
+        all_passed = False
+
+    assert all_passed
+
+def test_unknown_extension_sniffing():
+    print("--- Testing MIME Sniffing for Unknown Extensions ---")
+    data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+    text_path = os.path.join(data_dir, "_test_Makefile")
+    binary_path = os.path.join(data_dir, "_test_blob.unknownext")
+    text = "all:\n\techo こんにちは\n"
+    payload = b"\xff\xfe\x00\x01" * 100
+    with open(text_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    with open(binary_path, "wb") as f:
+        f.write(payload)
+
+    try:
+        responses, _ = run_server([
+            {"jsonrpc": "2.0", "method": "resources/read", "params": {"uri": f"file://{text_path}"}, "id": 1},
+            {"jsonrpc": "2.0", "method": "resources/read", "params": {"uri": f"file://{binary_path}"}, "id": 2},
+        ])
+    finally:
+        os.remove(text_path)
+        os.remove(binary_path)
+
+    text_content = responses.get(1, {}).get("result", {}).get("contents", [{}])[0]
+    binary_content = responses.get(2, {}).get("result", {}).get("contents", [{}])[0]
+    all_passed = True
+
+    if text_content.get("mimeType") == "text/plain" and text_content.get("text") == text:
+        print("✅ UTF-8 file without an extension returned as text/plain (Correct)")
+    else:
+        print(f"❌ Extensionless text read invalid: {text_content}")
+        all_passed = False
+
+    if binary_content.get("mimeType") == "application/octet-stream" and base64.b64decode(binary_content.get("blob", "")) == payload:
+        print("✅ Non-UTF-8 file with an unknown extension returned as a blob (Correct)")
+    else:
+        print(f"❌ Unknown binary read invalid: {str(binary_content)[:200]}")
+        all_passed = False
+
+    assert all_passed
+
+def test_json_backends():
+    print("--- Testing JSON Codec Backends ---")
+    requests = [
+        {"jsonrpc": "2.0", "method": "initialize", "params": {"protocolVersion": "2025-11-25", "capabilities": {}, "clientInfo": {"name": "テスト", "version": "1.0"}}, "id": 1},
+        {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": "add_numbers", "arguments": {"a": 1.5, "b": 2}}, "id": 2},
+        {"jsonrpc": "2.0", "method": "prompts/get", "params": {"name": "math_tutor"}, "id": 3},
+    ]
+    all_passed = True
+    outputs = {}
+    for backend in ("json", "auto"):
+        responses, stderr = run_server(requests, env={**os.environ, "MCP_JSON_BACKEND": backend})
+        outputs[backend] = responses
+        if len(responses) == 3 and responses[2]["result"]["content"][0]["text"] == "3.5":
+            print(f"✅ MCP_JSON_BACKEND={backend} served all requests (Correct)")
+        else:
+            print(f"❌ MCP_JSON_BACKEND={backend} failed: {responses} {stderr}")
+            all_passed = False
+
+    if outputs["json"] == outputs["auto"]:
+        print("✅ Backends produce identical responses (Correct)")
+    else:
+        print("❌ Backends disagree")
+        all_passed = False
+
+    # Every backend's decode errors are caught: a malformed line is skipped, not fatal
+    ping = json.dumps({"jsonrpc": "2.0", "method": "ping", "id": 1}).encode()
+    process = subprocess.run([sys.executable, SERVER_PATH], input=b"{not json\n\xff\n" + ping + b"\n", capture_output=True, timeout=5)
+    if json.loads(process.stdout)["id"] == 1 and b"Invalid JSON" in process.stderr:
+        print("✅ Malformed input skipped, server kept running (Correct)")
+    else:
+        print(f"❌ Malformed input not rejected: {process.stdout!r}")
+        all_passed = False
+
+    # ids wider than 64 bits come back exactly, not as floats
+    wide_ids = [2**70, -(2**63 + 5)]
+    responses, stderr = run_server([{"jsonrpc": "2.0", "method": "ping", "id": i} for i in wide_ids],
+                                   env={**os.environ, "MCP_JSON_BACKEND": "auto"})
+    if sorted(responses, key=str) == sorted(wide_ids, key=str):
+        print("✅ Integers wider than 64 bits echoed exactly (Correct)")
+    else:
+        print(f"❌ Wide integer ids changed: {list(responses)} {stderr}")
+        all_passed = False
+
+    # A wide id in a batch that also carries a blob: the stdlib retry must reuse the blob placeholder
+    data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+    path = os.path.join(data_dir, "_test_wide_id_blob.png")
+    payload = bytes(range(256)) * 10
+    with open(path, "wb") as f:
+        f.write(payload)
+    batch = [
+        {"jsonrpc": "2.0", "method": "resources/read", "params": {"uri": f"file://{path}"}, "id": 1},
+        {"jsonrpc": "2.0", "method": "ping", "id": 2**70},
+    ]
+    try:
+        process = subprocess.run([sys.executable, SERVER_PATH], input=json.dumps(batch) + "\n", capture_output=True,
+                                 text=True, timeout=5, env={**os.environ, "MCP_JSON_BACKEND": "auto"})
+    finally:
+        os.remove(path)
+    try:
+        responses = {r["id"]: r for r in json.loads(process.stdout)}
+        blob = responses[1]["result"]["contents"][0]["blob"]
+        ok = base64.b64decode(blob) == payload and responses[2**70]["result"] == {}
+    except (ValueError, KeyError, IndexError):
+        ok = False
+    if ok:
+        print("✅ Batch with a blob and a wide integer id encoded once (Correct)")
+    else:
+        print(f"❌ Batch with a blob and a wide integer id lost: {process.stdout[:200]!r} {process.stderr[-300:]}")
+        all_passed = False
+
+    assert all_passed
+
+def test_flush_on_drain():
+    print("--- Testing Flush-on-Drain Writer ---")
+    server = load_server()
+
+    class RecordingTransport:
+        def __init__(self):
+            self.buffered = []
+            self.flushed = []
+        def write(self, data):
+            self.buffered.append(data)
+        def flush(self):
+            if self.buffered:
+                self.flushed.append(b"".join(self.buffered))
+                self.buffered = []
+
+    all_passed = True
+    # Generous delay so a slow test machine cannot split the burst with a timeout flush
+    server.FLUSH_DELAY_SECONDS = 1.0
+    backlog = [3]
+    transport = RecordingTransport()
+    writer = server.ResponseWriter(transport, flush_policy="drain", backlog=lambda: backlog[0])
+    for i in range(3):
+        backlog[0] -= 1
+        writer.send({"jsonrpc": "2.0", "id": i, "result": {}})
+    writer.close()
+    if len(transport.flushed) == 1 and transport.flushed[0].count(b"\n") == 3:
+        print("✅ Burst of 3 responses flushed once (Correct)")
+    else:
+        print(f"❌ Unexpected flushes: {transport.flushed}")
+        all_passed = False
+
+    # Still pending requests that never answer (notifications) must not hold a frame back
+    server.FLUSH_DELAY_SECONDS = 0.01
+    transport = RecordingTransport()
+    writer = server.ResponseWriter(transport, flush_policy="drain", backlog=lambda: 1)
+    writer.send({"jsonrpc": "2.0", "id": 1, "result": {}})
+    time.sleep(0.5)
+    if len(transport.flushed) == 1:
+        print("✅ Lone response flushed despite pending requests (Correct)")
+    else:
+        print(f"❌ Response stuck in buffer: {transport.buffered}")
+        all_passed = False
+    writer.close()
+
+    transport = RecordingTransport()
+    writer = server.ResponseWriter(transport, flush_policy="always")
+    for i in range(3):
+        writer.send({"jsonrpc": "2.0", "id": i, "result": {}})
+    writer.close()
+    if len(transport.flushed) == 3:
+        print("✅ flush_policy=always flushes every frame (Correct)")
+    else:
+        print(f"❌ Unexpected flushes: {transport.flushed}")
+        all_passed = False
+
+    assert all_passed
+
+if __name__ == "__main__":
+    test_dispatcher()
+    test_slow_tool_does_not_block_pings()
+    test_capped_methods_leave_a_worker_for_ping()
+    test_resource_cache()
+    test_resource_catalog()
+    test_list_pagination()
+    test_binary_resource()
+    test_unknown_extension_sniffing()
+    test_json_backends()
+    test_flush_on_drain()
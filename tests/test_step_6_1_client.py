@@ -0,0 +1,391 @@
+import sys
+import os
+import json
+import socket
+import asyncio
+import time
+import tempfile
+import threading
+import subprocess
+import concurrent.futures
+import importlib.util
+
+CLIENT_PATH = os.path.join(os.path.dirname(__file__), '../src/6-1-client.py')
+
+spec = importlib.util.spec_from_file_location("mcp_client_module", CLIENT_PATH)
+mcp_client_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mcp_client_module)
+
+def test_async_client():
+    async def run():
+        async with await mcp_client_module.AsyncMCPClient.start() as client:
+            init = await client.send_request("initialize", {
+                "protocolVersion": "2025-11-25",
+                "capabilities": {},
+                "clientInfo": {"name": "test", "version": "1.0"}
+            })
+            await client.send_notification("notifications/initialized", {})
+            pings = await asyncio.gather(*(client.send_request("ping", {}) for _ in range(2000)))
+            call = await client.send_request("tools/call", {"name": "add_numbers", "arguments": {"a": 1, "b": 2}})
+            return init, pings, call
+
+    print("--- Testing AsyncMCPClient ---")
+    init, pings, call = asyncio.run(run())
+    all_passed = True
+
+    if "serverInfo" in init:
+        print("✅ initialize returned serverInfo (Correct)")
+    else:
+        print(f"❌ initialize invalid: {init}")
+        all_passed = False
+
+    if len(pings) == 2000 and all(p == {} for p in pings):
+        print("✅ 2000 concurrent pings resolved (Correct)")
+    else:
+        print("❌ Concurrent pings did not all resolve")
+        all_passed = False
+
+    if call.get("content", [{}])[0].get("text") == "3.0":
+        print("✅ tools/call returned 3.0 (Correct)")
+    else:
+        print(f"❌ tools/call invalid: {call}")
+        all_passed = False
+
+    assert all_passed
+
+def test_send_batch():
+    print("--- Testing Batched Requests ---")
+    client = mcp_client_module.MCPClient()
+    try:
+        results = client.send_batch(
+            [("tools/call", {"name": "add_numbers", "arguments": {"a": i, "b": 1}}) for i in range(50)]
+            + [("ping", {})]
+        )
+    finally:
+        client.running = False
+        client.process.terminate()
+        client.process.wait()
+
+    texts = [r["content"][0]["text"] for r in results[:50]]
+    if texts == [str(float(i + 1)) for i in range(50)] and results[50] == {}:
+        print("✅ send_batch returned 51 results in order (Correct)")
+    else:
+        print(f"❌ send_batch results invalid: {results}")
+    assert texts == [str(float(i + 1)) for i in range(50)] and results[50] == {}
+
+def test_chunked_read():
+    print("--- Testing Ranged / Streamed resources/read ---")
+    data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+    path = os.path.join(data_dir, "_test_chunked_read.txt")
+    expected = "あいう" * 10000 + "end"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(expected)
+
+    client = mcp_client_module.MCPClient()
+    all_passed = True
+    try:
+        chunks = list(client.read_resource_chunks(f"file://{path}", chunk_size=1000))
+        if len(chunks) > 1 and "".join(chunks) == expected:
+            print(f"✅ Streamed read reassembled {len(chunks)} chunks (Correct)")
+        else:
+            print(f"❌ Streamed read invalid ({len(chunks)} chunks)")
+            all_passed = False
+
+        # 4 bytes would split the second character: the range is cut back to 3 bytes
+        result = client.send_request("resources/read", {"uri": f"file://{path}", "offset": 0, "length": 4})
+        if result["contents"][0]["text"] == "あ" and result["_meta"]["length"] == 3:
+            print("✅ Ranged read stops at a character boundary (Correct)")
+        else:
+            print(f"❌ Ranged read invalid: {result}")
+            all_passed = False
+
+        # offset 1 is inside "あ": the read starts at the next character and reports where
+        result = client.send_request("resources/read", {"uri": f"file://{path}", "offset": 1, "length": 6})
+        if result["contents"] and result["contents"][0]["text"] == "いう" and result["_meta"]["offset"] == 3:
+            print("✅ Mid-character offset moves to the next character boundary (Correct)")
+        else:
+            print(f"❌ Mid-character offset invalid: {result}")
+            all_passed = False
+
+        chunks = list(client.read_resource_chunks(f"file://{path}", chunk_size=1000, offset=2))
+        if "".join(chunks) == expected[1:]:
+            print("✅ Streamed read from a mid-character offset (Correct)")
+        else:
+            print(f"❌ Streamed read from a mid-character offset invalid ({len(chunks)} chunks)")
+            all_passed = False
+    finally:
+        client.running = False
+        client.process.terminate()
+        client.process.wait()
+        os.remove(path)
+
+    assert all_passed
+
+def start_listening_server(address, env=None):
+    process = subprocess.Popen(
+        [sys.executable, mcp_client_module.SERVER_SCRIPT, "--listen", address],
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env
+    )
+    # The server reports the bound address once it accepts connections (tcp port 0 -> real port)
+    for line in process.stderr:
+        if line.startswith("Listening on "):
+            # Keep draining stderr so the server never blocks logging into a full pipe
+            threading.Thread(target=process.stderr.read, daemon=True).start()
+            return process, line.split("Listening on ", 1)[1].strip()
+    raise RuntimeError("server exited before listening")
+
+def test_socket_transport():
+    print("--- Testing Socket Transport (multiple clients) ---")
+    all_passed = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for address in (f"unix:{os.path.join(tmp, 'mcp.sock')}", "tcp:127.0.0.1:0"):
+            process, bound = start_listening_server(address)
+            try:
+                def session(i):
+                    client = mcp_client_module.MCPClient.connect(bound)
+                    try:
+                        # Odd clients skip initialize: sessions are independent and it is not enforced
+                        if i % 2 == 0:
+                            client.send_request("initialize", {
+                                "protocolVersion": "2025-11-25",
+                                "capabilities": {},
+                                "clientInfo": {"name": f"client-{i}", "version": "1.0"}
+                            })
+                            client.send_notification("notifications/initialized", {})
+                        results = [
+                            client.send_request("tools/call", {"name": "add_numbers", "arguments": {"a": i, "b": j}})
+                            for j in range(50)
+                        ]
+                        return [r["content"][0]["text"] for r in results] == [str(float(i + j)) for j in range(50)]
+                    finally:
+                        client.close()
+
+                with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+                    outcomes = list(pool.map(session, range(8)))
+                # The server outlives its clients
+                late = mcp_client_module.MCPClient.connect(bound)
+                try:
+                    alive = late.send_request("ping", {}) == {}
+                finally:
+                    late.close()
+            finally:
+                process.terminate()
+                process.wait()
+
+            if all(outcomes) and alive:
+                print(f"✅ 8 concurrent clients served over {address.split(':')[0]} (Correct)")
+            else:
+                print(f"❌ {address.split(':')[0]} sessions failed: {outcomes}, alive={alive}")
+                all_passed = False
+
+    assert all_passed
+
+def test_slow_reader_does_not_stall_other_clients():
+    print("--- Testing Socket Backpressure (client that never reads) ---")
+    process, bound = start_listening_server("tcp:127.0.0.1:0")
+    _, host, port = bound.split(":")
+    flood = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # A small receive window so the unread responses back up into the server quickly
+    flood.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    flood.connect((host, int(port)))
+    try:
+        # 60k pings and never a read; 1 KB ids so the responses overflow the kernel's socket
+        # buffers and this client's writer gets stuck
+        pings = b"".join(json.dumps({"jsonrpc": "2.0", "method": "ping", "id": f"{i:01000d}"}).encode() + b"\n" for i in range(60000))
+        threading.Thread(target=flood.sendall, args=(pings,), daemon=True).start()
+        time.sleep(1.0)
+
+        def ping():
+            client = mcp_client_module.MCPClient.connect(bound)
+            try:
+                return client.send_request("ping", {})
+            finally:
+                client.close()
+
+        start = time.monotonic()
+        result = concurrent.futures.ThreadPoolExecutor(max_workers=1).submit(ping)
+        try:
+            answered = result.result(timeout=5) == {}
+        except concurrent.futures.TimeoutError:
+            answered = False
+        elapsed = time.monotonic() - start
+    finally:
+        flood.close()
+        process.terminate()
+        process.wait()
+
+    if answered:
+        print(f"✅ Second client answered in {elapsed:.2f}s while the first one stopped reading (Correct)")
+    else:
+        print("❌ Second client got no reply within 5s")
+    assert answered
+
+def anonymous_rss_bytes(pid):
+    # RssAnon leaves out the mmap'ed file pages, which the kernel can drop at any time
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def test_stream_to_stalled_client_is_bounded():
+    print("--- Testing Streamed Read to a Client That Never Reads ---")
+    data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+    path = os.path.join(data_dir, "_test_stalled_stream.txt")
+    file_bytes = 64 * 1024 * 1024
+    with open(path, "wb") as f:
+        f.write((b"x" * 1023 + b"\n") * (file_bytes // 1024))
+
+    # Two workers: resources/read may use only one, so a stream stuck forever would starve every later read
+    env = {**os.environ, "MCP_SERVER_WORKERS": "2", "MCP_SOCKET_STALL_TIMEOUT": "2"}
+    process, bound = start_listening_server("tcp:127.0.0.1:0", env)
+    _, host, port = bound.split(":")
+    stalled = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    stalled.connect((host, int(port)))
+    all_passed = True
+    try:
+        before = anonymous_rss_bytes(process.pid)
+        stalled.sendall(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "resources/read", "params": {
+            "uri": f"file://{path}", "stream": True, "chunkSize": 256 * 1024, "_meta": {"progressToken": "t1"}}}).encode() + b"\n")
+        time.sleep(1.0)
+        growth = anonymous_rss_bytes(process.pid) - before
+        if growth < file_bytes // 4:
+            print(f"✅ Server buffered {growth / 1e6:.1f} MB of a {file_bytes / 1e6:.0f} MB stream (Correct)")
+        else:
+            print(f"❌ Server buffered {growth / 1e6:.1f} MB of a {file_bytes / 1e6:.0f} MB stream")
+            all_passed = False
+
+        # Once the stall timeout aborts the stream, its worker serves other clients again
+        client = mcp_client_module.MCPClient.connect(bound)
+        try:
+            result = client.send_request("resources/read", {"uri": f"file://{path}", "offset": 0, "length": 5})
+        finally:
+            client.close()
+        if result["contents"][0]["text"] == "xxxxx":
+            print("✅ Stalled stream released its worker (Correct)")
+        else:
+            print(f"❌ Read after the stalled stream failed: {result}")
+            all_passed = False
+    finally:
+        stalled.close()
+        process.terminate()
+        process.wait()
+        os.remove(path)
+
+    assert all_passed
+
+def test_client_pool():
+    print("--- Testing MCPClientPool ---")
+    all_passed = True
+    with mcp_client_module.MCPClientPool(size=2) as pool:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as callers:
+            results = list(callers.map(
+                lambda i: pool.send_request("tools/call", {"name": "add_numbers", "arguments": {"a": i, "b": 1}}),
+                range(200)
+            ))
+        if [r["content"][0]["text"] for r in results] == [str(float(i + 1)) for i in range(200)]:
+            print("✅ 200 concurrent calls answered through 2 workers (Correct)")
+        else:
+            print("❌ Pool results invalid")
+            all_passed = False
+
+        # Kill one server process: the pool must route around it and start a replacement
+        victim = pool._workers[0]
+        victim.process.kill()
+        victim.process.wait()
+        deadline = time.monotonic() + 10
+        while not (pool.restarts == 1 and pool._workers[0].connected) and time.monotonic() < deadline:
+            try:
+                pool.send_request("ping", {})
+            except ConnectionError:
+                pass  # routed to the dead worker before its reader saw EOF
+            time.sleep(0.05)
+        pings = [pool.send_request("ping", {}) for _ in range(20)]
+        if pool.restarts == 1 and pool._workers[0] is not victim and all(p == {} for p in pings):
+            print("✅ Crashed worker replaced, requests keep succeeding (Correct)")
+        else:
+            print(f"❌ Crashed worker not replaced (restarts={pool.restarts})")
+            all_passed = False
+
+    assert all_passed
+
+def test_client_pool_startup_failure():
+    print("--- Testing MCPClientPool Startup Failure ---")
+    started = []
+
+    class FailingHandshakeClient(mcp_client_module.MCPClient):
+        def handshake(self, timeout=10):
+            if self is started[2]:
+                raise RuntimeError("handshake failed")
+            super().handshake(timeout)
+
+    def factory():
+        client = FailingHandshakeClient()
+        started.append(client)
+        return client
+
+    try:
+        mcp_client_module.MCPClientPool(size=4, client_factory=factory)
+        raised = False
+    except RuntimeError:
+        raised = True
+
+    running = [client for client in started if client.process.poll() is None]
+    if raised and len(started) == 4 and not running:
+        print("✅ Failed handshake re-raised, every started worker closed (Correct)")
+    else:
+        print(f"❌ Pool startup leaked workers: raised={raised}, {len(running)} of {len(started)} still running")
+        for client in running:
+            client.close()
+    assert raised and len(started) == 4 and not running
+
+def test_pipelined_handshake():
+    print("--- Testing Pipelined Handshake ---")
+    # A second tool and one entry per page: the handshake has to follow nextCursor past the pipelined first page
+    server_code = (
+        "import importlib.util\n"
+        f"spec = importlib.util.spec_from_file_location('server', {mcp_client_module.SERVER_SCRIPT!r})\n"
+        "server = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(server)\n"
+        "server.LIST_PAGE_SIZE = 1\n"
+        "server.TOOLS['echo'] = {'definition': {'name': 'echo'}, 'handler': lambda args: args['text']}\n"
+        "server.main()\n"
+    )
+    client = mcp_client_module.MCPClient(command=[sys.executable, "-c", server_code])
+    try:
+        client.start_handshake({"name": "test", "version": "1.0"})
+        client.handshake()
+        call = client.send_request("tools/call", {"name": "add_numbers", "arguments": {"a": 1, "b": 2}})
+    finally:
+        client.close()
+
+    checks = [
+        ("capabilities cached", "prompts" in client.capabilities and client.server_info["name"] == "my-prompts-server"),
+        ("every tools/list page fetched", [t["name"] for t in client.tools] == ["add_numbers", "echo"]),
+        ("prompts cached", [p["name"] for p in client.prompts] == ["math_tutor"]),
+        ("first tool call after handshake", call["content"][0]["text"] == "3.0"),
+        ("no pending requests left behind", not client._pending_requests),
+    ]
+    all_passed = True
+    for name, ok in checks:
+        if ok:
+            print(f"✅ {name} (Correct)")
+        else:
+            print(f"❌ {name} failed")
+            all_passed = False
+
+    assert all_passed
+
+if __name__ == "__main__":
+    test_async_client()
+    test_send_batch()
+    test_chunked_read()
+    test_socket_transport()
+    test_slow_reader_does_not_stall_other_clients()
+    test_stream_to_stalled_client_is_bounded()
+    test_client_pool()
+    test_client_pool_startup_failure()
+    test_pipelined_handshake()
@@ -0,0 +1,174 @@
+import subprocess
+import sys
+import os
+import json
+import threading
+import http.client
+
+SERVER_PATH = os.path.join(os.path.dirname(__file__), '../src/6-1-server.py')
+
+def start_http_server():
+    process = subprocess.Popen(
+        [sys.executable, SERVER_PATH, "--listen", "http:127.0.0.1:0"],
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    for line in process.stderr:
+        if line.startswith("Listening on "):
+            # Keep draining stderr so the server never blocks logging into a full pipe
+            threading.Thread(target=process.stderr.read, daemon=True).start()
+            _, host, port = line.split("Listening on ", 1)[1].strip().split(":")
+            return process, host, int(port)
+    raise RuntimeError("server exited before listening")
+
+def post(conn, message, session_id=None, accept="application/json, text/event-stream"):
+    headers = {"Content-Type": "application/json", "Accept": accept}
+    if session_id:
+        headers["Mcp-Session-Id"] = session_id
+    conn.request("POST", "/mcp", body=json.dumps(message), headers=headers)
+    response = conn.getresponse()
+    return response, response.read()
+
+def parse_sse(body):
+    return [json.loads(line[len("data: "):]) for line in body.decode().split("\n") if line.startswith("data: ")]
+
+def test_streamable_http():
+    print("--- Testing Streamable HTTP Transport ---")
+    data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+    path = os.path.join(data_dir, "_test_http_stream.txt")
+    expected = "streamed over SSE\n" * 1000
+    with open(path, "w") as f:
+        f.write(expected)
+
+    process, host, port = start_http_server()
+    conn = http.client.HTTPConnection(host, port, timeout=5)
+    all_passed = True
+    try:
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": "2025-11-25", "capabilities": {}, "clientInfo": {"name": "test", "version": "1.0"}}})
+        session_id = response.getheader("Mcp-Session-Id")
+        sock = conn.sock
+        checks = [("initialize returns a session id", response.status == 200 and session_id and "serverInfo" in json.loads(body)["result"])]
+
+        response, body = post(conn, {"jsonrpc": "2.0", "method": "notifications/initialized"}, session_id)
+        checks.append(("notification answered with 202", response.status == 202 and body == b""))
+
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 2, "method": "tools/call",
+                                     "params": {"name": "add_numbers", "arguments": {"a": 1, "b": 2}}}, session_id)
+        checks.append(("tools/call returns JSON", response.getheader("Content-Type") == "application/json"
+                       and json.loads(body)["result"]["content"][0]["text"] == "3.0"))
+        checks.append(("connection kept alive", conn.sock is sock))
+
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 3, "method": "resources/read", "params": {
+            "uri": f"file://{path}", "stream": True, "chunkSize": 4096, "_meta": {"progressToken": "t1"}}}, session_id)
+        events = parse_sse(body)
+        text = "".join(c["text"] for e in events[:-1] for c in e["params"]["contents"])
+        checks.append(("streamed read arrives as SSE", response.getheader("Content-Type") == "text/event-stream"
+                       and len(events) > 2 and text == expected and events[-1]["id"] == 3))
+
+        response, body = post(conn, {"jsonrpc": "2.0", "id": 30, "method": "resources/read", "params": {
+            "uri": f"file://{path}", "stream": True, "_meta": {"progressToken": "t2"}}}, session_id, accept="application/json")
+        checks.append(("streamed read without SSE is an error, not empty contents",
+                       response.getheader("Content-Type") == "application/json" and json.loads(body)["error"]["code"] == -32602))
+
+        response, _ = post(conn, {"jsonrpc": "2.0", "id": 4, "method": "ping"})
+        checks.append(("missing session id rejected with 400", response.status == 400))
+        response, _ = post(conn, {"jsonrpc": "2.0", "id": 5, "method": "ping"}, "no-such-session")
+        checks.append(("unknown session id rejected with 404", response.status == 404))
+
+        conn.request("DELETE", "/mcp", headers={"Mcp-Session-Id": session_id})
+        deleted = conn.getresponse()
+        deleted.read()
+        response, _ = post(conn, {"jsonrpc": "2.0", "id": 6, "method": "ping"}, session_id)
+        checks.append(("DELETE ends the session", deleted.status == 200 and response.status == 404))
+    finally:
+        conn.close()
+        process.terminate()
+        process.wait()
+        os.remove(path)
+
+    for name, ok in checks:
+        if ok:
+            print(f"✅ {name} (Correct)")
+        else:
+            print(f"❌ {name} failed")
+            all_passed = False
+
+    assert all_passed
+
+def test_content_length_validation():
+    print("--- Testing HTTP Content-Length Validation ---")
+    process, host, port = start_http_server()
+    cases = [
+        ("missing Content-Length", None, 400),
+        ("negative Content-Length", "-1", 400),
+        ("non-numeric Content-Length", "abc", 400),
+        ("oversized Content-Length", str(64 * 1024 * 1024 + 1), 413),
+    ]
+    all_passed = True
+    try:
+        for name, value, expected in cases:
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            try:
+                conn.putrequest("POST", "/mcp")
+                conn.putheader("Content-Type", "application/json")
+                if value is not None:
+                    conn.putheader("Content-Length", value)
+                conn.endheaders()
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            finally:
+                conn.close()
+            if status == expected:
+                print(f"✅ {name} rejected with {status} (Correct)")
+            else:
+                print(f"❌ {name} answered with {status}, expected {expected}")
+                all_passed = False
+    finally:
+        process.terminate()
+        process.wait()
+
+    assert all_passed
+
+def test_dns_rebinding_rejected():
+    print("--- Testing HTTP Host / Origin Checks (DNS rebinding) ---")
+    process, host, port = start_http_server()
+    initialize = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+        "protocolVersion": "2025-11-25", "capabilities": {}, "clientInfo": {"name": "test", "version": "1.0"}}})
+    cases = [
+        ("rebound name in both Host and Origin", "evil.example", "http://evil.example", 403),
+        ("rebound name in Host only", f"evil.example:{port}", None, 403),
+        ("foreign Origin with a loopback Host", f"127.0.0.1:{port}", "http://evil.example", 403),
+        ("loopback Host on another port", f"127.0.0.1:{port + 1}", None, 403),
+        ("loopback Host and Origin", f"localhost:{port}", "http://localhost:3000", 200),
+    ]
+    all_passed = True
+    try:
+        for name, host_header, origin, expected in cases:
+            conn = http.client.HTTPConnection(host, port, timeout=5)
+            try:
+                headers = {"Host": host_header, "Content-Type": "application/json", "Accept": "application/json"}
+                if origin:
+                    headers["Origin"] = origin
+                conn.request("POST", "/mcp", body=initialize, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status, session_id = response.status, response.getheader("Mcp-Session-Id")
+            finally:
+                conn.close()
+            if status == expected and (session_id is None) == (expected != 200):
+                print(f"✅ {name}: {status} (Correct)")
+            else:
+                print(f"❌ {name}: {status} (session {session_id}), expected {expected}")
+                all_passed = False
+    finally:
+        process.terminate()
+        process.wait()
+
+    assert all_passed
+
+if __name__ == "__main__":
+    test_streamable_http()
+    test_content_length_validation()
+    test_dns_rebinding_rejected()